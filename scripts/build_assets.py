@@ -0,0 +1,279 @@
+"""
+Build the fingerprinted, precompressed static asset bundles.
+
+Usage:
+    python -m scripts.build_assets
+
+Concatenates and minifies the application scripts and styles listed in src/model/assets.py,
+names each bundle after a hash of its content (app.<hash>.js, style.<hash>.css), writes gzip
+and, when the optional brotli package is installed, brotli variants next to it, and records
+the names in manifest.json. The bundles of the previous build are kept for pages that still
+reference them. The app serves the bundles from /assets/ with immutable caching;
+without a current build it falls back to the individual source files.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+from src.model import assets
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+HASH_LENGTH = 10
+# After these characters a "/" starts a regular expression rather than a division
+_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw"}
+
+
+def _previous_word(output):
+    match = re.search(r"([A-Za-z_$][\w$]*)\s*$", "".join(output[-20:]))
+    return match.group(1) if match else None
+
+
+def minify_js(source):
+    """
+    Remove comments, indentation, trailing whitespace and blank lines from a script.
+
+    Deliberately conservative: line breaks are kept so automatic semicolon insertion behaves as
+    before, and strings, template literals and regular expressions are copied unchanged.
+    """
+    output = []
+    modes = ["code"]  # "code", "template", or "expression" (inside ${...}) with its brace depth
+    depths = [0]
+    i = 0
+    length = len(source)
+    at_line_start = True
+
+    def last_significant():
+        for chunk in reversed(output):
+            stripped = chunk.rstrip()
+            if stripped:
+                return stripped[-1]
+        return ""
+
+    while i < length:
+        char = source[i]
+        mode = modes[-1]
+
+        if mode == "template":
+            if char == "\\":
+                output.append(source[i:i + 2])
+                i += 2
+            elif char == "`":
+                output.append(char)
+                modes.pop()
+                depths.pop()
+                i += 1
+            elif source.startswith("${", i):
+                output.append("${")
+                modes.append("expression")
+                depths.append(0)
+                i += 2
+            else:
+                output.append(char)
+                i += 1
+            continue
+
+        if char == "\n":
+            while output and output[-1] in (" ", "\t"):
+                output.pop()
+            if output and output[-1] != "\n":
+                output.append("\n")
+            at_line_start = True
+            i += 1
+            continue
+        if at_line_start and char in " \t\r":
+            i += 1
+            continue
+        at_line_start = False
+
+        if source.startswith("//", i):
+            end = source.find("\n", i)
+            i = length if end == -1 else end
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            i = length if end == -1 else end + 2
+        elif char in "'\"":
+            j = i + 1
+            while j < length and source[j] != char and source[j] != "\n":
+                j += 2 if source[j] == "\\" else 1
+            output.append(source[i:j + 1])
+            i = j + 1
+        elif char == "`":
+            output.append(char)
+            modes.append("template")
+            depths.append(0)
+            i += 1
+        elif char == "/" and (last_significant() in _REGEX_PRECEDERS or last_significant() == ""
+                              or _previous_word(output) in _REGEX_KEYWORDS):
+            j = i + 1
+            in_class = False
+            while j < length and source[j] != "\n":
+                if source[j] == "\\":
+                    j += 2
+                    continue
+                if source[j] == "[":
+                    in_class = True
+                elif source[j] == "]":
+                    in_class = False
+                elif source[j] == "/" and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < length and (source[j].isalnum() or source[j] == "_"):
+                j += 1
+            output.append(source[i:j])
+            i = j
+        elif mode == "expression" and char == "{":
+            depths[-1] += 1
+            output.append(char)
+            i += 1
+        elif mode == "expression" and char == "}":
+            output.append(char)
+            if depths[-1] == 0:
+                modes.pop()
+                depths.pop()
+            else:
+                depths[-1] -= 1
+            i += 1
+        elif char == "\r":
+            i += 1
+        else:
+            output.append(char)
+            i += 1
+
+    return "".join(output).strip() + "\n"
+
+
+def minify_css(source):
+    """Remove comments and collapse whitespace in a stylesheet, leaving strings untouched."""
+    output = []
+    i = 0
+    length = len(source)
+    while i < length:
+        char = source[i]
+        if source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            i = length if end == -1 else end + 2
+        elif char in "'\"":
+            j = i + 1
+            while j < length and source[j] != char:
+                j += 2 if source[j] == "\\" else 1
+            output.append(source[i:j + 1])
+            i = j + 1
+        elif char.isspace():
+            while i < length and source[i].isspace():
+                i += 1
+            previous = output[-1][-1:] if output else ""
+            following = source[i:i + 1]
+            # Whitespace is only significant between two tokens, e.g. "0 auto" or "div p"
+            if previous and following and previous not in "{};,>:" and following not in "{};,>!":
+                output.append(" ")
+        else:
+            if char == "}" and output and output[-1] == ";":
+                output.pop()
+            output.append(char)
+            i += 1
+    return "".join(output).strip() + "\n"
+
+
+def _read(source):
+    with open(os.path.join(assets.STATIC_DIR, source), encoding="utf-8") as file:
+        return file.read()
+
+
+def build_bundle(name, sources):
+    """Return the minified content of a bundle."""
+    if name.endswith(".js"):
+        # The separator ends a last statement that relied on the end of the file for its semicolon
+        return ";\n".join(minify_js(_read(source)) for source in sources)
+    return "".join(minify_css(_read(source)) for source in sources)
+
+
+def _write(path, data):
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def _read_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def build(output_dir=assets.DIST_DIR):
+    """
+    Build every bundle and its compressed variants, write the manifest and remove bundles older
+    than the previous build.
+
+    Returns:
+        dict: {bundle name: {"file", "bytes", "gzip_bytes", "br_bytes"}}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    built = {}
+    report = {}
+    for name, sources in assets.BUNDLES.items():
+        data = build_bundle(name, sources).encode("utf-8")
+        stem, extension = os.path.splitext(name)
+        filename = f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{extension}"
+        path = os.path.join(output_dir, filename)
+        _write(path, data)
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        _write(path + ".gz", compressed)
+        report[name] = {"file": filename, "bytes": len(data), "gzip_bytes": len(compressed)}
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            _write(path + ".br", compressed)
+            report[name]["br_bytes"] = len(compressed)
+        built[name] = filename
+
+    # The bundles of the previous build stay available to instances and cached pages still using them
+    manifest_path = os.path.join(output_dir, os.path.basename(assets.MANIFEST_PATH))
+    previous = _read_manifest(manifest_path)
+    retained = previous.get("bundles", {}) if previous.get("bundles", {}) != built else previous.get("previous", {})
+
+    # Replace the manifest before pruning, so it never references a file that was already removed
+    temporary = f"{manifest_path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump({"bundles": built, "previous": retained}, file, indent=2)
+    os.replace(temporary, manifest_path)
+
+    # Remove bundles older than the previous build
+    keep = set(built.values()) | set(retained.values())
+    for existing in os.listdir(output_dir):
+        base = existing
+        for _, suffix in assets.ENCODINGS:
+            if base.endswith(suffix):
+                base = base[:-len(suffix)]
+        if base not in keep and existing != os.path.basename(assets.MANIFEST_PATH):
+            os.remove(os.path.join(output_dir, existing))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the hashed, minified and precompressed asset bundles.")
+    parser.add_argument("--output-dir", default=assets.DIST_DIR, help="Directory for the bundles and manifest.json")
+    args = parser.parse_args()
+
+    source_bytes = {name: sum(len(_read(source).encode("utf-8")) for source in sources)
+                    for name, sources in assets.BUNDLES.items()}
+    report = build(args.output_dir)
+    for name, details in report.items():
+        sizes = f"{source_bytes[name]} -> {details['bytes']} bytes, gzip {details['gzip_bytes']}"
+        if "br_bytes" in details:
+            sizes += f", br {details['br_bytes']}"
+        print(f"{name}: {details['file']} ({sizes})")
+    if brotli is None:
+        print("brotli is not installed; only gzip variants were written")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,41 @@
+"""
+Compact project version histories once, outside the web app.
+
+Usage:
+    python -m scripts.compact_versions --keep 50 --milestone-every 10 --max-projects 1000 --dry-run
+
+Keeps the newest versions and a few milestones in each project document and moves the rest
+to the project_versions_archive collection. Uses MONGODB_URI from the environment (.env).
+"""
+import argparse
+from dotenv import load_dotenv
+from src.model import version_retention
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old project versions according to the retention policy.")
+    parser.add_argument("--keep", type=int, default=version_retention.RETENTION_KEEP_VERSIONS, help="Newest versions kept in full")
+    parser.add_argument("--milestone-every", type=int, default=version_retention.RETENTION_MILESTONE_EVERY,
+                        help="Keep older versions whose number is a multiple of this")
+    parser.add_argument("--max-milestones", type=int, default=version_retention.RETENTION_MAX_MILESTONES)
+    parser.add_argument("--max-projects", type=int, default=version_retention.COMPACTION_MAX_PROJECTS)
+    parser.add_argument("--pause", type=float, default=version_retention.COMPACTION_PAUSE_SECONDS,
+                        help="Seconds to pause between projects")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many versions would be archived")
+    args = parser.parse_args()
+
+    load_dotenv()
+    from src.model.project_service import ProjectService
+    service = ProjectService()
+    if service.projects_collection is None:
+        return 1
+    policy = version_retention.RetentionPolicy(args.keep, args.milestone_every, args.max_milestones)
+    summary = version_retention.run_compaction(service, policy, args.max_projects, args.pause, args.dry_run)
+    action = "Would archive" if args.dry_run else "Archived"
+    print(f"{action} {summary['archived_versions']} versions from {summary['compacted']} of "
+          f"{summary['examined']} examined projects")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,404 @@
+"""
+Golden-set evaluation of extraction quality against latency and token cost.
+
+Usage:
+    python -m scripts.evaluate --mode record
+    python -m scripts.evaluate --mode replay --config current --config mini:GPT_MODEL=gpt-4o-mini,ROUTER_STRONG_MODELS=gpt-4o-mini
+    python -m scripts.evaluate --mode replay --output before.json
+    python -m scripts.evaluate --mode replay --include before.json
+
+Every case of the golden set (scripts/golden/golden_set.json) is sent through the chat pipeline
+as a first modelling turn: description generation (LLMService), then UML extraction and
+post-processing (gpt2.gpt_v2_extract). The final PlantUML is scored against the expected
+extraction with entity and relation precision and recall, and the latency and tokens of each
+stage are recorded.
+
+Modes: "live" calls the OpenAI API, "record" does the same and stores every response in the
+recordings file, "replay" answers from the recordings without network access (stage latency
+then uses the recorded API latency), and "fake" uses the deterministic stand-in from
+scripts/fakes.py to smoke-test the harness itself. "reference" records the golden answers
+themselves (the scenario as description, the expected extraction as answer) with zero latency;
+replaying those must score 1.0, which checks prompts, post-processing and scoring offline.
+For the same request, a later recording replaces an earlier one, so "record" supersedes them.
+
+Each --config NAME[:VAR=VALUE,...] runs in its own process with those environment overrides,
+so settings read at import time take effect too. Replay needs recordings made with the same
+configuration. To compare code changes (prompt wording, post_process rules), save a run with
+--output before the change and pass it with --include after it.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GOLDEN_DIR = os.path.join(REPO_ROOT, "scripts", "golden")
+GOLDEN_SET_PATH = os.path.join(GOLDEN_DIR, "golden_set.json")
+RECORDINGS_PATH = os.path.join(GOLDEN_DIR, "recordings.jsonl")
+MODES = ("live", "record", "replay", "fake", "reference")
+STAGES = ("dmd_generation", "extraction")
+
+_RELATION_LINE = re.compile(r'^(\S+)\s+(?:"[^"]*"\s+)?(<\|--|o--|\*--|--)\s+(?:"[^"]*"\s+)?([^\s:]+)')
+_ATTRIBUTE_LINE = re.compile(r"^(\S+)\s*:\s*(\S*)\s*$")
+_RELATION_KINDS = {"--": "association", "<|--": "generalization", "o--": "aggregation", "*--": "composition"}
+
+
+class MissingRecording(LookupError):
+    """Replay found no recorded response for a request."""
+
+
+def _namespace(value):
+    """Turn a recorded response back into attribute access, like the OpenAI response objects."""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{key: _namespace(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_namespace(item) for item in value]
+    return value
+
+
+def _dump(response):
+    if hasattr(response, "model_dump"):
+        return response.model_dump(mode="json")
+    return json.loads(json.dumps(response, default=lambda value: vars(value)))
+
+
+def request_key(kwargs):
+    """Stable key of a chat.completions.create call: model, messages and every other argument."""
+    return hashlib.sha256(json.dumps(kwargs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _message_text(message):
+    content = message.get("content")
+    if isinstance(content, (list, tuple)):
+        return "".join(part.get("text", "") for part in content)
+    return content or ""
+
+
+class ReferenceClient:
+    """
+    Answers the pipeline's calls with the golden set's own answers: description generation
+    returns the scenario unchanged and extraction returns the case's expected extraction.
+    """
+
+    def __init__(self, golden):
+        self.chat = SimpleNamespace(completions=self)
+        self.cases = golden["cases"]
+
+    def create(self, **kwargs):
+        messages = kwargs.get("messages", [])
+        prompt = "\n".join(_message_text(message) for message in messages)
+        if kwargs.get("response_format"):
+            scenario = _message_text(messages[-1]).strip()
+            case = next(case for case in self.cases if case["scenario"] == scenario)
+            content = json.dumps(case["expected"])
+        else:
+            content = next(case["scenario"] for case in self.cases if case["scenario"] in prompt)
+        return _namespace({
+            "model": kwargs.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4, "prompt_tokens_details": {"cached_tokens": 0}}
+        })
+
+
+class EvaluationClient:
+    """
+    Stand-in for the OpenAI client used by the harness.
+
+    Forwards calls to the wrapped client (live, record, fake) or answers them from recordings
+    (replay), and accumulates latency and token usage per pipeline stage. Set `stage` before
+    running a stage.
+    """
+
+    def __init__(self, client, mode, recordings_path=RECORDINGS_PATH):
+        self.chat = SimpleNamespace(completions=self)
+        self.client = client
+        self.mode = mode
+        self.recordings_path = recordings_path
+        self.stage = None
+        self.usage = {}
+        self._recordings = {}
+        self._lock = threading.Lock()
+        if mode == "replay":
+            with open(recordings_path, encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._recordings[entry["key"]] = entry
+
+    def reset_usage(self):
+        self.usage = {stage: {"calls": 0, "seconds": 0.0, "wall_seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+                      for stage in STAGES}
+
+    def create(self, **kwargs):
+        key = request_key(kwargs)
+        started = time.perf_counter()
+        if self.mode == "replay":
+            entry = self._recordings.get(key)
+            if entry is None:
+                raise MissingRecording(f"No recorded response for a {self.stage} call to {kwargs.get('model')}; "
+                                       f"run with --mode record and the same configuration first")
+            response, seconds = _namespace(entry["response"]), entry["seconds"]
+        else:
+            response = self.client.chat.completions.create(**kwargs)
+            seconds = time.perf_counter() - started if self.mode != "reference" else 0.0
+            if self.mode in ("record", "reference"):
+                entry = {"key": key, "model": kwargs.get("model"), "seconds": round(seconds, 4), "response": _dump(response)}
+                with self._lock, open(self.recordings_path, "a", encoding="utf-8") as file:
+                    file.write(json.dumps(entry) + "\n")
+        usage = getattr(response, "usage", None)
+        with self._lock:
+            totals = self.usage.get(self.stage)
+            if totals is not None:
+                totals["calls"] += 1
+                totals["seconds"] += seconds
+                totals["wall_seconds"] += time.perf_counter() - started
+                totals["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+                totals["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+        return response
+
+
+def elements_from_plantuml(plant_uml):
+    """
+    Read entities and relations back from generated PlantUML.
+
+    Returns:
+        tuple: (set of canonical entity keys, set of relation keys). Associations are undirected;
+        generalizations are (superclass, subclass) and aggregations/compositions (whole, part).
+    """
+    from src.model.domain_model_ir import canonical_entity_key
+    entities, relations = set(), set()
+    for line in (plant_uml or "").splitlines():
+        line = line.strip()
+        if not line or line.startswith("@") or line == "left to right direction":
+            continue
+        match = _RELATION_LINE.match(line)
+        if match:
+            kind = _RELATION_KINDS[match.group(2)]
+            source, target = canonical_entity_key(match.group(1)), canonical_entity_key(match.group(3))
+            entities.update((source, target))
+            ends = tuple(sorted((source, target))) if kind == "association" else (source, target)
+            relations.add((kind,) + ends)
+            continue
+        match = _ATTRIBUTE_LINE.match(line)
+        if match:
+            entities.add(canonical_entity_key(match.group(1)))
+    return entities, relations
+
+
+def expected_elements(expected):
+    """The scoring sets of an expected extraction, in the form of elements_from_plantuml."""
+    from src.model.domain_model_ir import DomainModel
+    return elements_from_plantuml(DomainModel.from_extraction(expected).to_plantuml())
+
+
+def _counts(found, expected):
+    return {"tp": len(found & expected), "fp": len(found - expected), "fn": len(expected - found)}
+
+
+def run_case(case, client, skip_dmd=False):
+    """Run one golden case through the pipeline and score it."""
+    from src.model.llm_service import LLMService
+    from src.model.gpt2 import gpt_v2_extract
+    result = {"id": case["id"], "error": None, "stages": {}}
+    client.reset_usage()
+    timings = {}
+    try:
+        description = case["scenario"]
+        if not skip_dmd:
+            client.stage = "dmd_generation"
+            started = time.perf_counter()
+            classification = {"decision": True, "is_update": False, "is_style_change": False}
+            description = LLMService().generate_domain_model_description(f"User: {case['scenario']}", classification)
+            timings["dmd_generation"] = time.perf_counter() - started
+        client.stage = "extraction"
+        started = time.perf_counter()
+        _, plant_uml = gpt_v2_extract(description, client)
+        timings["extraction"] = time.perf_counter() - started
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        plant_uml = ""
+    finally:
+        client.stage = None
+
+    for stage, wall in timings.items():
+        usage = client.usage[stage]
+        # Local processing time plus the API latency (recorded latency in replay mode)
+        result["stages"][stage] = {
+            "seconds": round(wall - usage["wall_seconds"] + usage["seconds"], 4),
+            "calls": usage["calls"],
+            "prompt_tokens": usage["prompt_tokens"],
+            "completion_tokens": usage["completion_tokens"]
+        }
+    found_entities, found_relations = elements_from_plantuml(plant_uml)
+    expected_entities, expected_relations = expected_elements(case["expected"])
+    result["entities"] = _counts(found_entities, expected_entities)
+    result["relations"] = _counts(found_relations, expected_relations)
+    return result
+
+
+def run_configuration(name, golden, mode, recordings_path, skip_dmd=False):
+    """Run every golden case with the current process environment and summarize the results."""
+    if mode == "fake":
+        from scripts.fakes import FakeOpenAIClient
+        inner = FakeOpenAIClient()
+    elif mode == "reference":
+        inner = ReferenceClient(golden)
+    elif mode == "replay":
+        inner = None
+    else:
+        from src.model.openai_client import OpenAIClient
+        inner = OpenAIClient.get_client()
+    client = EvaluationClient(inner, mode, recordings_path)
+    from src.model.openai_client import OpenAIClient
+    OpenAIClient._client = client
+
+    from src.model import prompts
+    cases = [run_case(case, client, skip_dmd) for case in golden["cases"]]
+    return summarize(name, golden, mode, cases, dict(prompts.PROMPT_VERSIONS))
+
+
+def _percentile(values, percent):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def _ratio(numerator, denominator):
+    return numerator / denominator if denominator else 0.0
+
+
+def summarize(name, golden, mode, cases, prompt_versions):
+    """Micro-averaged precision/recall and per-stage latency and token figures of one configuration."""
+    summary = {"config": name, "golden_set_version": golden["version"], "mode": mode,
+               "prompt_versions": prompt_versions, "cases": cases,
+               "errors": sum(1 for case in cases if case["error"])}
+    for element in ("entities", "relations"):
+        tp = sum(case[element]["tp"] for case in cases)
+        fp = sum(case[element]["fp"] for case in cases)
+        fn = sum(case[element]["fn"] for case in cases)
+        summary[element] = {"precision": round(_ratio(tp, tp + fp), 3), "recall": round(_ratio(tp, tp + fn), 3)}
+    summary["stages"] = {}
+    for stage in STAGES:
+        measured = [case["stages"][stage] for case in cases if stage in case["stages"]]
+        if not measured:
+            continue
+        seconds = [values["seconds"] for values in measured]
+        summary["stages"][stage] = {
+            "mean_seconds": round(sum(seconds) / len(seconds), 3),
+            "p95_seconds": round(_percentile(seconds, 95), 3),
+            "prompt_tokens": round(sum(values["prompt_tokens"] for values in measured) / len(measured)),
+            "completion_tokens": round(sum(values["completion_tokens"] for values in measured) / len(measured))
+        }
+    return summary
+
+
+def report(summaries):
+    """Print one comparison row per configuration."""
+    header = (f"{'config':<20}{'cases':>6}{'errors':>7}{'ent P':>7}{'ent R':>7}{'rel P':>7}{'rel R':>7}"
+              + "".join(f"{label + ' s':>10}{'p95':>7}{'tok in/out':>13}" for label in ("dmd", "extract")))
+    print(header)
+    print("-" * len(header))
+    for summary in summaries:
+        row = (f"{summary['config'][:19]:<20}{len(summary['cases']):>6}{summary['errors']:>7}"
+               f"{summary['entities']['precision']:>7.2f}{summary['entities']['recall']:>7.2f}"
+               f"{summary['relations']['precision']:>7.2f}{summary['relations']['recall']:>7.2f}")
+        for stage in STAGES:
+            values = summary["stages"].get(stage)
+            if values is None:
+                row += f"{'-':>10}{'-':>7}{'-':>13}"
+            else:
+                tokens = f"{values['prompt_tokens']}/{values['completion_tokens']}"
+                row += f"{values['mean_seconds']:>10.2f}{values['p95_seconds']:>7.2f}{tokens:>13}"
+        print(row)
+    versions = {summary["golden_set_version"] for summary in summaries}
+    if len(versions) > 1:
+        print(f"\nWARNING: rows use different golden set versions ({', '.join(sorted(versions))}) and are not comparable")
+    for summary in summaries:
+        for case in summary["cases"]:
+            if case["error"]:
+                print(f"{summary['config']}/{case['id']}: {case['error']}")
+
+
+def parse_config(spec):
+    """'name:VAR=VALUE,VAR=VALUE' -> (name, {VAR: VALUE})."""
+    name, _, assignments = spec.partition(":")
+    overrides = {}
+    for assignment in filter(None, assignments.split(",")):
+        variable, separator, value = assignment.partition("=")
+        if not separator:
+            raise argparse.ArgumentTypeError(f"Expected VAR=VALUE in {spec!r}")
+        overrides[variable.strip()] = value
+    return name.strip() or "current", overrides
+
+
+def _run_in_subprocess(name, overrides, args):
+    """Run one configuration in a fresh interpreter and return its summary."""
+    environment = dict(os.environ)
+    # Learned examples would leak golden answers into later prompts; startup warm-up is not measured
+    environment.update({"LEARN_EXAMPLES": "0", "PREWARM_ON_START": "0"})
+    environment.update(overrides)
+    with tempfile.TemporaryDirectory() as directory:
+        result_path = os.path.join(directory, "result.json")
+        command = [sys.executable, "-m", "scripts.evaluate", "--mode", args.mode, "--golden", args.golden,
+                   "--recordings", args.recordings, "--name", name, "--result-file", result_path]
+        if args.skip_dmd:
+            command.append("--skip-dmd")
+        completed = subprocess.run(command, env=environment, cwd=REPO_ROOT)
+        if completed.returncode != 0 or not os.path.exists(result_path):
+            raise RuntimeError(f"Configuration '{name}' failed with exit code {completed.returncode}")
+        with open(result_path, encoding="utf-8") as file:
+            return json.load(file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score extraction quality, latency and tokens on the golden set.")
+    parser.add_argument("--mode", choices=MODES, default="live")
+    parser.add_argument("--config", action="append", type=parse_config, metavar="NAME[:VAR=VALUE,...]",
+                        help="Configuration to evaluate (repeatable); default: the current environment")
+    parser.add_argument("--golden", default=GOLDEN_SET_PATH, help="Golden set file")
+    parser.add_argument("--recordings", default=RECORDINGS_PATH, help="Recorded responses for record/replay")
+    parser.add_argument("--skip-dmd", action="store_true", help="Extract from the scenario text directly")
+    parser.add_argument("--output", help="Write all results, including per-case scores, to this JSON file")
+    parser.add_argument("--include", action="append", default=[], help="Add saved results (--output of an earlier run) to the table")
+    parser.add_argument("--name", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode == "replay" and not os.path.exists(args.recordings):
+        parser.error(f"No recordings at {args.recordings}; run with --mode record first")
+    with open(args.golden, encoding="utf-8") as file:
+        golden = json.load(file)
+
+    if args.result_file:
+        summary = run_configuration(args.name, golden, args.mode, args.recordings, args.skip_dmd)
+        with open(args.result_file, "w", encoding="utf-8") as file:
+            json.dump(summary, file)
+        return 0
+
+    summaries = []
+    for path in args.include:
+        with open(path, encoding="utf-8") as file:
+            summaries.extend(json.load(file))
+    for name, overrides in args.config or [("current", {})]:
+        print(f"Evaluating '{name}' ({args.mode}, golden set v{golden['version']}, {len(golden['cases'])} cases)")
+        summaries.append(_run_in_subprocess(name, overrides, args))
+    print()
+    report(summaries)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(summaries, file, indent=2)
+    return 1 if any(summary["errors"] for summary in summaries) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,519 @@
+"""In-process stand-ins for MongoDB and the OpenAI client, used by the tests and the load-test harness."""
+import copy
+import json
+import os
+import re
+import threading
+import time
+from types import SimpleNamespace
+from bson import ObjectId
+
+
+def _resolve(value, path):
+    """Return every value reachable by a dotted path, descending into arrays like MongoDB does."""
+    if not path:
+        return [value]
+    head, _, rest = path.partition(".")
+    if isinstance(value, list):
+        if head.isdigit():
+            index = int(head)
+            return _resolve(value[index], rest) if index < len(value) else []
+        found = []
+        for item in value:
+            found.extend(_resolve(item, path))
+        return found
+    if isinstance(value, dict) and head in value:
+        return _resolve(value[head], rest)
+    return []
+
+
+def _compare(values, predicate):
+    return any(predicate(value) for value in values)
+
+
+def _match_condition(values, condition):
+    """Match the values found at one path against a literal or an operator document."""
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        for operator, operand in condition.items():
+            if operator == "$ne":
+                if _match_condition(values, operand):
+                    return False
+            elif operator == "$in":
+                if not any(_match_condition(values, option) for option in operand):
+                    return False
+            elif operator == "$nin":
+                if any(_match_condition(values, option) for option in operand):
+                    return False
+            elif operator == "$exists":
+                if bool(values) != bool(operand):
+                    return False
+            elif operator == "$gt":
+                if not _compare(values, lambda value: value is not None and value > operand):
+                    return False
+            elif operator == "$gte":
+                if not _compare(values, lambda value: value is not None and value >= operand):
+                    return False
+            elif operator == "$lt":
+                if not _compare(values, lambda value: value is not None and value < operand):
+                    return False
+            elif operator == "$lte":
+                if not _compare(values, lambda value: value is not None and value <= operand):
+                    return False
+            elif operator == "$elemMatch":
+                if not any(isinstance(value, list) and any(matches(item, operand) for item in value) for value in values):
+                    return False
+            else:
+                raise NotImplementedError(f"Unsupported query operator {operator}")
+        return True
+    if condition is None:
+        return not values or None in values
+    return any(value == condition or (isinstance(value, list) and condition in value) for value in values)
+
+
+def matches(document, query):
+    """Return True when a document matches a MongoDB query (the subset used by this application)."""
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            if not all(matches(document, part) for part in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(document, part) for part in condition):
+                return False
+        elif not _match_condition(_resolve(document, key), condition):
+            return False
+    return True
+
+
+def _include(source, target, parts):
+    head, rest = parts[0], parts[1:]
+    if head not in source:
+        return
+    value = source[head]
+    if not rest:
+        target[head] = copy.deepcopy(value)
+    elif isinstance(value, list):
+        items = target.setdefault(head, [{} for _ in value])
+        for item, projected in zip(value, items):
+            if isinstance(item, dict):
+                _include(item, projected, rest)
+    elif isinstance(value, dict):
+        _include(value, target.setdefault(head, {}), rest)
+
+
+def project(document, projection):
+    """Apply a find projection: inclusion, exclusion, dotted paths and $elemMatch."""
+    if not projection:
+        return copy.deepcopy(document)
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    inclusive = any(value if not isinstance(value, dict) else True for value in fields.values())
+    if inclusive:
+        result = {}
+        for key, value in fields.items():
+            if isinstance(value, dict) and "$elemMatch" in value:
+                items = [item for item in document.get(key, []) if matches(item, value["$elemMatch"])]
+                if items:
+                    result[key] = [copy.deepcopy(items[0])]
+            elif isinstance(value, dict) and "$slice" in value:
+                count = value["$slice"]
+                items = document.get(key, [])
+                result[key] = copy.deepcopy(items[count:] if count < 0 else items[:count])
+            elif value:
+                _include(document, result, key.split("."))
+    else:
+        result = copy.deepcopy(document)
+        for key in fields:
+            parts = key.split(".")
+            target = result
+            for part in parts[:-1]:
+                target = target.get(part, {}) if isinstance(target, dict) else {}
+            if isinstance(target, dict):
+                target.pop(parts[-1], None)
+    if projection.get("_id", 1) and "_id" in document:
+        result["_id"] = document["_id"]
+    else:
+        result.pop("_id", None)
+    return result
+
+
+def _positional_index(document, query, array_field):
+    """Index of the first array element matched by the query, for the positional $ operator."""
+    items = document.get(array_field, [])
+    for key, condition in query.items():
+        if key == array_field and isinstance(condition, dict) and "$elemMatch" in condition:
+            subquery = condition["$elemMatch"]
+        elif key.startswith(array_field + "."):
+            subquery = {key[len(array_field) + 1:]: condition}
+        else:
+            continue
+        for index, item in enumerate(items):
+            if matches(item, subquery):
+                return index
+    raise ValueError("The positional operator did not find the match needed from the query.")
+
+
+def _walk(document, path, query, positions, create=True):
+    """
+    Return (container, key) for a dotted update path, resolving the positional $ operator.
+
+    Positions are resolved once per update (cached in positions), against the document as matched.
+    """
+    parts = path.split(".")
+    target = document
+    for position, part in enumerate(parts[:-1]):
+        if part == "$":
+            array_field = ".".join(parts[:position])
+            if array_field not in positions:
+                positions[array_field] = _positional_index(document, query, array_field)
+            part = positions[array_field]
+        if isinstance(target, list):
+            target = target[int(part)]
+            continue
+        if part not in target:
+            if not create:
+                return None, None
+            target[part] = {}
+        target = target[part]
+    last = parts[-1]
+    if last == "$":
+        array_field = ".".join(parts[:-1])
+        if array_field not in positions:
+            positions[array_field] = _positional_index(document, query, array_field)
+        last = positions[array_field]
+    if isinstance(target, list):
+        last = int(last)
+    return target, last
+
+
+def apply_update(document, update, query):
+    """Apply an update document in place; returns True when the document changed."""
+    before = copy.deepcopy(document)
+    positions = {}
+    for operator, fields in update.items():
+        for path, value in fields.items():
+            if operator == "$set":
+                target, key = _walk(document, path, query, positions)
+                target[key] = copy.deepcopy(value)
+            elif operator == "$unset":
+                target, key = _walk(document, path, query, positions, create=False)
+                if target is not None and key in target:
+                    del target[key]
+            elif operator == "$inc":
+                target, key = _walk(document, path, query, positions)
+                target[key] = target.get(key, 0) + value
+            elif operator == "$push":
+                target, key = _walk(document, path, query, positions)
+                items = target.setdefault(key, [])
+                if isinstance(value, dict) and "$each" in value:
+                    items.extend(copy.deepcopy(value["$each"]))
+                else:
+                    items.append(copy.deepcopy(value))
+            elif operator == "$pull":
+                target, key = _walk(document, path, query, positions, create=False)
+                if target is not None and key in target:
+                    target[key] = [item for item in target[key] if not (
+                        matches(item, value) if isinstance(value, dict) else item == value)]
+            elif operator == "$setOnInsert":
+                continue
+            else:
+                raise NotImplementedError(f"Unsupported update operator {operator}")
+    return document != before
+
+
+class FakeCursor:
+    """Minimal cursor over a snapshot of matching documents."""
+
+    def __init__(self, documents):
+        self._documents = documents
+
+    def sort(self, key, direction=1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, order in reversed(keys):
+            self._documents.sort(key=lambda document: (_resolve(document, field) or [None])[0] or 0, reverse=order < 0)
+        return self
+
+    def skip(self, count):
+        self._documents = self._documents[count:]
+        return self
+
+    def limit(self, count):
+        if count:
+            self._documents = self._documents[:count]
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def close(self):
+        self._documents = []
+
+    def __iter__(self):
+        return iter(self._documents)
+
+
+class FakeCollection:
+    """
+    Thread-safe in-memory stand-in for a pymongo collection.
+
+    Implements the query, projection and update operators this application uses. Every
+    operation sleeps for `latency` seconds outside the lock to simulate a network round trip.
+    """
+
+    def __init__(self, name="projects", latency=0.0):
+        self.name = name
+        self.latency = latency
+        self._documents = []
+        self._lock = threading.Lock()
+
+    def _delay(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _first(self, query):
+        return next((document for document in self._documents if matches(document, query)), None)
+
+    def find(self, query=None, projection=None, **kwargs):
+        self._delay()
+        with self._lock:
+            return FakeCursor([project(document, projection) for document in self._documents if matches(document, query)])
+
+    def find_one(self, query=None, projection=None, **kwargs):
+        self._delay()
+        with self._lock:
+            document = self._first(query)
+            return project(document, projection) if document is not None else None
+
+    def count_documents(self, query, **kwargs):
+        self._delay()
+        with self._lock:
+            return sum(1 for document in self._documents if matches(document, query))
+
+    def insert_one(self, document, **kwargs):
+        self._delay()
+        with self._lock:
+            document.setdefault("_id", ObjectId())
+            self._documents.append(copy.deepcopy(document))
+            return SimpleNamespace(inserted_id=document["_id"], acknowledged=True)
+
+    def insert_many(self, documents, **kwargs):
+        return SimpleNamespace(inserted_ids=[self.insert_one(document).inserted_id for document in documents])
+
+    def _upsert(self, query, update):
+        document = {key: value for key, value in query.items() if not key.startswith("$") and not isinstance(value, dict)}
+        document["_id"] = ObjectId()
+        apply_update(document, {key: value for key, value in update.items() if key != "$setOnInsert"}, query)
+        document.update(copy.deepcopy(update.get("$setOnInsert", {})))
+        self._documents.append(document)
+        return document["_id"]
+
+    def update_one(self, query, update, upsert=False, **kwargs):
+        self._delay()
+        with self._lock:
+            document = self._first(query)
+            if document is None:
+                upserted_id = self._upsert(query, update) if upsert else None
+                return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=upserted_id)
+            changed = apply_update(document, update, query)
+            return SimpleNamespace(matched_count=1, modified_count=int(changed), upserted_id=None)
+
+    def update_many(self, query, update, **kwargs):
+        self._delay()
+        with self._lock:
+            documents = [document for document in self._documents if matches(document, query)]
+            modified = sum(int(apply_update(document, update, query)) for document in documents)
+            return SimpleNamespace(matched_count=len(documents), modified_count=modified, upserted_id=None)
+
+    def replace_one(self, query, replacement, upsert=False, **kwargs):
+        self._delay()
+        with self._lock:
+            for index, document in enumerate(self._documents):
+                if matches(document, query):
+                    replacement = copy.deepcopy(replacement)
+                    replacement.setdefault("_id", document["_id"])
+                    self._documents[index] = replacement
+                    return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+            if not upsert:
+                return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+            replacement = copy.deepcopy(replacement)
+            replacement.setdefault("_id", ObjectId())
+            self._documents.append(replacement)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=replacement["_id"])
+
+    def find_one_and_update(self, query, update, projection=None, return_document=False, upsert=False, **kwargs):
+        self._delay()
+        with self._lock:
+            document = self._first(query)
+            if document is None:
+                return None
+            before = project(document, projection)
+            apply_update(document, update, query)
+            # ReturnDocument.AFTER is True
+            return project(document, projection) if return_document else before
+
+    def delete_one(self, query, **kwargs):
+        self._delay()
+        with self._lock:
+            document = self._first(query)
+            if document is None:
+                return SimpleNamespace(deleted_count=0)
+            self._documents.remove(document)
+            return SimpleNamespace(deleted_count=1)
+
+    def delete_many(self, query, **kwargs):
+        self._delay()
+        with self._lock:
+            kept = [document for document in self._documents if not matches(document, query)]
+            deleted = len(self._documents) - len(kept)
+            self._documents = kept
+            return SimpleNamespace(deleted_count=deleted)
+
+    def bulk_write(self, requests, ordered=True, **kwargs):
+        """Apply pymongo InsertOne/ReplaceOne/UpdateOne/DeleteOne requests in order."""
+        result = {"nInserted": 0, "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "writeErrors": []}
+        for request in requests:
+            kind = type(request).__name__
+            if kind == "InsertOne":
+                self.insert_one(copy.deepcopy(request._doc))
+                result["nInserted"] += 1
+                continue
+            if kind == "DeleteOne":
+                result["nRemoved"] += self.delete_one(request._filter).deleted_count
+                continue
+            method = self.replace_one if kind == "ReplaceOne" else self.update_one
+            outcome = method(request._filter, request._doc, upsert=request._upsert)
+            result["nMatched"] += outcome.matched_count
+            result["nModified"] += outcome.modified_count
+            result["nUpserted"] += int(outcome.upserted_id is not None)
+        return SimpleNamespace(bulk_api_result=result, acknowledged=True)
+
+    def create_index(self, keys, **kwargs):
+        return kwargs.get("name") or "_".join(str(part) for key in (keys if isinstance(keys, list) else [keys])
+                                             for part in (key if isinstance(key, tuple) else (key, 1)))
+
+
+# Markers the fake LLM echoes back; names are chosen by the load test so each simulated user is recognisable
+ENTITY_PATTERN = re.compile(r"\bU\d+[A-Z][A-Za-z]*\b")
+
+
+def _usage(prompt_text, completion_text):
+    return SimpleNamespace(
+        prompt_tokens=len(prompt_text) // 4,
+        completion_tokens=len(completion_text) // 4,
+        total_tokens=(len(prompt_text) + len(completion_text)) // 4,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=0)
+    )
+
+
+def _prompt_text(messages):
+    parts = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, (list, tuple)):
+            parts.extend(part.get("text", "") for part in content)
+        else:
+            parts.append(content or "")
+    return "\n".join(parts)
+
+
+class FakeCompletions:
+    """Deterministic chat.completions stand-in that recognises the three call sites by their arguments."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def create(self, model=None, messages=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        user_text = _prompt_text([message for message in messages if message["role"] == "user"][-1:])
+        if kwargs.get("functions"):
+            return self._classify(user_text, model)
+        if kwargs.get("response_format", {}).get("json_schema", {}).get("name") == "domain_model_description_edits":
+            return self._edit(user_text, model)
+        if kwargs.get("response_format"):
+            return self._extract(user_text, model)
+        return self._describe(user_text, model)
+
+    def _response(self, prompt_text, model, content=None, function_call=None):
+        message = SimpleNamespace(content=content, function_call=function_call, tool_calls=None)
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=message, finish_reason="stop")],
+            usage=_usage(prompt_text, content or (function_call.arguments if function_call else ""))
+        )
+
+    def _classify(self, history, model):
+        last_message = history.strip().splitlines()[-1] if history.strip() else ""
+        casual = any(word in last_message.lower() for word in ("thanks", "nice", "great"))
+        result = {
+            "decision": not casual and bool(ENTITY_PATTERN.search(last_message)),
+            "is_update": "Assistant:" in history,
+            "is_casual_comment": casual,
+            "is_style_change": False,
+            "suggestions": ["Noted."] if casual else ["Consider adding multiplicities."]
+        }
+        call = SimpleNamespace(name="get_decision", arguments=json.dumps(result))
+        return self._response(history, model, function_call=call)
+
+    def _describe(self, history, model):
+        entities = list(dict.fromkeys(ENTITY_PATTERN.findall(history)))
+        text = "The following domain model describes the entities " + ", ".join(entities) + "."
+        for source, target in zip(entities, entities[1:]):
+            text += f" {source} is associated with {target} and 1 {source} relates to many {target}."
+        return self._response(history, model, content=text)
+
+    def _edit(self, prompt_text, model):
+        description, _, message = prompt_text.partition("Latest user message:")
+        anchors = re.findall(r"^\[(S\d+)\]", description, re.MULTILINE)
+        known = set(ENTITY_PATTERN.findall(description))
+        edits = [{
+            "op": "insert_after", "anchor": anchors[-1] if anchors else "S0",
+            "text": f"{name} is associated with the existing entities and 1 {name} relates to many of them."
+        } for name in dict.fromkeys(ENTITY_PATTERN.findall(message)) if name not in known]
+        return self._response(prompt_text, model, content=json.dumps({"edits": edits}))
+
+    def _extract(self, description, model):
+        entities = list(dict.fromkeys(ENTITY_PATTERN.findall(description)))
+        data = {
+            "attributes": [{"entity": name, "property": "name"} for name in entities],
+            "associations": [{
+                "source": source, "sourceMultiplicity": "1", "targetMultiplicity": "0..*",
+                "target": target, "relationship": "relates to"
+            } for source, target in zip(entities, entities[1:])],
+            "generalizations": [],
+            "aggregations": [],
+            "compositions": []
+        }
+        return self._response(description, model, content=json.dumps(data))
+
+
+class FakeOpenAIClient:
+    """Stand-in for openai.OpenAI exposing client.chat.completions.create."""
+
+    def __init__(self, latency=0.0):
+        self.chat = SimpleNamespace(completions=FakeCompletions(latency))
+
+
+def build_app(db_latency=0.0, llm_latency=0.0):
+    """Wire the Flask app to the in-memory database and the fake LLM client."""
+    # Controllers are injected below; the startup phase would build real ones
+    os.environ["PREWARM_ON_START"] = "0"
+    from src.model.openai_client import OpenAIClient
+    OpenAIClient._client = FakeOpenAIClient(llm_latency)
+
+    import src.app as web
+    from src.model.project_service import ProjectService
+    from src.controller.chat_controller import ChatController
+    from src.controller.project_controller import ProjectController
+    from src.controller.diagram_controller import DiagramController
+
+    collection = FakeCollection(latency=db_latency)
+    service = ProjectService(collection=collection)
+    web.chat_controller = ChatController(project_service=service)
+    web.project_controller = ProjectController(project_service=service)
+    web.diagram_controller = DiagramController(project_service=service)
+    return web.app, collection
@@ -0,0 +1,188 @@
+"""
+Load-test harness for the Flask app.
+
+Simulates concurrent users against the app in-process, with in-memory stand-ins for MongoDB
+and the OpenAI API, and reports throughput and latency percentiles per endpoint.
+
+Usage:
+    python -m scripts.load_test --users 20 --turns 3 --iterations 2 --llm-latency-ms 50
+
+Each user creates a project, holds a multi-turn chat, regenerates the UML, undoes a change and
+switches between projects. Entity names are unique per user, so a response that mentions
+another user's entities reveals state shared between requests ("cross-talk").
+"""
+import argparse
+import math
+import random
+import re
+import threading
+import time
+from scripts.fakes import build_app, ENTITY_PATTERN
+
+NOUNS = ["Customer", "Order", "Product", "Supplier", "Invoice", "Payment", "Shipment", "Warehouse",
+         "Employee", "Store", "Category", "Review", "Coupon", "Cart", "Address", "Account"]
+USER_PREFIX = re.compile(r"^U(\d+)")
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+class Recorder:
+    """Thread-safe collection of per-endpoint latencies and failures."""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.cross_talk = 0
+        self.duplicate_projects = []
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, ok):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def record_cross_talk(self, count):
+        with self._lock:
+            self.cross_talk += count
+
+
+class SimulatedUser:
+    """One user session driven through a Flask test client."""
+
+    def __init__(self, app, user_id, recorder, turns, rng):
+        self.client = app.test_client()
+        self.user_id = user_id
+        self.recorder = recorder
+        self.turns = turns
+        self.rng = rng
+        self.project_name = None
+        self.nouns = [f"U{user_id}{noun}" for noun in NOUNS]
+
+    def request(self, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.client.open(path, method=method, **kwargs)
+            ok = response.status_code < 400 or response.status_code == 409
+        except Exception as e:
+            print(f"User {self.user_id}: {method} {path} raised {e}")
+            response, ok = None, False
+        self.recorder.record(f"{method} {path.split('?')[0]}", time.perf_counter() - started, ok)
+        return response
+
+    def check_own_entities(self, payload):
+        """Count entity names in a response that belong to another user."""
+        text = " ".join(str(payload.get(key, "")) for key in ("domain_model_description", "plant_uml"))
+        foreign = [name for name in ENTITY_PATTERN.findall(text) if int(USER_PREFIX.match(name).group(1)) != self.user_id]
+        if foreign:
+            self.recorder.record_cross_talk(len(foreign))
+
+    def chat(self, message):
+        response = self.request("POST", "/chat", json={"message": message, "project_name": self.project_name})
+        if response is not None and response.status_code == 200:
+            self.check_own_entities(response.get_json())
+            return response.get_json()
+        return {}
+
+    def run(self):
+        response = self.request("POST", "/create_project", json={})
+        if response is None or response.status_code != 201:
+            return
+        self.project_name = response.get_json()["project_name"]
+
+        first = self.nouns[:3]
+        result = self.chat(f"We need {first[0]}, {first[1]} and {first[2]}. A {first[0]} places many {first[1]}.")
+        for turn in range(1, self.turns):
+            noun = self.nouns[(2 + turn) % len(self.nouns)]
+            result = self.chat(f"Also add {noun}, which is linked to {first[1]}.") or result
+        self.chat("Thanks, nice work!")
+
+        description = result.get("domain_model_description")
+        if description:
+            uml = self.request("POST", "/generate_uml", json={"domainModelDescriptionText": description})
+            if uml is not None and uml.status_code == 200:
+                self.check_own_entities({"plant_uml": uml.get_json().get("plantuml", "")})
+
+        self.request("POST", "/undo_project_change", json={"project_name": self.project_name})
+
+        projects = self.request("GET", "/get_projects")
+        names = (projects.get_json() or {}).get("projects", []) if projects is not None else []
+        if names:
+            self.request("GET", "/get_project_data", query_string={"project_name": self.rng.choice(names)})
+        self.request("GET", "/get_project_data", query_string={"project_name": self.project_name})
+
+
+def run_load_test(users, turns, iterations, db_latency, llm_latency, seed):
+    """Run the simulated users concurrently and return (recorder, wall-clock seconds)."""
+    app, collection = build_app(db_latency, llm_latency)
+    recorder = Recorder()
+
+    def session(user_id):
+        rng = random.Random(seed + user_id)
+        for _ in range(iterations):
+            SimulatedUser(app, user_id, recorder, turns, rng).run()
+
+    threads = [threading.Thread(target=session, args=(user_id,)) for user_id in range(1, users + 1)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    names = [project["project_name"] for project in collection.find({}, {"project_name": 1})]
+    recorder.duplicate_projects = sorted({name for name in names if names.count(name) > 1})
+    return recorder, elapsed
+
+
+def report(recorder, elapsed):
+    """Print throughput and latency percentiles per endpoint."""
+    header = f"{'endpoint':<32}{'count':>7}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    print(header)
+    print("-" * len(header))
+    all_latencies, all_errors = [], 0
+    for endpoint in sorted(recorder.latencies):
+        values = recorder.latencies[endpoint]
+        errors = recorder.errors.get(endpoint, 0)
+        all_latencies.extend(values)
+        all_errors += errors
+        print(f"{endpoint:<32}{len(values):>7}{errors:>8}{len(values) / elapsed:>9.1f}"
+              f"{percentile(values, 50) * 1000:>10.1f}{percentile(values, 95) * 1000:>10.1f}"
+              f"{percentile(values, 99) * 1000:>10.1f}{max(values) * 1000:>10.1f}")
+    print("-" * len(header))
+    print(f"{'total':<32}{len(all_latencies):>7}{all_errors:>8}{len(all_latencies) / elapsed:>9.1f}"
+          f"{percentile(all_latencies, 50) * 1000:>10.1f}{percentile(all_latencies, 95) * 1000:>10.1f}"
+          f"{percentile(all_latencies, 99) * 1000:>10.1f}{max(all_latencies or [0]) * 1000:>10.1f}")
+    print(f"\nWall time: {elapsed:.2f}s")
+    if recorder.cross_talk:
+        print(f"WARNING: {recorder.cross_talk} entity names leaked between users (shared request state)")
+    else:
+        print("No cross-talk between users detected")
+    if recorder.duplicate_projects:
+        print(f"WARNING: concurrent creates produced duplicate project names: {', '.join(recorder.duplicate_projects)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Domain Modelling Copilot with fake LLM and database back ends.")
+    parser.add_argument("--users", type=int, default=10, help="Number of concurrent simulated users")
+    parser.add_argument("--turns", type=int, default=3, help="Modelling chat turns per session")
+    parser.add_argument("--iterations", type=int, default=1, help="Sessions run by each user")
+    parser.add_argument("--llm-latency-ms", type=float, default=20, help="Simulated latency of each LLM call")
+    parser.add_argument("--db-latency-ms", type=float, default=1, help="Simulated latency of each database operation")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    recorder, elapsed = run_load_test(args.users, args.turns, args.iterations,
+                                      args.db_latency_ms / 1000, args.llm_latency_ms / 1000, args.seed)
+    report(recorder, elapsed)
+    return 1 if recorder.errors or recorder.cross_talk or recorder.duplicate_projects else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
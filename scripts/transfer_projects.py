@@ -0,0 +1,69 @@
+"""
+Export and import projects, with their full version history, as NDJSON.
+
+Usage:
+    python -m scripts.transfer_projects export projects.ndjson
+    python -m scripts.transfer_projects import projects.ndjson --batch-size 1000 --checkpoint import.ckpt
+
+Both commands use MONGODB_URI from the environment (.env). Exports stream through a batched
+cursor and imports use bulk writes, so neither holds more than one batch in memory. An import
+that fails part-way can be re-run with the same --checkpoint to continue from the first
+document that was not written.
+"""
+import argparse
+import sys
+import time
+from dotenv import load_dotenv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import Domain Modelling Copilot projects as NDJSON.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Write every project to an NDJSON file ('-' for stdout)")
+    export.add_argument("path")
+    export.add_argument("--batch-size", type=int, default=500, help="Documents fetched per cursor batch")
+    import_ = commands.add_parser("import", help="Bulk-import projects from an NDJSON file ('-' for stdin)")
+    import_.add_argument("path")
+    import_.add_argument("--batch-size", type=int, default=1000, help="Documents per bulk write")
+    import_.add_argument("--ordered", action="store_true", help="Stop at the first failing document")
+    import_.add_argument("--checkpoint", help="Resume file; re-run with the same path to continue a failed import")
+    args = parser.parse_args()
+
+    load_dotenv()
+    from src.model.project_service import ProjectService
+    service = ProjectService()
+    if service.projects_collection is None:
+        return 1
+
+    started = time.perf_counter()
+    if args.command == "export":
+        out = sys.stdout if args.path == "-" else open(args.path, "w", encoding="utf-8")
+        count = 0
+        try:
+            for line in service.export_projects(args.batch_size):
+                out.write(line)
+                count += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        print(f"Exported {count} projects in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        return 0
+
+    source = sys.stdin if args.path == "-" else open(args.path, encoding="utf-8")
+    try:
+        summary = service.import_projects(source, args.batch_size, args.ordered, args.checkpoint)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    print(f"Imported {summary['read']} projects in {time.perf_counter() - started:.1f}s "
+          f"({summary['inserted']} inserted, {summary['replaced']} replaced, {summary['failed']} failed"
+          f"{', resumed at line ' + str(summary['resumed_at_line']) if summary['resumed_at_line'] else ''})", file=sys.stderr)
+    if summary["stopped"]:
+        print("Import stopped at the first error; fix it and re-run with the same --checkpoint", file=sys.stderr)
+    elif summary["first_failed_line"] is not None:
+        print(f"Re-run with the same --checkpoint to retry from line {summary['first_failed_line']}", file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
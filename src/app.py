@@ -1,8 +1,19 @@
-from flask import Flask, render_template
+from src.model.resources import load_environment
+# Settings are read when modules are imported, so .env is loaded first
+load_environment()
+
+from flask import Flask, Response, g, render_template, request, url_for
 from src.controller.chat_controller import ChatController
 from src.controller.project_controller import ProjectController
+from src.controller.diagram_controller import DiagramController
+from src.controller.profile_controller import ProfileController
+from src.controller.health_controller import HealthController
+from src.controller.asset_controller import AssetController
+from src.model import assets, profiling, startup, version_retention
+from src.model.metrics import REGISTRY, HTTP_REQUEST_SECONDS
 from datetime import datetime
 import os
+import time
 
 # Initialize Flask app
 app = Flask(__name__, 
@@ -13,6 +24,7 @@ app.secret_key = os.getenv("SECRET_KEY", "supersecretkey")
 # Initialize controllers
 chat_controller = None
 project_controller = None
+diagram_controller = None
 
 def get_chat_controller():
     """Get or create a ChatController instance."""
@@ -28,18 +40,60 @@ def get_project_controller():
         project_controller = ProjectController()
     return project_controller
 
+def get_diagram_controller():
+    """Get or create a DiagramController instance."""
+    global diagram_controller
+    if diagram_controller is None:
+        diagram_controller = DiagramController()
+    return diagram_controller
+
+def build_controllers():
+    """Create all controllers up front so the first request does not pay for it."""
+    get_project_controller()
+    get_chat_controller()
+    get_diagram_controller()
+
 def reset_controllers():
     """Reset all controllers."""
     global chat_controller
     chat_controller = None
 
+@app.before_request
+def start_request_timer():
+    """Remember when the request started for the latency histogram."""
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    """Record request latency per endpoint."""
+    started = g.pop("request_started", None)
+    if started is not None and request.endpoint != "metrics":
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=request.endpoint or "unknown",
+                                     method=request.method, status=response.status_code)
+    return response
+
 # Routes
+@app.context_processor
+def inject_asset_urls():
+    """Let templates reference the built bundles, or their sources when there is no current build."""
+    def asset_urls(bundle):
+        return [url_for(endpoint, filename=filename) for endpoint, filename in assets.asset_files(bundle)]
+    return {"asset_urls": asset_urls}
+
 @app.route("/")
 def home():
     """Home page route."""
     reset_controllers()
     return render_template("index.html")
 
+# Asset routes
+asset_controller = AssetController()
+
+@app.route("/assets/<path:filename>", methods=["GET"])
+def serve_asset(filename):
+    """Fingerprinted asset bundle endpoint."""
+    return asset_controller.serve(filename)
+
 # Chat routes
 @app.route("/chat", methods=["POST"])
 def chat():
@@ -59,6 +113,25 @@ def get_domain_model_descriptions():
     controller = get_chat_controller()
     return controller.get_current_domain_model_description()
 
+# Diagram routes
+@app.route("/render_svg", methods=["GET", "POST"])
+def render_svg():
+    """Render class diagram SVG endpoint."""
+    controller = get_diagram_controller()
+    return controller.render_svg()
+
+@app.route("/diagram_views", methods=["GET"])
+def diagram_views():
+    """List diagram views endpoint."""
+    controller = get_diagram_controller()
+    return controller.get_diagram_views()
+
+@app.route("/diagram_view", methods=["GET"])
+def diagram_view():
+    """Render one diagram view endpoint."""
+    controller = get_diagram_controller()
+    return controller.get_diagram_view()
+
 # Project routes (simplified to remove file management)
 @app.route("/get_projects", methods=["GET"])
 def get_projects():
@@ -90,12 +163,83 @@ def save_project_data():
     controller = get_project_controller()
     return controller.save_project_data()
 
+@app.route("/version_uml", methods=["GET"])
+def version_uml():
+    """Get version PlantUML endpoint."""
+    controller = get_project_controller()
+    return controller.get_version_uml()
+
+@app.route("/export_projects", methods=["GET"])
+def export_projects():
+    """Export all projects as NDJSON endpoint."""
+    controller = get_project_controller()
+    return controller.export_projects()
+
 @app.route("/undo_project_change", methods=["POST"])
 def undo_project_change():
     """Undo project change endpoint."""
     controller = get_project_controller()
     return controller.undo_project_change()
 
+@app.route("/redo_project_change", methods=["POST"])
+def redo_project_change():
+    """Redo project change endpoint."""
+    controller = get_project_controller()
+    return controller.redo_project_change()
+
+# Monitoring routes
+health_controller = HealthController()
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """Liveness probe endpoint."""
+    return health_controller.healthz()
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """Readiness probe endpoint."""
+    return health_controller.readyz()
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus metrics endpoint."""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+# Profiling hooks and routes are only installed when enabled, so they cost nothing otherwise
+if profiling.enabled():
+    profile_controller = ProfileController()
+
+    @app.before_request
+    def start_profiling():
+        """Start profiling the request if asked for."""
+        profile_controller.start()
+
+    @app.after_request
+    def finish_profiling(response):
+        """Store the request profile."""
+        return profile_controller.finish(response)
+
+    @app.teardown_request
+    def discard_profiling(error=None):
+        """Stop the profiler of a failed request."""
+        profile_controller.discard()
+
+    @app.route("/profiles", methods=["GET"])
+    def list_profiles():
+        """List stored request profiles endpoint."""
+        return profile_controller.list_profiles()
+
+    @app.route("/profiles/<profile_id>", methods=["GET"])
+    def get_profile(profile_id):
+        """Download a request profile endpoint."""
+        return profile_controller.get_profile(profile_id)
+
+# Prewarm the database and LLM connections and the controllers in the background (see /readyz)
+startup.start(build_controllers)
+
+# Background version compaction runs only when COMPACTION_INTERVAL_SECONDS is set
+version_retention.start_background_compaction()
+
 # Run the application
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
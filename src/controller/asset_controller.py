@@ -0,0 +1,19 @@
+from flask import request, jsonify, send_file
+from src.model import assets
+
+class AssetController:
+    """Controller serving the fingerprinted, precompressed asset bundles"""
+
+    def serve(self, filename):
+        """Send the best precompressed variant of a built asset with immutable caching."""
+        resolved = assets.resolve(filename, request.headers.get("Accept-Encoding"))
+        if resolved is None:
+            return jsonify({"error": "Asset not found."}), 404
+        path, mimetype, encoding = resolved
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=True)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        # File names change with their content, so they never need revalidation
+        response.headers["Cache-Control"] = assets.IMMUTABLE_CACHE_CONTROL
+        response.vary.add("Accept-Encoding")
+        return response
@@ -1,14 +1,17 @@
 from flask import request, jsonify, session
 from src.model.llm_service import LLMService
-from src.model.gpt2 import gpt_v2_interface 
+from src.model.gpt2 import gpt_v2_interface, gpt_v2_extract
 from src.model.project_service import ProjectService
+from src.model.deadline import Deadline, DeadlineExceeded
+from src.model import dmd_edits, structure_index
+from src.model.metrics import stage, LOCAL_ANSWERS_TOTAL
 
 class ChatController:
     """Controller for chat-related operations and version saving"""
     
-    def __init__(self):
+    def __init__(self, project_service=None):
         self.llm_service = LLMService()
-        self.project_service = ProjectService()
+        self.project_service = project_service or ProjectService()
         
     def handle_chat_request(self):
         """Process user input and generate response with version saving"""
@@ -16,16 +19,22 @@ class ChatController:
             data = request.json
             user_input = data.get("message", "").strip()
             project_name = data.get("project_name", "").strip()
+            # Version the client already holds; lets non-model turns return only what changed
+            since_version = data.get("since_version")
 
             if not user_input:
                 return jsonify({"error": "User input is required"}), 400
             if not project_name:
                 return jsonify({"error": "Project name is required to save version"}), 400
             
+            # The whole turn shares one time budget; each stage gets a share of what is left
+            deadline = Deadline()
+            
             # Get the current state before processing new input
             # This ensures we always have the latest domain model and PlantUML
             project_result, _ = self.project_service.get_project_data(project_name)
             current_project_data = project_result.get("project_data", {})
+            base_version = current_project_data.get("version")
             
             # Get existing domain model description and PlantUML from project data
             # These will be used as fallbacks if nothing new is generated
@@ -33,13 +42,32 @@ class ChatController:
             existing_plant_uml = current_project_data.get("plant_uml", "@startuml\nskinparam monochrome true\ntitle Your New Project\n\nclass ExampleEntity {\n  +id: string\n  +name: string\n}\n\nnote \"Start building your domain model!\" as N1\n@enduml")
             
             self.llm_service.add_to_chat_history("user", user_input)
+
+            # Structural questions about the current model are answered from its index, without an LLM call
+            local_answer = self._answer_locally(project_name, base_version, user_input)
+            if local_answer is not None:
+                self.llm_service.add_to_chat_history("assistant", local_answer)
+                save_result, _ = self.project_service.save_version(
+                    project_name, user_input, local_answer, existing_dmd, existing_plant_uml
+                )
+                return self._chat_response({
+                    "response": local_answer,
+                    "domain_model_description": existing_dmd,
+                    "plant_uml": existing_plant_uml,
+                    "version": save_result.get("version"),
+                    "answered_locally": True
+                }, since_version, base_version, user_input, existing_dmd, existing_plant_uml)
+
             updated_chat_history = self.llm_service.chat_history.get_messages()
             chat_history_text = "\n".join([
                 f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}"
                 for msg in updated_chat_history
             ])
             
-            classification_result = self.llm_service.determine_input_type(chat_history_text)
+            try:
+                classification_result = deadline.run("classification", self.llm_service.determine_input_type, chat_history_text)
+            except DeadlineExceeded:
+                return self._deadline_response()
             
             decision = classification_result.get("decision", False)
             is_casual_comment = classification_result.get("is_casual_comment", False)
@@ -59,46 +87,87 @@ class ChatController:
                     client = self.llm_service.client
                     current_plant_uml = gpt_v2_interface(current_dmd, client)
                 
-                self.project_service.save_version(
+                save_result, _ = self.project_service.save_version(
                     project_name,
                     user_input,
                     assistant_response,
                     current_dmd,
                     current_plant_uml
                 )
-                return jsonify({
+                return self._chat_response({
                     "response": assistant_response,
-                    "history": self.llm_service.get_chat_history(),
                     "domain_model_description": current_dmd,
-                    "plant_uml": current_plant_uml
-                })
+                    "plant_uml": current_plant_uml,
+                    "version": save_result.get("version")
+                }, since_version, base_version, user_input, existing_dmd, existing_plant_uml)
                 
             elif decision: # Enough information for domain modeling (new or update)
-                new_dmd = self.llm_service.generate_domain_model_description(chat_history_text)
+                try:
+                    # Updates edit the project's stored description; changes is None after a full rewrite
+                    new_dmd, dmd_changes = deadline.run("dmd_generation", self.llm_service.update_domain_model_description,
+                                                        chat_history_text, classification_result, existing_dmd, user_input)
+                except DeadlineExceeded as exceeded:
+                    self.llm_service.add_to_chat_history("assistant", assistant_response)
+                    # Save the turn with the previous description and diagram; both are attached when ready
+                    save_result, _ = self.project_service.save_version(
+                        project_name, user_input, assistant_response, existing_dmd, existing_plant_uml, uml_pending=True
+                    )
+                    response_data = {
+                        "domain_model_description": existing_dmd,
+                        "suggestion": assistant_response,
+                        "plant_uml": existing_plant_uml,
+                        "version": save_result.get("version")
+                    }
+                    if save_result.get("version") is not None:
+                        exceeded.future.add_done_callback(self._attach_late_description(project_name, save_result["version"]))
+                        response_data["uml_pending"] = True
+                    return jsonify(response_data)
+                # Set only now: a description finished after the deadline goes to its version, not the session
+                self.llm_service.current_domain_model_description.set_text(new_dmd)
                 self.llm_service.add_to_chat_history("assistant", assistant_response)
                 
-                # Generate PlantUML for the new/updated DMD
+                # Generate PlantUML for the new/updated DMD, keeping the structured model for rendering
                 client = self.llm_service.client
                 new_plant_uml = ""
-                if new_dmd:
-                    new_plant_uml = gpt_v2_interface(new_dmd, client)
+                domain_model = None
+                uml_future = None
+                if dmd_changes is not None and not dmd_edits.has_changes(dmd_changes):
+                    # The edits left the description as it was, so the diagram still matches it
+                    new_plant_uml = current_plant_uml
+                elif new_dmd:
+                    uml_future = deadline.submit(gpt_v2_extract, new_dmd, client)
+                    try:
+                        domain_model, new_plant_uml = deadline.wait("uml_extraction", uml_future)
+                        uml_future = None
+                    except DeadlineExceeded:
+                        # Keep the new description with the previous diagram; the UML is attached when ready
+                        new_plant_uml = current_plant_uml
                 else:
                     new_dmd = current_dmd  # Fallback to existing DMD
                     new_plant_uml = current_plant_uml  # Fallback to existing PlantUML
 
-                self.project_service.save_version(
+                save_result, _ = self.project_service.save_version(
                     project_name,
                     user_input,
                     assistant_response,
                     new_dmd,
-                    new_plant_uml
+                    new_plant_uml,
+                    domain_model,
+                    uml_pending=uml_future is not None
                 )
                 
-                return jsonify({
+                response_data = {
                     "domain_model_description": new_dmd, 
                     "suggestion": assistant_response,
-                    "plant_uml": new_plant_uml
-                })
+                    "plant_uml": new_plant_uml,
+                    "version": save_result.get("version")
+                }
+                if dmd_changes is not None:
+                    response_data["dmd_changes"] = dmd_changes
+                if uml_future is not None and save_result.get("version") is not None:
+                    uml_future.add_done_callback(self._attach_late_uml(project_name, save_result["version"]))
+                    response_data["uml_pending"] = True
+                return jsonify(response_data)
                 
             else: # Not enough info for domain modeling
                 self.llm_service.add_to_chat_history("assistant", assistant_response)
@@ -109,7 +178,7 @@ class ChatController:
                     client = self.llm_service.client
                     current_plant_uml = gpt_v2_interface(current_dmd, client)
 
-                self.project_service.save_version(
+                save_result, _ = self.project_service.save_version(
                     project_name,
                     user_input,
                     assistant_response,
@@ -117,12 +186,12 @@ class ChatController:
                     current_plant_uml
                 )
                 
-                return jsonify({
+                return self._chat_response({
                     "response": assistant_response, 
-                    "history": self.llm_service.get_chat_history(),
                     "domain_model_description": current_dmd,
-                    "plant_uml": current_plant_uml
-                })
+                    "plant_uml": current_plant_uml,
+                    "version": save_result.get("version")
+                }, since_version, base_version, user_input, existing_dmd, existing_plant_uml)
 
         except Exception as e:
             print(f"Error in chat request: {e}")
@@ -130,6 +199,81 @@ class ChatController:
             traceback.print_exc()
             return jsonify({"error": "An unexpected error occurred"}), 500
     
+    def _answer_locally(self, project_name, version, question):
+        """Answer a structural question from the project's domain model index, or return None"""
+        if not structure_index.LOCAL_ANSWERS_ENABLED or version is None:
+            return None
+        try:
+            with stage("local_answer"):
+                index = structure_index.get_index(
+                    self.project_service.get_version_model_hash(project_name, version),
+                    lambda: self.project_service.get_version_domain_model(project_name, version)[0].get("domain_model")
+                )
+                answer = index.answer(question) if index is not None else None
+        except Exception as e:
+            print(f"Error answering question locally: {e}")
+            return None
+        if answer is None:
+            return None
+        kind, text = answer
+        LOCAL_ANSWERS_TOTAL.inc(kind=kind)
+        return text
+    
+    def _deadline_response(self):
+        """Answer a turn that ran out of time before anything could be saved"""
+        return jsonify({"error": "The assistant is taking longer than usual. Please send your message again in a moment."}), 504
+    
+    def _attach_late_description(self, project_name, version):
+        """Build a callback that stores a description finished after the response was sent, then its PlantUML"""
+        def attach(future):
+            try:
+                new_dmd, dmd_changes = future.result()
+            except Exception as e:
+                print(f"Error generating late domain model description for version {version}: {e}")
+                new_dmd, dmd_changes = None, None
+            if not new_dmd or (dmd_changes is not None and not dmd_edits.has_changes(dmd_changes)):
+                # Nothing changed: keep the carried-over description and diagram
+                self.project_service.attach_version_uml(project_name, version)
+                return
+            self.project_service.attach_version_description(project_name, version, new_dmd)
+            # Already off the request thread, so the UML is extracted right here
+            try:
+                domain_model, plant_uml = gpt_v2_extract(new_dmd, self.llm_service.client)
+            except Exception as e:
+                print(f"Error generating late PlantUML for version {version}: {e}")
+                domain_model, plant_uml = None, None
+            self.project_service.attach_version_uml(project_name, version, plant_uml, domain_model)
+        return attach
+    
+    def _attach_late_uml(self, project_name, version):
+        """Build a callback that stores PlantUML finished after the response was sent"""
+        def attach(future):
+            try:
+                domain_model, plant_uml = future.result()
+            except Exception as e:
+                print(f"Error generating late PlantUML for version {version}: {e}")
+                domain_model, plant_uml = None, None
+            self.project_service.attach_version_uml(project_name, version, plant_uml, domain_model)
+        return attach
+    
+    def _chat_response(self, response_data, since_version, base_version, user_input, existing_dmd, existing_plant_uml):
+        """Build a non-model turn response, sending only new messages and changed fields to an in-sync client"""
+        if since_version is None or since_version != base_version:
+            response_data["history"] = self.llm_service.get_chat_history()
+            return jsonify(response_data)
+        
+        # The client holds the version this turn was based on: it only lacks this turn's messages
+        response_data["history"] = [
+            {"role": "user", "content": user_input},
+            {"role": "assistant", "content": response_data["response"]}
+        ]
+        response_data["delta"] = True
+        if response_data.get("domain_model_description") == existing_dmd:
+            del response_data["domain_model_description"]
+        if response_data.get("plant_uml") == existing_plant_uml:
+            del response_data["plant_uml"]
+        return jsonify(response_data)
+    
     def generate_uml(self):
         """Generate UML diagram from domain model description"""
         try:
@@ -0,0 +1,104 @@
+from flask import request, jsonify, make_response
+from src.model.project_service import ProjectService
+from src.model.svg_renderer import render_svg, model_hash, RENDERER_VERSION
+from src.model.gpt2 import normalize_extraction
+from src.model.diagram_partition import (
+    OVERVIEW_ID, partition_model, needs_partitioning, overview_model, overview_plantuml, view_model, view_plantuml
+)
+
+class DiagramController:
+    """Controller for server-side diagram rendering"""
+    
+    def __init__(self, project_service=None):
+        self.project_service = project_service or ProjectService()
+    
+    def render_svg(self):
+        """Render a class diagram as SVG from a posted domain model or a stored project version"""
+        try:
+            if request.method == "POST":
+                domain_model = (request.json or {}).get("domain_model")
+                if not isinstance(domain_model, dict):
+                    return jsonify({"error": "A structured domain model is required."}), 400
+            else:
+                project_name = request.args.get("project_name", "").strip()
+                version = request.args.get("version", type=int)
+                result, status_code = self.project_service.get_version_domain_model(project_name, version)
+                if status_code != 200:
+                    return jsonify(result), status_code
+                domain_model = result["domain_model"]
+            
+            svg, svg_hash = render_svg(normalize_extraction(domain_model))
+            return self._svg_response(svg, svg_hash)
+        except Exception as e:
+            print(f"Error rendering SVG: {e}")
+            return jsonify({"error": "An error occurred while rendering the diagram."}), 500
+
+    
+    def get_diagram_views(self):
+        """List the views of a stored version's diagram; large models are split into an overview and detail views"""
+        try:
+            partition, model_key, error = self._load_partition()
+            if error:
+                return error
+            
+            if not needs_partitioning(partition):
+                return jsonify({"partitioned": False, "model_hash": model_key, "views": []})
+            return jsonify({
+                "partitioned": True,
+                "model_hash": model_key,
+                "entity_count": len(partition["model"].entities),
+                "views": [
+                    {"id": view["id"], "title": view["title"], "entity_count": len(view["entities"])}
+                    for view in partition["views"]
+                ]
+            })
+        except Exception as e:
+            print(f"Error listing diagram views: {e}")
+            return jsonify({"error": "An error occurred while partitioning the diagram."}), 500
+    
+    def get_diagram_view(self):
+        """Render one view (or the overview) of a stored version's diagram as SVG or PlantUML"""
+        try:
+            view_id = request.args.get("view_id", OVERVIEW_ID).strip()
+            output_format = request.args.get("format", "svg").strip()
+            partition, model_key, error = self._load_partition()
+            if error:
+                return error
+            
+            if view_id == OVERVIEW_ID:
+                view = overview_model(partition)
+                plant_uml = overview_plantuml(partition) if output_format == "plantuml" else None
+            else:
+                view, _ = view_model(partition, view_id)
+                if view is None:
+                    return jsonify({"error": f"Unknown diagram view '{view_id}'."}), 404
+                plant_uml = view_plantuml(partition, view_id) if output_format == "plantuml" else None
+            
+            if output_format == "plantuml":
+                return jsonify({"id": view_id, "model_hash": model_key, "plant_uml": plant_uml})
+            svg, svg_hash = render_svg(view.to_extraction())
+            return self._svg_response(svg, svg_hash)
+        except Exception as e:
+            print(f"Error rendering diagram view: {e}")
+            return jsonify({"error": "An error occurred while rendering the diagram view."}), 500
+    
+    def _load_partition(self):
+        """Load the requested version's structured model and its (memoized) partition"""
+        project_name = request.args.get("project_name", "").strip()
+        version = request.args.get("version", type=int)
+        result, status_code = self.project_service.get_version_domain_model(project_name, version)
+        if status_code != 200:
+            return None, None, (jsonify(result), status_code)
+        # Same names as the version's post-processed PlantUML
+        domain_model = normalize_extraction(result["domain_model"])
+        model_key = model_hash(domain_model)
+        return partition_model(domain_model, model_key), model_key, None
+    
+    def _svg_response(self, svg, svg_hash):
+        """Wrap rendered SVG in a conditional response"""
+        response = make_response(svg)
+        response.mimetype = "image/svg+xml"
+        # The SVG is a pure function of the model and the renderer, so together they are a strong validator
+        response.set_etag(f"{RENDERER_VERSION}-{svg_hash}")
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
\ No newline at end of file
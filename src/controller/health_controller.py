@@ -0,0 +1,18 @@
+from flask import jsonify
+from src.model import startup
+
+class HealthController:
+    """Controller for liveness and readiness probes"""
+
+    def healthz(self):
+        """Liveness: the process is running."""
+        return jsonify(startup.liveness()), 200
+
+    def readyz(self):
+        """Readiness: startup finished and the database is reachable."""
+        try:
+            ready, details = startup.readiness()
+            return jsonify(details), 200 if ready else 503
+        except Exception as e:
+            print(f"Error in readyz: {e}")
+            return jsonify({"status": "not_ready", "error": str(e)}), 503
@@ -0,0 +1,47 @@
+from flask import request, jsonify, g, Response
+from src.model import profiling
+
+class ProfileController:
+    """Controller for opt-in per-request profiling"""
+
+    def start(self):
+        """Start profiling the current request when asked for with the token or picked by sampling"""
+        candidate = request.headers.get("X-Profile") or request.args.get("profile")
+        if profiling.should_profile(candidate):
+            g.profiler = profiling.SamplingProfiler().start()
+
+    def finish(self, response):
+        """Stop the profiler, store the profile and tell the caller its id"""
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return response
+        profiler.stop()
+        profile_id = profiling.store.add(profiler, request.method, request.path, request.endpoint, response.status_code)
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
+    def discard(self):
+        """Stop a profiler left running by a request that raised"""
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.stop()
+
+    def list_profiles(self):
+        """List stored profiles (admin only)"""
+        if not self._authorized():
+            return jsonify({"error": "Not found"}), 404
+        return jsonify({"profiles": profiling.store.list()}), 200
+
+    def get_profile(self, profile_id):
+        """Download one profile as folded stacks for flamegraph.pl or speedscope (admin only)"""
+        if not self._authorized():
+            return jsonify({"error": "Not found"}), 404
+        profile = profiling.store.get(profile_id)
+        if profile is None:
+            return jsonify({"error": "Profile not found"}), 404
+        return Response(profile["folded"], mimetype="text/plain", headers={
+            "Content-Disposition": f"attachment; filename=profile-{profile_id}.folded"
+        })
+
+    def _authorized(self):
+        return profiling.token_matches(request.headers.get("X-Profile") or request.args.get("profile"))
@@ -1,11 +1,13 @@
-from flask import request, jsonify, session
+from flask import request, jsonify, session, make_response, Response, stream_with_context
+from datetime import datetime
 from src.model.project_service import ProjectService
+from src.model import project_transfer
 
 class ProjectController:
     """Controller for project management operations"""
     
-    def __init__(self):
-        self.project_service = ProjectService()
+    def __init__(self, project_service=None):
+        self.project_service = project_service or ProjectService()
     
     def get_projects(self):
         """Get list of projects from database"""
@@ -39,12 +41,27 @@ class ProjectController:
             return jsonify({"error": "An unexpected error occurred."}), 500
     
     def get_project_data(self):
-        """Get project data for the specified project"""
+        """Get project data for the specified project, honouring If-None-Match and since_version"""
         try:
             project_name = request.args.get("project_name", "").strip()
+            since_version = request.args.get("since_version", type=int)
             
-            result, status_code = self.project_service.get_project_data(project_name)
-            return jsonify(result), status_code
+            # Revalidation only needs the project's head and revision, not its versions
+            etag = self.project_service.get_project_etag(project_name)
+            if etag and request.if_none_match.contains(etag):
+                response = make_response("", 304)
+                response.set_etag(etag)
+                response.headers["Cache-Control"] = "no-cache"
+                return response
+            
+            result, status_code = self.project_service.get_project_data(project_name, since_version)
+            project_data = result.get("project_data")
+            etag = project_data.pop("etag") if project_data else None
+            response = jsonify(result)
+            if etag:
+                response.set_etag(etag)
+                response.headers["Cache-Control"] = "no-cache"
+            return response, status_code
         except Exception as e:
             print(f"Error in get_project_data: {e}")
             return jsonify({"error": "An unexpected error occurred."}), 500
@@ -80,6 +97,32 @@ class ProjectController:
             print(f"Error in save_project_data: {e}")
             return jsonify({"error": "An unexpected error occurred."}), 500
 
+    def get_version_uml(self):
+        """Get a version's PlantUML, telling the client whether it is still being generated."""
+        try:
+            project_name = request.args.get("project_name", "").strip()
+            version = request.args.get("version", type=int)
+            result, status_code = self.project_service.get_version_uml(project_name, version)
+            return jsonify(result), status_code
+        except Exception as e:
+            print(f"Error in get_version_uml controller: {e}")
+            return jsonify({"error": "An unexpected error occurred."}), 500
+
+    def export_projects(self):
+        """Stream every project with its version history as NDJSON (admin only)."""
+        # Every user's chat history is in the export, so without the token the endpoint does not exist
+        if not project_transfer.export_token_matches(request.headers.get("X-Export-Token")):
+            return jsonify({"error": "Not found"}), 404
+        try:
+            batch_size = request.args.get("batch_size", type=int) or project_transfer.EXPORT_BATCH_SIZE
+            lines = self.project_service.export_projects(batch_size)
+            response = Response(stream_with_context(lines), mimetype="application/x-ndjson")
+            response.headers["Content-Disposition"] = f"attachment; filename=projects-{datetime.now():%Y%m%d-%H%M%S}.ndjson"
+            return response
+        except Exception as e:
+            print(f"Error in export_projects: {e}")
+            return jsonify({"error": "An unexpected error occurred."}), 500
+
     def undo_project_change(self):
         """Handle request to undo the latest version for a project."""
         try:
@@ -92,4 +135,18 @@ class ProjectController:
             return jsonify(result), status_code
         except Exception as e:
             print(f"Error in undo_project_change controller: {e}")
-            return jsonify({"error": "An unexpected error occurred while undoing version."}), 500
\ No newline at end of file
+            return jsonify({"error": "An unexpected error occurred while undoing version."}), 500
+
+    def redo_project_change(self):
+        """Handle request to redo the most recently undone version for a project."""
+        try:
+            data = request.json
+            project_name = data.get("project_name", "").strip()
+            if not project_name:
+                return jsonify({"error": "Project name is required."}), 400
+            
+            result, status_code = self.project_service.redo_version(project_name)
+            return jsonify(result), status_code
+        except Exception as e:
+            print(f"Error in redo_project_change controller: {e}")
+            return jsonify({"error": "An unexpected error occurred while redoing version."}), 500
\ No newline at end of file
@@ -0,0 +1,109 @@
+import json
+import mimetypes
+import os
+import threading
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "view", "static")
+# Output of scripts/build_assets.py
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_PATH = os.path.join(DIST_DIR, "manifest.json")
+
+# Bundles in load order; classic scripts share one global scope, so concatenating them is safe
+BUNDLES = {
+    "app.js": [
+        "js/chat-view.js",
+        "js/project-view.js",
+        "js/uml-view.js",
+        "js/app-controller.js",
+        "js/main.js"
+    ],
+    "style.css": [
+        "css/style.css"
+    ]
+}
+
+# Precompressed variants, preferred first: Accept-Encoding token -> file suffix
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class AssetManifest:
+    """
+    The hashed bundle names written by the build, reloaded when the build runs again.
+
+    The manifest is ignored while any source file is newer than it, so editing a script during
+    development takes effect without rebuilding.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self._bundles = None
+        self._loaded_mtime = None
+        self._lock = threading.Lock()
+
+    def _sources_mtime(self):
+        return max(os.path.getmtime(os.path.join(STATIC_DIR, source))
+                   for sources in BUNDLES.values() for source in sources)
+
+    def bundles(self):
+        """Return {bundle name: hashed file name}, or None when there is no up-to-date build."""
+        try:
+            mtime = os.path.getmtime(self.path)
+            if mtime < self._sources_mtime():
+                return None
+        except OSError:
+            return None
+        if mtime != self._loaded_mtime:
+            with self._lock:
+                try:
+                    with open(self.path, encoding="utf-8") as file:
+                        self._bundles = json.load(file)["bundles"]
+                    self._loaded_mtime = mtime
+                except Exception as e:
+                    print(f"Error loading asset manifest: {e}")
+                    return None
+        return self._bundles
+
+
+manifest = AssetManifest()
+
+
+def asset_files(bundle):
+    """
+    Return the files to reference for a bundle, as (endpoint, filename) pairs.
+
+    The hashed bundle served from /assets/ when a build exists, otherwise its source files
+    served by the regular static handler.
+    """
+    bundles = manifest.bundles()
+    if bundles and bundle in bundles:
+        return [("serve_asset", bundles[bundle])]
+    return [("static", source) for source in BUNDLES[bundle]]
+
+
+def resolve(filename, accept_encoding):
+    """
+    Pick the file to send for a built asset and the client's Accept-Encoding header.
+
+    Returns:
+        tuple: (path, mimetype, content encoding or None), or None when the asset does not exist.
+    """
+    path = os.path.join(DIST_DIR, filename)
+    if os.path.basename(filename) != filename or filename == os.path.basename(MANIFEST_PATH) or not os.path.isfile(path):
+        return None
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    accepted = set()
+    for token in (accept_encoding or "").split(","):
+        name, _, parameters = token.partition(";")
+        quality = parameters.strip()
+        try:
+            # "br;q=0" explicitly refuses an encoding
+            if quality.startswith("q=") and float(quality[2:]) == 0:
+                continue
+        except ValueError:
+            pass
+        accepted.add(name.strip())
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and os.path.isfile(path + suffix):
+            return path + suffix, mimetype, encoding
+    return path, mimetype, None
@@ -9,6 +9,10 @@ class ChatHistory:
         """Add a message to the chat history."""
         self.chat_history.append({"role": role, "content": content})
     
+    def remove_last_message(self):
+        """Remove and return the most recent message, if any."""
+        return self.chat_history.pop() if self.chat_history else None
+    
     def get_messages(self):
         """Get all messages in the chat history."""
         return self.chat_history
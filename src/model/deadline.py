@@ -0,0 +1,83 @@
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from src.model.metrics import DEADLINE_EXCEEDED
+from src.model import profiling
+
+# Overall time budget of one chat turn
+CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "45"))
+# Share of the remaining budget a stage may use, leaving time for the stages after it
+STAGE_SHARES = {
+    "classification": 0.3,
+    "dmd_generation": 0.7,
+    "uml_extraction": 1.0
+}
+
+_thread_numbers = itertools.count(1)
+
+
+class DeadlineExceeded(Exception):
+    """A stage did not finish within its share of the request deadline."""
+
+    def __init__(self, stage, future):
+        super().__init__(f"Stage '{stage}' exceeded the request deadline")
+        self.stage = stage
+        self.future = future
+
+
+class Deadline:
+    """Time budget of one request, split across its stages."""
+
+    def __init__(self, seconds=CHAT_DEADLINE_SECONDS):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        """Seconds left before the deadline (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def submit(self, function, *args):
+        """
+        Start a stage call on its own thread and return its future.
+
+        A shared pool would make stages queue behind calls abandoned at earlier deadlines, and
+        the time spent queueing would count against this request's budget. A thread per stage
+        starts at once, and an abandoned call only keeps its own thread.
+        """
+        future = Future()
+        # A profiled request keeps sampling its stages, which now run on their own threads
+        function = profiling.propagate(function)
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                result = function(*args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+        threading.Thread(target=run, name=f"stage-{next(_thread_numbers)}", daemon=True).start()
+        return future
+
+    def wait(self, stage, future):
+        """
+        Wait for a stage call for at most its share of the remaining time.
+
+        Raises:
+            DeadlineExceeded: The call is still running; it carries the future so the caller
+            can pick up the result later.
+        """
+        timeout = self.remaining() * STAGE_SHARES.get(stage, 1.0)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            DEADLINE_EXCEEDED.inc(stage=stage)
+            print(f"Stage '{stage}' exceeded its {timeout:.1f}s deadline budget; continuing in the background")
+            raise DeadlineExceeded(stage, future)
+
+    def run(self, stage, function, *args):
+        """Run a stage call within its share of the remaining time."""
+        return self.wait(stage, self.submit(function, *args))
@@ -0,0 +1,234 @@
+import os
+import threading
+from collections import OrderedDict
+from src.model.domain_model_ir import DomainModel, ASSOCIATION, GENERALIZATION, COMPOSITION
+from src.model.gpt2 import post_process, merge_tokens
+
+# Models with more entities than this are split into views
+PARTITION_THRESHOLD = int(os.getenv("DIAGRAM_PARTITION_THRESHOLD", "30"))
+# Upper bound on the number of entities drawn in one detail view
+MAX_VIEW_ENTITIES = int(os.getenv("DIAGRAM_MAX_VIEW_ENTITIES", "20"))
+
+OVERVIEW_ID = "overview"
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_size = 64
+
+
+class _DisjointSet:
+    """Union-find over entity names."""
+
+    def __init__(self, names):
+        self.parent = {name: name for name in names}
+
+    def find(self, name):
+        while self.parent[name] != name:
+            self.parent[name] = self.parent[self.parent[name]]
+            name = self.parent[name]
+        return name
+
+    def union(self, first, second):
+        self.parent[self.find(first)] = self.find(second)
+
+    def groups(self, order):
+        """Return the groups as lists, ordered by the first member in the given order."""
+        groups = OrderedDict()
+        for name in order:
+            groups.setdefault(self.find(name), []).append(name)
+        return list(groups.values())
+
+
+def _neighbours(model, name):
+    return [relation.target if relation.source == name else relation.source for relation in model.relations_of(name)]
+
+
+def _split_component(model, component, max_entities):
+    """
+    Split a connected component that is too large for one view.
+
+    Inheritance and composition clusters are kept together where they fit; clusters are then
+    packed into views following association links breadth-first, so related clusters share a view.
+    """
+    members = set(component)
+    clusters = _DisjointSet(component)
+    for name in component:
+        for relation in model.outgoing(name):
+            if relation.kind in (GENERALIZATION, COMPOSITION) and relation.target in members:
+                clusters.union(relation.source, relation.target)
+    cluster_of = {}
+    for cluster in clusters.groups(component):
+        for name in cluster:
+            cluster_of[name] = cluster
+
+    views, current, placed = [], [], set()
+    for start in component:
+        if start in placed:
+            continue
+        queue = [start]
+        while queue:
+            name = queue.pop(0)
+            if name in placed:
+                continue
+            cluster = [member for member in cluster_of[name] if member not in placed]
+            # Oversized clusters are cut into view-sized slices
+            for offset in range(0, len(cluster), max_entities):
+                piece = cluster[offset:offset + max_entities]
+                if current and len(current) + len(piece) > max_entities:
+                    views.append(current)
+                    current = []
+                current.extend(piece)
+                placed.update(piece)
+            for member in cluster:
+                queue.extend(other for other in _neighbours(model, member) if other in members and other not in placed)
+    if current:
+        views.append(current)
+    return views
+
+
+def _partition_entities(model, max_entities):
+    """Group entity names into views of at most max_entities."""
+    components = _DisjointSet(model.entities)
+    for relation in model.relations:
+        components.union(relation.source, relation.target)
+
+    views, small = [], []
+    for component in components.groups(model.entities):
+        if len(component) > max_entities:
+            views.extend(_split_component(model, component, max_entities))
+        elif small and len(small) + len(component) > max_entities:
+            views.append(small)
+            small = list(component)
+        else:
+            # Small components (including isolated entities) are packed together
+            small.extend(component)
+    if small:
+        views.append(small)
+    return views
+
+
+def _view_title(model, entities):
+    """Name a view after its most connected entity."""
+    anchor = max(entities, key=lambda name: len(model.relations_of(name)))
+    return anchor if len(entities) == 1 else f"{anchor} (+{len(entities) - 1})"
+
+
+def _build(data):
+    model = DomainModel.from_extraction(data)
+    views = []
+    view_of = {}
+    for index, entities in enumerate(_partition_entities(model, MAX_VIEW_ENTITIES), start=1):
+        view_id = f"view-{index}"
+        views.append({"id": view_id, "title": _view_title(model, entities), "entities": entities})
+        for name in entities:
+            view_of[name] = view_id
+    return {"model": model, "views": views, "view_of": view_of}
+
+
+def partition_model(data, model_hash):
+    """
+    Partition a structured domain model into views, memoized by model hash.
+
+    Args:
+        data (dict): The extraction produced by gpt2.process_response.
+        model_hash (str): Hash of data (see svg_renderer.model_hash).
+
+    Returns:
+        dict: {"model": DomainModel, "views": [{"id", "title", "entities"}], "view_of": {entity: view id}}
+    """
+    with _cache_lock:
+        if model_hash in _cache:
+            _cache.move_to_end(model_hash)
+            return _cache[model_hash]
+    partition = _build(data)
+    with _cache_lock:
+        _cache[model_hash] = partition
+        while len(_cache) > _cache_size:
+            _cache.popitem(last=False)
+    return partition
+
+
+def needs_partitioning(partition):
+    """Return True when the model is too large to draw as one diagram."""
+    return len(partition["model"].entities) > PARTITION_THRESHOLD
+
+
+def overview_model(partition):
+    """
+    Build the overview diagram: one node per view, linked by the number of relations between views.
+
+    Returns:
+        DomainModel: Entities are view titles, attributes summarize each view.
+    """
+    model, view_of = partition["model"], partition["view_of"]
+    titles = {view["id"]: view["title"] for view in partition["views"]}
+    overview = DomainModel()
+    for view in partition["views"]:
+        overview.add_attribute(view["title"], f"{len(view['entities'])} entities")
+
+    links = OrderedDict()
+    for relation in model.relations:
+        source_view, target_view = view_of[relation.source], view_of[relation.target]
+        if source_view != target_view:
+            pair = tuple(sorted((source_view, target_view)))
+            links[pair] = links.get(pair, 0) + 1
+    for (first, second), count in links.items():
+        label = f"{count} relation" + ("s" if count > 1 else "")
+        overview.add_relation(ASSOCIATION, titles[first], titles[second], "", "", label)
+    return overview
+
+
+def view_model(partition, view_id):
+    """
+    Build the detail model of one view.
+
+    Relations leaving the view are kept, with the entity on the far side included without
+    its attributes, so the user can see where the view connects.
+
+    Returns:
+        tuple: (DomainModel, list of external entity names), or (None, None) for an unknown view.
+    """
+    view = next((view for view in partition["views"] if view["id"] == view_id), None)
+    if view is None:
+        return None, None
+    model = partition["model"]
+    members = set(view["entities"])
+    detail = DomainModel()
+    external = []
+    for name in view["entities"]:
+        for attribute in model.entities[name].attributes:
+            detail.add_attribute(name, attribute)
+        detail.entity(name)
+    for relation in model.relations:
+        if relation.source in members or relation.target in members:
+            for end in (relation.source, relation.target):
+                if end not in members and end not in external:
+                    external.append(end)
+            detail.add_relation(relation.kind, relation.source, relation.target,
+                                relation.source_multiplicity, relation.target_multiplicity, relation.label)
+    return detail, external
+
+
+def overview_plantuml(partition):
+    """Emit the overview as PlantUML, with views aliased by their id."""
+    overview = overview_model(partition)
+    alias = {view["title"]: view["id"].replace("-", "_") for view in partition["views"]}
+    lines = ["@startuml", "left to right direction"]
+    for view in partition["views"]:
+        title = view["title"].replace('"', "'")
+        lines.append(f'class "{title}" as {alias[view["title"]]}')
+        lines.append(f'{alias[view["title"]]} : {len(view["entities"])} entities')
+    for relation in overview.relations:
+        lines.append(f"{alias[relation.source]} -- {alias[relation.target]} : {relation.label}")
+    lines.append("@enduml")
+    return "\n".join(lines)
+
+
+def view_plantuml(partition, view_id):
+    """Emit one detail view as post-processed PlantUML; entities outside the view are greyed out."""
+    detail, external = view_model(partition, view_id)
+    if detail is None:
+        return None
+    lines = post_process(detail.to_plantuml()).splitlines()
+    stubs = [f"class {merge_tokens(name)} #EEEEEE" for name in external]
+    return "\n".join(lines[:-1] + stubs + lines[-1:])
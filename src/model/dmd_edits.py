@@ -0,0 +1,111 @@
+import os
+import re
+
+# Update existing descriptions with targeted sentence edits instead of regenerating them
+DMD_EDIT_UPDATES = os.getenv("DMD_EDIT_UPDATES", "1").lower() not in ("0", "false", "no")
+# Shorter descriptions are cheap to regenerate, so they are always rewritten in full
+DMD_EDIT_MIN_SENTENCES = int(os.getenv("DMD_EDIT_MIN_SENTENCES", "3"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(*-])")
+_ANCHOR_IN_TEXT = re.compile(r"\[S\d+\]")
+
+INSERT_AFTER = "insert_after"
+REPLACE = "replace"
+DELETE = "delete"
+OPERATIONS = (INSERT_AFTER, REPLACE, DELETE)
+
+
+class DmdEditError(ValueError):
+    """The model's edits cannot be applied to the description."""
+
+
+class SentenceDocument:
+    """
+    A domain model description split into sentences anchored S1, S2, ... for the edit prompt.
+
+    Line breaks are remembered per sentence, so a description with paragraphs or bullet lines
+    keeps its layout when edits are applied.
+    """
+
+    def __init__(self, text):
+        self.sentences = []  # [(anchor, line index, text)]
+        for line_index, line in enumerate((text or "").split("\n")):
+            for sentence in _SENTENCE_END.split(line.strip()):
+                if sentence.strip():
+                    self.sentences.append((f"S{len(self.sentences) + 1}", line_index, sentence.strip()))
+        self.line_count = len((text or "").split("\n"))
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def numbered(self):
+        """The sentences as '[S1] ...' lines, the form the edit prompt shows the model."""
+        return "\n".join(f"[{anchor}] {sentence}" for anchor, _, sentence in self.sentences)
+
+    def apply(self, edits):
+        """
+        Apply edits and return (new text, changes).
+
+        Args:
+            edits (list): Dicts with "op" (insert_after, replace, delete), "anchor" ("S3";
+                "S0" inserts before the first sentence) and "text" (ignored for delete).
+
+        Returns:
+            tuple: The edited description and {"inserted", "replaced", "deleted"} listing the
+            affected sentences, so later stages can see exactly what changed.
+        """
+        by_anchor = {anchor: (line_index, sentence) for anchor, line_index, sentence in self.sentences}
+        rewritten = {}  # anchor -> replacement text, or None when deleted
+        inserted = {}  # anchor -> sentences inserted after it
+        if not isinstance(edits, list) or not all(isinstance(edit, dict) for edit in edits):
+            raise DmdEditError("Edits must be a list of objects")
+        for edit in edits:
+            operation, anchor = edit.get("op"), str(edit.get("anchor", "")).strip().strip("[]")
+            text = " ".join(str(edit.get("text") or "").split())
+            if operation not in OPERATIONS:
+                raise DmdEditError(f"Unknown edit operation {operation!r}")
+            if anchor not in by_anchor and not (operation == INSERT_AFTER and anchor == "S0"):
+                raise DmdEditError(f"Unknown anchor {anchor!r}")
+            if operation != DELETE and not text:
+                raise DmdEditError(f"Empty text for {operation} at {anchor}")
+            if _ANCHOR_IN_TEXT.search(text):
+                raise DmdEditError(f"Anchor marker left in the text at {anchor}")
+            if operation == INSERT_AFTER:
+                inserted.setdefault(anchor, []).append(text)
+            elif anchor in rewritten:
+                raise DmdEditError(f"Sentence {anchor} is edited more than once")
+            else:
+                rewritten[anchor] = text if operation == REPLACE else None
+
+        changes = {"inserted": [], "replaced": [], "deleted": []}
+        lines = [[] for _ in range(max(self.line_count, 1))]
+        first_line = self.sentences[0][1] if self.sentences else 0
+        for text in inserted.get("S0", []):
+            lines[first_line].append(text)
+            changes["inserted"].append(text)
+        for anchor, line_index, sentence in self.sentences:
+            if anchor not in rewritten:
+                lines[line_index].append(sentence)
+            elif rewritten[anchor] is None:
+                changes["deleted"].append(sentence)
+            else:
+                lines[line_index].append(rewritten[anchor])
+                if rewritten[anchor] != sentence:
+                    changes["replaced"].append({"before": sentence, "after": rewritten[anchor]})
+            for text in inserted.get(anchor, []):
+                lines[line_index].append(text)
+                changes["inserted"].append(text)
+
+        # Lines whose sentences were all deleted disappear; runs of blank lines collapse to one
+        text = re.sub(r"\n{3,}", "\n\n", "\n".join(
+            " ".join(line) for index, line in enumerate(lines)
+            if line or not any(sentence[1] == index for sentence in self.sentences)
+        )).strip()
+        if not text:
+            raise DmdEditError("The edits remove the whole description")
+        return text, changes
+
+
+def has_changes(changes):
+    """Whether applied edits changed anything."""
+    return bool(changes and (changes["inserted"] or changes["replaced"] or changes["deleted"]))
@@ -0,0 +1,302 @@
+import json
+import re
+import sys
+
+ASSOCIATION = "association"
+GENERALIZATION = "generalization"
+AGGREGATION = "aggregation"
+COMPOSITION = "composition"
+
+# Emission order used by every emitter, matching the sections of the extraction format
+RELATION_KINDS = (ASSOCIATION, GENERALIZATION, AGGREGATION, COMPOSITION)
+
+
+class Entity:
+    """An entity (class) of the domain model and its attribute names."""
+
+    __slots__ = ("name", "attributes")
+
+    def __init__(self, name):
+        self.name = name
+        self.attributes = []
+
+    def add_attribute(self, attribute):
+        """Add an attribute unless the entity already has it."""
+        if attribute not in self.attributes:
+            self.attributes.append(attribute)
+
+
+class Relation:
+    """
+    A directed relation between two entities.
+
+    source is the association source, the superclass of a generalization, or the whole
+    of an aggregation/composition; target is the other end.
+    """
+
+    __slots__ = ("kind", "source", "target", "source_multiplicity", "target_multiplicity", "label")
+
+    def __init__(self, kind, source, target, source_multiplicity=None, target_multiplicity=None, label=None):
+        self.kind = kind
+        self.source = source
+        self.target = target
+        self.source_multiplicity = source_multiplicity
+        self.target_multiplicity = target_multiplicity
+        self.label = label
+
+    def key(self):
+        """Identity of the relation, used to compare and deduplicate relations."""
+        return (self.kind, self.source, self.target, self.source_multiplicity, self.target_multiplicity, self.label)
+
+
+class DomainModel:
+    """Typed in-memory representation of an extracted domain model with relations indexed by entity."""
+
+    __slots__ = ("entities", "relations", "_relations_by_entity")
+
+    def __init__(self):
+        self.entities = {}
+        self.relations = []
+        self._relations_by_entity = {}
+
+    def entity(self, name):
+        """Return the entity with the given name, creating it if needed. Names are interned."""
+        name = sys.intern(name)
+        entity = self.entities.get(name)
+        if entity is None:
+            entity = self.entities[name] = Entity(name)
+            self._relations_by_entity[name] = []
+        return entity
+
+    def add_attribute(self, entity_name, attribute):
+        """Add an attribute to an entity."""
+        self.entity(entity_name).add_attribute(attribute)
+
+    def add_relation(self, kind, source, target, source_multiplicity=None, target_multiplicity=None, label=None):
+        """Add a relation between two entities and index it under both ends."""
+        source = self.entity(source).name
+        target = self.entity(target).name
+        relation = Relation(kind, source, target, source_multiplicity, target_multiplicity, label)
+        self.relations.append(relation)
+        self._relations_by_entity[source].append(relation)
+        if target != source:
+            self._relations_by_entity[target].append(relation)
+        return relation
+
+    def relations_of(self, entity_name, kind=None):
+        """Return the relations touching an entity, optionally restricted to one kind."""
+        relations = self._relations_by_entity.get(entity_name, [])
+        if kind is None:
+            return list(relations)
+        return [relation for relation in relations if relation.kind == kind]
+
+    def outgoing(self, entity_name, kind=None):
+        """Return the relations whose source is the entity."""
+        return [relation for relation in self.relations_of(entity_name, kind) if relation.source == entity_name]
+
+    def incoming(self, entity_name, kind=None):
+        """Return the relations whose target is the entity."""
+        return [relation for relation in self.relations_of(entity_name, kind) if relation.target == entity_name]
+
+    def relations_by_kind(self, kind):
+        """Return all relations of one kind in insertion order."""
+        return [relation for relation in self.relations if relation.kind == kind]
+
+    @classmethod
+    def from_extraction(cls, data):
+        """
+        Build the IR from the structured extraction in a single pass.
+
+        Args:
+            data (dict): The extraction produced by gpt2.process_response.
+
+        Returns:
+            DomainModel: The typed model. Malformed elements raise KeyError.
+        """
+        model = cls()
+        # Attributes first so entities are ordered like the attribute section of the PlantUML output
+        for attr in data.get("attributes", []):
+            model.add_attribute(attr["entity"], attr["property"])
+        for assoc in data.get("associations", []):
+            model.add_relation(ASSOCIATION, assoc["source"], assoc["target"],
+                               assoc["sourceMultiplicity"], assoc["targetMultiplicity"], assoc["relationship"])
+        for gen in data.get("generalizations", []):
+            model.add_relation(GENERALIZATION, gen["superclass"], gen["subclass"])
+        for agg in data.get("aggregations", []):
+            model.add_relation(AGGREGATION, agg["parent"], agg["child"],
+                               agg["parentMultiplicity"], agg["childMultiplicity"])
+        for comp in data.get("compositions", []):
+            model.add_relation(COMPOSITION, comp["parent"], comp["child"])
+        return model
+
+    def to_extraction(self):
+        """Return the model in the dict-of-lists format produced by gpt2.process_response."""
+        data = {
+            "attributes": [
+                {"entity": entity.name, "property": attribute}
+                for entity in self.entities.values() for attribute in entity.attributes
+            ],
+            "associations": [],
+            "generalizations": [],
+            "aggregations": [],
+            "compositions": []
+        }
+        for relation in self.relations:
+            if relation.kind == ASSOCIATION:
+                data["associations"].append({
+                    "source": relation.source,
+                    "sourceMultiplicity": relation.source_multiplicity,
+                    "targetMultiplicity": relation.target_multiplicity,
+                    "target": relation.target,
+                    "relationship": relation.label
+                })
+            elif relation.kind == GENERALIZATION:
+                data["generalizations"].append({"superclass": relation.source, "subclass": relation.target})
+            elif relation.kind == AGGREGATION:
+                data["aggregations"].append({
+                    "parent": relation.source,
+                    "parentMultiplicity": relation.source_multiplicity,
+                    "child": relation.target,
+                    "childMultiplicity": relation.target_multiplicity
+                })
+            else:
+                data["compositions"].append({"parent": relation.source, "child": relation.target})
+        return data
+
+    def to_json(self):
+        """Serialize the model as extraction-format JSON."""
+        return json.dumps(self.to_extraction())
+
+    def to_plantuml(self):
+        """Emit PlantUML in the format historically produced by gpt2.convert_to_plantuml."""
+        uml_lines = ["@startuml", "left to right direction"]
+        for kind in RELATION_KINDS:
+            for relation in self.relations_by_kind(kind):
+                uml_lines.append(_plantuml_relation(relation))
+        for entity in self.entities.values():
+            for attribute in entity.attributes:
+                uml_lines.append(f"{entity.name} : {attribute}")
+        uml_lines.append("@enduml")
+        return "\n".join(uml_lines)
+
+    def to_mermaid(self):
+        """Emit a Mermaid classDiagram."""
+        lines = ["classDiagram", "    direction LR"]
+        for entity in self.entities.values():
+            if entity.attributes:
+                lines.append(f"    class {_mermaid_id(entity.name)} {{")
+                lines.extend(f"        +{_mermaid_id(attribute)}" for attribute in entity.attributes)
+                lines.append("    }")
+            else:
+                lines.append(f"    class {_mermaid_id(entity.name)}")
+        for kind in RELATION_KINDS:
+            for relation in self.relations_by_kind(kind):
+                lines.append("    " + _mermaid_relation(relation))
+        return "\n".join(lines)
+
+    def diff(self, other):
+        """
+        Compare this model with a newer one.
+
+        Returns:
+            dict: Added/removed entity names, attributes as (entity, attribute) pairs and relation keys.
+        """
+        own_attributes = {(entity.name, attribute) for entity in self.entities.values() for attribute in entity.attributes}
+        other_attributes = {(entity.name, attribute) for entity in other.entities.values() for attribute in entity.attributes}
+        own_relations = {relation.key() for relation in self.relations}
+        other_relations = {relation.key() for relation in other.relations}
+        return {
+            "added_entities": [name for name in other.entities if name not in self.entities],
+            "removed_entities": [name for name in self.entities if name not in other.entities],
+            "added_attributes": sorted(other_attributes - own_attributes),
+            "removed_attributes": sorted(own_attributes - other_attributes),
+            "added_relations": [relation.key() for relation in other.relations if relation.key() not in own_relations],
+            "removed_relations": [relation.key() for relation in self.relations if relation.key() not in other_relations]
+        }
+
+
+def canonical_entity_key(name):
+    """
+    Normalize an entity name for reconciliation across separately extracted models.
+
+    "Order Line", "order_lines" and "OrderLine" all map to "orderline".
+    """
+    key = re.sub(r"[\W_]+", "", name).lower()
+    if len(key) > 3 and key.endswith("ies"):
+        return key[:-3] + "y"
+    if len(key) > 3 and key.endswith("s") and not key.endswith("ss"):
+        return key[:-1]
+    return key
+
+
+def merge_models(models):
+    """
+    Merge separately extracted models into one, reconciling entity names and deduplicating relations.
+
+    Each group of names with the same canonical key is renamed to its most frequent spelling
+    (the first seen on ties). Relations are deduplicated on kind, ends and label; the first
+    occurrence keeps its multiplicities.
+
+    Args:
+        models (list): DomainModel instances, in source order.
+
+    Returns:
+        DomainModel: The merged model.
+    """
+    spellings = {}
+    for model in models:
+        for name in model.entities:
+            counts = spellings.setdefault(canonical_entity_key(name), {})
+            counts[name] = counts.get(name, 0) + 1 + len(model.relations_of(name))
+    preferred = {}
+    for counts in spellings.values():
+        best = max(counts, key=lambda name: counts[name])  # max keeps the first seen on ties
+        for name in counts:
+            preferred[name] = best
+
+    merged = DomainModel()
+    seen_relations = set()
+    for model in models:
+        for entity in model.entities.values():
+            target = merged.entity(preferred[entity.name])
+            for attribute in entity.attributes:
+                if attribute.lower() not in (existing.lower() for existing in target.attributes):
+                    target.add_attribute(attribute)
+        for relation in model.relations:
+            source, target = preferred[relation.source], preferred[relation.target]
+            identity = (relation.kind, source, target, (relation.label or "").strip().lower())
+            if identity in seen_relations:
+                continue
+            seen_relations.add(identity)
+            merged.add_relation(relation.kind, source, target,
+                                relation.source_multiplicity, relation.target_multiplicity, relation.label)
+    return merged
+
+
+def _plantuml_relation(relation):
+    if relation.kind == ASSOCIATION:
+        return (f'{relation.source} "{relation.source_multiplicity}" -- '
+                f'"{relation.target_multiplicity}" {relation.target} : {relation.label}')
+    if relation.kind == GENERALIZATION:
+        return f"{relation.source} <|-- {relation.target}"
+    if relation.kind == AGGREGATION:
+        return (f'{relation.source} "{relation.source_multiplicity}" o-- '
+                f'"{relation.target_multiplicity}" {relation.target}')
+    return f"{relation.source} *-- {relation.target}"
+
+
+def _mermaid_id(name):
+    """Mermaid identifiers only allow word characters."""
+    return re.sub(r"\W+", "_", name).strip("_") or "_"
+
+
+def _mermaid_relation(relation):
+    source, target = _mermaid_id(relation.source), _mermaid_id(relation.target)
+    if relation.kind == ASSOCIATION:
+        line = f'{source} "{relation.source_multiplicity}" -- "{relation.target_multiplicity}" {target}'
+        return f"{line} : {relation.label}" if relation.label else line
+    if relation.kind == GENERALIZATION:
+        return f"{source} <|-- {target}"
+    if relation.kind == AGGREGATION:
+        return f'{source} "{relation.source_multiplicity}" o-- "{relation.target_multiplicity}" {target}'
+    return f"{source} *-- {target}"
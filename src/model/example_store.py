@@ -0,0 +1,255 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+# Token budget for the few-shot examples of one extraction prompt (estimated at 4 characters per token)
+EXAMPLE_TOKEN_BUDGET = int(os.getenv("EXAMPLE_TOKEN_BUDGET", "600"))
+# Examples sent with each extraction
+EXAMPLES_PER_PROMPT = int(os.getenv("EXAMPLES_PER_PROMPT", "2"))
+# Successful extractions are only added to the store when learning is enabled. Learned examples are
+# sent with other users' prompts, so leave this off unless descriptions may be shared.
+LEARN_EXAMPLES = os.getenv("LEARN_EXAMPLES", "").lower() in ("1", "true", "yes")
+EXAMPLE_STORE_PATH = os.getenv("EXAMPLE_STORE_PATH", "data/extraction_examples.jsonl")
+EXAMPLE_STORE_MAX = int(os.getenv("EXAMPLE_STORE_MAX", "500"))
+# Descriptions longer than this are not stored: they would not fit the budget as examples
+EXAMPLE_MAX_CHARS = 2400
+# A new example this similar to a stored one adds nothing
+DUPLICATE_SIMILARITY = 0.9
+
+WORD = re.compile(r"[a-z][a-z0-9]+")
+
+# Worked examples that used to be hard-coded in the extraction prompt
+SEED_EXAMPLES = [
+    {
+        "description": (
+            "The manufacturer, CameraCorp, produces action cameras and supplies them to retailers. "
+            "Shipments are dispatched from the inventory and contain action cameras. "
+            "Customers like SarahAdventurer and ExtremeSportsClub receive shipments."
+        ),
+        "extraction": {
+            "attributes": [
+                {"entity": "Manufacturer", "property": "name"}
+            ],
+            "associations": [
+                {"source": "Inventory", "sourceMultiplicity": "1", "targetMultiplicity": "0..*", "target": "Shipment", "relationship": "dispatches"},
+                {"source": "Shipment", "sourceMultiplicity": "1", "targetMultiplicity": "1", "target": "DistributionCenter", "relationship": "sent from"},
+                {"source": "DistributionCenter", "sourceMultiplicity": "1", "targetMultiplicity": "0..*", "target": "Shipment", "relationship": "receives"},
+                {"source": "Shipment", "sourceMultiplicity": "1", "targetMultiplicity": "1..*", "target": "ActionCamera", "relationship": "contains"},
+                {"source": "Customer", "sourceMultiplicity": "1", "targetMultiplicity": "0..*", "target": "Shipment", "relationship": "receives"}
+            ],
+            "generalizations": [
+                {"superclass": "Customer", "subclass": "SarahAdventurer"},
+                {"superclass": "Customer", "subclass": "ExtremeSportsClub"}
+            ],
+            "aggregations": [
+                {"parent": "Inventory", "parentMultiplicity": "1", "child": "ActionCamera", "childMultiplicity": "*"}
+            ],
+            "compositions": []
+        }
+    },
+    {
+        "description": (
+            "The supplier, GadgetMarket, provides components to manufacturers. "
+            "Manufacturers assemble action cameras using these components."
+        ),
+        "extraction": {
+            "attributes": [
+                {"entity": "Supplier", "property": "name"}
+            ],
+            "associations": [
+                {"source": "Supplier", "sourceMultiplicity": "0..*", "targetMultiplicity": "0..*", "target": "Component", "relationship": "provides"},
+                {"source": "Component", "sourceMultiplicity": "0..*", "targetMultiplicity": "0..*", "target": "Manufacturer", "relationship": "supplied to"},
+                {"source": "Manufacturer", "sourceMultiplicity": "1", "targetMultiplicity": "0..*", "target": "ActionCamera", "relationship": "assembles"}
+            ],
+            "generalizations": [
+                {"superclass": "Supplier", "subclass": "GadgetMarket"}
+            ],
+            "aggregations": [
+                {"parent": "ActionCamera", "parentMultiplicity": "1", "child": "Component", "childMultiplicity": "*"}
+            ],
+            "compositions": []
+        }
+    },
+    {
+        "description": (
+            "In our action camera store, we specialize in cameras designed for adventurers and professionals seeking rugged and versatile solutions to capture their journeys. "
+            "The inclusion of different models like ActionCamPro and AdventureCamX caters to a comprehensive range of activities and environments. "
+            "These cameras come equipped with various high-quality components such as lenses, batteries, and mounts, which are critical to perform under extreme conditions.\n\n"
+            "Lenses are fundamental to our cameras; they handle different lighting and focus to deliver clear, high-quality images and videos. "
+            "Batteries are essential for ensuring that our cameras can operate for extended periods, especially in remote locations where charging facilities might be sparse. "
+            "Mounts, including ChestMounts and HelmetMounts, provide our customers with hands-free operation allowing them to concentrate on their activities while capturing moments seamlessly from different perspectives.\n\n"
+            "Each action camera model and component is uniquely identified by names, descriptions, and IDs, which are essential for inventory management and simplifying the customer experience. "
+            "Understanding these details helps in automating tasks such as stock check, categorization, and even recommendations based on the previous purchase history or customer preferences.\n\n"
+            "Including these entities in the model is crucial not only for operational efficiency but also for emphasizing the customizability and adaptability of our products to various user needs. "
+            "This detailed structuring ensures we can provide precise and quick services and product suggestions, enhancing overall customer satisfaction and streamlining their purchasing process."
+        ),
+        "extraction": {
+            "attributes": [
+                {"entity": "ActionCamera", "property": "name"},
+                {"entity": "ActionCamera", "property": "description"},
+                {"entity": "ActionCamera", "property": "ID"},
+                {"entity": "Component", "property": "name"},
+                {"entity": "Component", "property": "description"},
+                {"entity": "Component", "property": "ID"}
+            ],
+            "associations": [
+                {"source": "Lenses", "sourceMultiplicity": "1..*", "targetMultiplicity": "1", "target": "ActionCamera", "relationship": "equipped with"},
+                {"source": "Batteries", "sourceMultiplicity": "1..*", "targetMultiplicity": "1", "target": "ActionCamera", "relationship": "equipped with"},
+                {"source": "Mounts", "sourceMultiplicity": "1..*", "targetMultiplicity": "1", "target": "ActionCamera", "relationship": "equipped with"}
+            ],
+            "generalizations": [
+                {"superclass": "ActionCamera", "subclass": "ActionCamPro"},
+                {"superclass": "ActionCamera", "subclass": "AdventureCamX"},
+                {"superclass": "Mount", "subclass": "ChestMount"},
+                {"superclass": "Mount", "subclass": "HelmetMount"}
+            ],
+            "aggregations": [
+                {"parent": "ActionCamera", "parentMultiplicity": "1", "child": "Component", "childMultiplicity": "*"}
+            ],
+            "compositions": []
+        }
+    }
+]
+
+
+def estimate_tokens(text):
+    """Rough token count of a text (about four characters per token for English)."""
+    return len(text) // 4 + 1
+
+
+def compact_json(data):
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def _terms(text):
+    return Counter(WORD.findall(text.lower()))
+
+
+class ExampleStore:
+    """
+    Past extractions indexed by TF-IDF over their description text.
+
+    Seed examples are always present; learned ones are appended to a JSON-lines file so they
+    survive restarts. The index is small enough to rebuild in memory whenever it changes.
+    """
+
+    def __init__(self, path=EXAMPLE_STORE_PATH, seeds=SEED_EXAMPLES, max_examples=EXAMPLE_STORE_MAX):
+        self.path = path
+        self.max_examples = max_examples
+        self._lock = threading.Lock()
+        self._examples = [self._prepare(example) for example in seeds]
+        self._seed_count = len(self._examples)
+        self._load()
+        self._reindex()
+
+    @staticmethod
+    def _prepare(example):
+        """Precompute what selection needs: term counts and the compact prompt size."""
+        answer = compact_json(example["extraction"])
+        return {
+            "description": example["description"],
+            "extraction": example["extraction"],
+            "answer": answer,
+            "terms": _terms(example["description"]),
+            "tokens": estimate_tokens(example["description"]) + estimate_tokens(answer)
+        }
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                learned = [json.loads(line) for line in file if line.strip()]
+        except Exception as e:
+            print(f"Error loading extraction examples from {self.path}: {e}")
+            return
+        self._examples.extend(self._prepare(example) for example in learned[-self.max_examples:])
+
+    def _reindex(self):
+        """Recompute inverse document frequencies and the normalised vector of every example."""
+        document_frequency = Counter()
+        for example in self._examples:
+            document_frequency.update(example["terms"].keys())
+        count = len(self._examples)
+        self._idf = {term: math.log((1 + count) / (1 + frequency)) + 1 for term, frequency in document_frequency.items()}
+        for example in self._examples:
+            example["vector"] = self._vector(example["terms"])
+
+    def _vector(self, terms):
+        vector = {term: frequency * self._idf.get(term, 0.0) for term, frequency in terms.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        return {term: weight / norm for term, weight in vector.items() if weight}
+
+    @staticmethod
+    def _similarity(left, right):
+        if len(left) > len(right):
+            left, right = right, left
+        return sum(weight * right.get(term, 0.0) for term, weight in left.items())
+
+    def _ranked(self, text):
+        with self._lock:
+            query = self._vector(_terms(text))
+            examples = list(self._examples)
+        return sorted(((self._similarity(query, example["vector"]), example) for example in examples),
+                      key=lambda scored: scored[0], reverse=True)
+
+    def select(self, text, budget=EXAMPLE_TOKEN_BUDGET, count=EXAMPLES_PER_PROMPT):
+        """
+        Pick the examples most similar to a description that fit the token budget together.
+
+        Returns:
+            list: Up to count examples, each with "description" and "answer", in store order so
+            the same selection always produces the same prompt prefix.
+        """
+        selected, used = [], 0
+        for _, example in self._ranked(text):
+            if len(selected) >= count:
+                break
+            if used + example["tokens"] <= budget:
+                selected.append(example)
+                used += example["tokens"]
+        if not selected:
+            # Always show one example of the format, the smallest one
+            selected = [min(self._examples, key=lambda example: example["tokens"])]
+        order = {id(example): index for index, example in enumerate(self._examples)}
+        return sorted(selected, key=lambda example: order.get(id(example), 0))
+
+    def add(self, description, extraction):
+        """Store a successful extraction as an example, unless it is too long or a near duplicate."""
+        if len(description) > EXAMPLE_MAX_CHARS or not extraction.get("associations"):
+            return False
+        ranked = self._ranked(description)
+        if ranked and ranked[0][0] >= DUPLICATE_SIMILARITY:
+            return False
+        example = {"description": description, "extraction": extraction}
+        with self._lock:
+            self._examples.append(self._prepare(example))
+            learned = len(self._examples) - self._seed_count
+            if learned > self.max_examples:
+                del self._examples[self._seed_count]
+            self._reindex()
+            if self.path:
+                try:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    with open(self.path, "a", encoding="utf-8") as file:
+                        file.write(compact_json(example) + "\n")
+                except Exception as e:
+                    print(f"Error saving extraction example: {e}")
+        return True
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the process-wide example store, loading it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ExampleStore()
+    return _store
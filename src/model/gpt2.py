@@ -1,206 +1,69 @@
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
 import json
+import os
+import re
+from src.model.domain_model_ir import DomainModel, merge_models
+from src.model.metrics import stage, EXTRACTION_REPAIRS
+from src.model import json_repair, example_store, prompts
+from src.model import model_router
+from src.model.single_flight import SingleFlight, fingerprint
+
+# Descriptions longer than this many words are extracted in parallel chunks (0 disables chunking)
+EXTRACTION_CHUNK_WORDS = int(os.getenv("EXTRACTION_CHUNK_WORDS", "600"))
+EXTRACTION_MAX_WORKERS = int(os.getenv("EXTRACTION_MAX_WORKERS", "4"))
+
+# Follow-up requests for sections lost to a truncated or malformed response
+EXTRACTION_FOLLOW_UPS = int(os.getenv("EXTRACTION_FOLLOW_UPS", "1"))
+
+# Identical descriptions extracted concurrently share one upstream call
+_extraction_flight = SingleFlight("extraction")
 
 def setup():
+    from openai import OpenAI
     api_key = input("Enter your OpenAI API key: ")
     client = OpenAI(api_key=api_key)
     return client
 
-def prompt(scenario, client):
-    response = client.chat.completions.create(
-    model="gpt-4o",
-    messages=[
-        {
-        "role": "system",
-        "content": [
-            {
-            "type": "text",
-            "text": "You are an expert in extracting structured information from natural language text. \nGiven a text description, extract attributes, associations, generalizations, aggregations, and compositions.\n\n### Output Format:\n{\n  'attributes': [(Entity, Attribute)],\n  'associations': [(Entity1, Kard1, Kard2, Entity2, Relationship)],\n  'generalizations': [(Superclass, Subclass)],\n  'aggregations': [(Whole, Kard1, Part, Kard2)],\n  'compositions': [(Whole, Kard1, Part, Kard2)]\n}\n\n### Example 1:\n\n**Input Text:**\nThe manufacturer, CameraCorp, produces action cameras and supplies them to retailers. \nShipments are dispatched from the inventory and contain action cameras. \nCustomers like SarahAdventurer and ExtremeSportsClub receive shipments.\n\n**Expected Output:**\n{\n  'attributes': [('Manufacturer', 'name')],\n  'associations': [('Inventory', '1', '0..*', 'Shipment', 'dispatches'),\n                   ('Shipment', '1', '1', 'DistributionCenter', 'sent from'),\n                   ('DistributionCenter', '1', '0..*', 'Shipment', 'receives'),\n                   ('Shipment', '1', '1..*', 'ActionCamera', 'contains'),\n                   ('Customer', '1', '0..*', 'Shipment', 'receives')],\n  'generalizations': [('Customer', 'SarahAdventurer'),\n                      ('Customer', 'ExtremeSportsClub')],\n  'aggregations': [('Inventory', '1', 'ActionCamera', '*')],\n  'compositions': []\n}\n\n### Example 2:\n\n**Input Text:**\nThe supplier, GadgetMarket, provides components to manufacturers. \nManufacturers assemble action cameras using these components.\n\n**Expected Output:**\n{\n  'attributes': [('Supplier', 'name')],\n  'associations': [('Supplier', '0..*', '0..*', 'Component', 'provides'),\n                   ('Component', '0..*', '0..*', 'Manufacturer', 'supplied to'),\n                   ('Manufacturer', '1', '0..*', 'ActionCamera', 'assembles')],\n  'generalizations': [('Supplier', 'GadgetMarket')],\n  'aggregations': [('ActionCamera', '1', 'Component', '*')],\n  'compositions': []\n}\n\n\n"
-            }
-        ]
-        },
-        {
-        "role": "user",
-        "content": [
-            {
-            "type": "text",
-            "text": "In our action camera store, we specialize in cameras designed for adventurers and professionals seeking rugged and versatile solutions to capture their journeys. The inclusion of different models like ActionCamPro and AdventureCamX caters to a comprehensive range of activities and environments. These cameras come equipped with various high-quality components such as lenses, batteries, and mounts, which are critical to perform under extreme conditions.\r\n\r\nLenses are fundamental to our cameras; they handle different lighting and focus to deliver clear, high-quality images and videos. Batteries are essential for ensuring that our cameras can operate for extended periods, especially in remote locations where charging facilities might be sparse. Mounts, including ChestMounts and HelmetMounts, provide our customers with hands-free operation allowing them to concentrate on their activities while capturing moments seamlessly from different perspectives.\r\n\r\nEach action camera model and component is uniquely identified by names, descriptions, and IDs, which are essential for inventory management and simplifying the customer experience. Understanding these details helps in automating tasks such as stock check, categorization, and even recommendations based on the previous purchase history or customer preferences.\r\n\r\nIncluding these entities in the model is crucial not only for operational efficiency but also for emphasizing the customizability and adaptability of our products to various user needs. This detailed structuring ensures we can provide precise and quick services and product suggestions, enhancing overall customer satisfaction and streamlining their purchasing process."
-            }
-        ]
-        },
-        {
-        "role": "assistant",
-        "content": [
-            {
-            "type": "text",
-            "text": "{\n  \"attributes\": [\n    {\n      \"entity\": \"ActionCamera\",\n      \"property\": \"name\"\n    },\n    {\n      \"entity\": \"ActionCamera\",\n      \"property\": \"description\"\n    },\n    {\n      \"entity\": \"ActionCamera\",\n      \"property\": \"ID\"\n    },\n    {\n      \"entity\": \"Component\",\n      \"property\": \"name\"\n    },\n    {\n      \"entity\": \"Component\",\n      \"property\": \"description\"\n    },\n    {\n      \"entity\": \"Component\",\n      \"property\": \"ID\"\n    }\n  ],\n  \"associations\": [\n    {\n      \"source\": \"Lenses\",\n      \"sourceMultiplicity\": \"1..*\",\n      \"targetMultiplicity\": \"1\",\n      \"target\": \"ActionCamera\",\n      \"relationship\": \"equipped with\"\n    },\n    {\n      \"source\": \"Batteries\",\n      \"sourceMultiplicity\": \"1..*\",\n      \"targetMultiplicity\": \"1\",\n      \"target\": \"ActionCamera\",\n      \"relationship\": \"equipped with\"\n    },\n    {\n      \"source\": \"Mounts\",\n      \"sourceMultiplicity\": \"1..*\",\n      \"targetMultiplicity\": \"1\",\n      \"target\": \"ActionCamera\",\n      \"relationship\": \"equipped with\"\n    }\n  ],\n  \"generalizations\": [\n    {\n      \"superclass\": \"ActionCamera\",\n      \"subclass\": \"ActionCamPro\"\n    },\n    {\n      \"superclass\": \"ActionCamera\",\n      \"subclass\": \"AdventureCamX\"\n    },\n    {\n      \"superclass\": \"Mount\",\n      \"subclass\": \"ChestMount\"\n    },\n    {\n      \"superclass\": \"Mount\",\n      \"subclass\": \"HelmetMount\"\n    }\n  ],\n  \"aggregations\": [\n    {\n      \"parent\": \"ActionCamera\",\n      \"parentMultiplicity\": \"1\",\n      \"child\": \"Component\",\n      \"childMultiplicity\": \"*\"\n    }\n  ],\n  \"compositions\": []\n}"
-            }
-        ]
-        },
-        {
-        "role": "user",
-        "content": [
-            {
-            "type": "text",
-            "text": scenario}
-        ]
-        }
-    ],
-    response_format={
-        "type": "json_schema",
-        "json_schema": {
-        "name": "camera_store_schema",
-        "strict": True,
-        "schema": {
-            "type": "object",
-            "properties": {
-            "attributes": {
-                "type": "array",
-                "description": "List of attributes for the entities.",
-                "items": {
-                "type": "object",
-                "properties": {
-                    "entity": {
-                    "type": "string",
-                    "description": "The name of the entity."
-                    },
-                    "property": {
-                    "type": "string",
-                    "description": "The property of the entity."
-                    }
-                },
-                "required": [
-                    "entity",
-                    "property"
-                ],
-                "additionalProperties": False
-                }
-            },
-            "associations": {
-                "type": "array",
-                "description": "List of associations between entities.",
-                "items": {
-                "type": "object",
-                "properties": {
-                    "source": {
-                    "type": "string",
-                    "description": "Source entity."
-                    },
-                    "sourceMultiplicity": {
-                    "type": "string",
-                    "description": "Multiplicity for the source entity."
-                    },
-                    "targetMultiplicity": {
-                    "type": "string",
-                    "description": "Multiplicity for the target entity."
-                    },
-                    "target": {
-                    "type": "string",
-                    "description": "Target entity."
-                    },
-                    "relationship": {
-                    "type": "string",
-                    "description": "Relationship type."
-                    }
-                },
-                "required": [
-                    "source",
-                    "sourceMultiplicity",
-                    "targetMultiplicity",
-                    "target",
-                    "relationship"
-                ],
-                "additionalProperties": False
-                }
-            },
-            "generalizations": {
-                "type": "array",
-                "description": "List of generalizations of entities.",
-                "items": {
-                "type": "object",
-                "properties": {
-                    "superclass": {
-                    "type": "string",
-                    "description": "Superclass entity."
-                    },
-                    "subclass": {
-                    "type": "string",
-                    "description": "Subclass entity."
-                    }
-                },
-                "required": [
-                    "superclass",
-                    "subclass"
-                ],
-                "additionalProperties": False
-                }
-            },
-            "aggregations": {
-                "type": "array",
-                "description": "List of aggregations of entities.",
-                "items": {
-                "type": "object",
-                "properties": {
-                    "parent": {
-                    "type": "string",
-                    "description": "Parent entity."
-                    },
-                    "parentMultiplicity": {
-                    "type": "string",
-                    "description": "Multiplicity for the parent entity."
-                    },
-                    "child": {
-                    "type": "string",
-                    "description": "Child entity."
-                    },
-                    "childMultiplicity": {
-                    "type": "string",
-                    "description": "Multiplicity for the child entity."
-                    }
-                },
-                "required": [
-                    "parent",
-                    "parentMultiplicity",
-                    "child",
-                    "childMultiplicity"
-                ],
-                "additionalProperties": False
-                }
-            },
-            "compositions": {
-                "type": "array",
-                "description": "List of compositions of entities.",
-                "items": {
-                "type": "object",
-                "properties": {
-                    "parent": {
-                    "type": "string",
-                    "description": "Parent entity."
-                    },
-                    "child": {
-                    "type": "string",
-                    "description": "Child entity."
-                    }
-                },
-                "required": [
-                    "parent",
-                    "child"
-                ],
-                "additionalProperties": False
-                }
-            }
-            },
-            "required": [
-            "attributes",
-            "associations",
-            "generalizations",
-            "aggregations",
-            "compositions"
-            ],
-            "additionalProperties": False
-        }
-        }
-    },
+def example_messages(scenario):
+    """Few-shot turns with the stored extractions most similar to the scenario, within the token budget."""
+    messages = []
+    for example in example_store.get_store().select(scenario):
+        messages.append(prompts.user_message(example["description"]))
+        messages.append(prompts.assistant_message(example["answer"]))
+    return messages
+
+def extraction_messages(scenario, follow_up=()):
+    """
+    The messages of an extraction request: the static prefix (instructions, schema and a worked
+    example) first, then the examples selected for the scenario, the scenario and any follow-up.
+    """
+    return [*prompts.EXTRACTION_PREFIX, *example_messages(scenario), prompts.user_message(scenario), *follow_up]
+
+def prompt(scenario, client, sections=None, known=None, previous=None):
+    """
+    Ask the model for the extraction of a scenario.
+
+    Args:
+        scenario (str): The domain model description.
+        client: The OpenAI client.
+        sections (list): Only extract these sections (see prompts.EXTRACTION_SECTIONS); all when None.
+        known (dict): Items of those sections that were already recovered and must not be repeated.
+        previous (str): The incomplete answer being followed up, sent back as the assistant turn.
+    """
+    follow_up = []
+    if sections:
+        follow_up = [prompts.user_message(
+            f"Your previous answer was cut off or malformed. Extract only these sections: {', '.join(sections)}. "
+            f"These items were already extracted; do not repeat them:\n{json.dumps(known or {})}"
+        )]
+        if previous:
+            follow_up.insert(0, prompts.assistant_message(previous))
+    response = model_router.complete(
+    client,
+    model_router.EXTRACTION,
+    len(scenario),
+    messages=extraction_messages(scenario, follow_up),
+    response_format=prompts.response_format_for(tuple(sections) if sections else None),
     temperature=1,
     max_completion_tokens=2048,
     top_p=1,
@@ -215,55 +78,67 @@ def process_response(response):
     data = json.loads(_response)
     return data
 
+def salvage_response(response):
+    """
+    Parse an extraction response, recovering what it can when the JSON is truncated or malformed.
+
+    Returns:
+        tuple: (data, missing) where data holds every complete, well-formed element and missing
+        lists the sections that were cut off or absent.
+    """
+    result = json_repair.salvage(response.choices[0].message.content)
+    raw = result.data if isinstance(result.data, dict) else {}
+    data, missing = {}, []
+    for section in prompts.EXTRACTION_SECTIONS:
+        required = prompts.EXTRACTION_RESPONSE_FORMAT["json_schema"]["schema"]["properties"][section]["items"]["required"]
+        items = raw.get(section)
+        items = items if isinstance(items, list) else []
+        data[section] = [item for item in items
+                         if isinstance(item, dict) and all(isinstance(item.get(key), str) for key in required)]
+        if section not in result.closed_keys or len(data[section]) < len(items):
+            missing.append(section)
+    return data, missing
+
+def extract_response(scenario, client):
+    """
+    Prompt for the extraction of a scenario, repairing a broken response locally.
+
+    When the response is truncated or malformed, the complete elements are kept and a
+    follow-up request asks only for the missing sections, instead of repeating the whole
+    extraction.
+
+    Returns:
+        tuple: (last raw response, extraction dict)
+    """
+    response = prompt(scenario, client)
+    data, missing = salvage_response(response)
+    if not missing:
+        if example_store.LEARN_EXAMPLES:
+            example_store.get_store().add(scenario, data)
+        return response, data
+    EXTRACTION_REPAIRS.inc(outcome="salvaged")
+    print(f"Extraction response was incomplete; recovered {sum(len(items) for items in data.values())} elements, "
+          f"missing: {', '.join(missing)}")
+
+    for _ in range(EXTRACTION_FOLLOW_UPS):
+        known = {section: data[section] for section in missing if data[section]}
+        response = prompt(scenario, client, sections=missing, known=known,
+                          previous=response.choices[0].message.content)
+        extra, still_missing = salvage_response(response)
+        for section in missing:
+            data[section].extend(item for item in extra[section] if item not in data[section])
+        missing = [section for section in missing if section in still_missing]
+        EXTRACTION_REPAIRS.inc(outcome="follow_up")
+        if not missing:
+            break
+    if missing:
+        EXTRACTION_REPAIRS.inc(outcome="partial")
+        print(f"Using partial extraction; still missing: {', '.join(missing)}")
+    return response, data
+
 def convert_to_plantuml(data, response):
     try:
-        uml_lines = ["@startuml", "left to right direction"]
-
-        # Process Associations (Relationships)
-        for assoc in data.get("associations", []):
-            source = assoc["source"]
-            target = assoc["target"]
-            source_multiplicity = assoc["sourceMultiplicity"]
-            target_multiplicity = assoc["targetMultiplicity"]
-            relationship = assoc["relationship"]
-            uml_lines.append(f'{source} "{source_multiplicity}" -- "{target_multiplicity}" {target} : {relationship}')
-
-        # Process Generalizations (Inheritance)
-        for gen in data.get("generalizations", []):
-            superclass = gen["superclass"]
-            subclass = gen["subclass"]
-            uml_lines.append(f"{superclass} <|-- {subclass}")
-
-        # Process Aggregations (Whole-Part)
-        for agg in data.get("aggregations", []):
-            parent = agg["parent"]
-            child = agg["child"]
-            parent_multiplicity = agg["parentMultiplicity"]
-            child_multiplicity = agg["childMultiplicity"]
-            uml_lines.append(f'{parent} "{parent_multiplicity}" o-- "{child_multiplicity}" {child}')
-
-        # Process Compositions (Whole-Part, Strong Ownership)
-        for comp in data.get("compositions", []):
-            parent = comp["parent"]
-            child = comp["child"]
-            uml_lines.append(f'{parent} *-- {child}')
-
-        # Process Attributes (Class Properties)
-        attribute_dict = {}
-        for attr in data.get("attributes", []):
-            entity = attr["entity"]
-            property_name = attr["property"]
-            if entity not in attribute_dict:
-                attribute_dict[entity] = []
-            attribute_dict[entity].append(property_name)
-
-        # Correctly format attributes under their respective entities
-        for entity, attributes in attribute_dict.items():
-            uml_lines.append("\n".join(f"{entity} : {attr}" for attr in attributes))
-
-        uml_lines.append("@enduml")
-
-        return "\n".join(uml_lines)
+        return DomainModel.from_extraction(data).to_plantuml()
     except Exception as e:
         print(f"Error in converting to PlantUML: {e}")
         print(data)
@@ -369,9 +244,133 @@ def post_process(text):
                 
     return "\n".join(processed_lines)
 
+def normalize_extraction(data):
+    """
+    Apply the post_process naming rules to a structured extraction, so views rendered from it
+    (SVG, diagram partitions) show the same names as the post-processed PlantUML.
+
+    Args:
+        data (dict): The extraction produced by gpt2.process_response.
+
+    Returns:
+        dict: A copy with merged entity names and attributes simplified to their first word.
+    """
+    def attribute(name):
+        words = name.strip().split()
+        if not words:
+            return ""
+        return "EMail" if words[0] == "e-mail" else words[0]
+
+    renames = {
+        "attributes": ("entity",), "associations": ("source", "target"), "generalizations": ("superclass", "subclass"),
+        "aggregations": ("parent", "child"), "compositions": ("parent", "child")
+    }
+    normalized = {}
+    for section, items in data.items():
+        if section not in renames or not isinstance(items, list):
+            normalized[section] = items
+            continue
+        normalized[section] = []
+        for item in items:
+            item = dict(item)
+            for key in renames[section]:
+                if isinstance(item.get(key), str):
+                    item[key] = merge_tokens(item[key])
+            if section == "attributes" and isinstance(item.get("property"), str):
+                item["property"] = attribute(item["property"])
+            normalized[section].append(item)
+    return normalized
+
+def split_description(text, max_words=EXTRACTION_CHUNK_WORDS):
+    """
+    Split a long description into chunks of roughly max_words words.
+
+    Paragraphs are packed together while they fit; paragraphs that are too long on their own
+    are split between sentences, so every sentence (and the relationships it states) stays
+    within one chunk.
+
+    Args:
+        text (str): The domain model description.
+        max_words (int): Word budget per chunk.
+
+    Returns:
+        list: The chunks, in order.
+    """
+    units = []
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        if len(paragraph.split()) <= max_words:
+            units.append(paragraph.strip())
+        else:
+            units.extend(sentence.strip() for sentence in re.split(r"(?<=[.!?])\s+", paragraph) if sentence.strip())
+
+    chunks, current, current_words = [], [], 0
+    for unit in units:
+        words = len(unit.split())
+        if current and current_words + words > max_words:
+            chunks.append("\n\n".join(current))
+            current, current_words = [], 0
+        current.append(unit)
+        current_words += words
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+def extract_chunked(scenario, client, max_words=EXTRACTION_CHUNK_WORDS):
+    """
+    Extract a long description chunk by chunk in parallel and merge the results.
+
+    The first sentence (which usually lists the entities) is repeated as context in every
+    later chunk so entity names stay consistent; the merge reconciles names and drops
+    duplicate relations.
+
+    Returns:
+        tuple: (merged extraction dict, list of raw responses)
+    """
+    chunks = split_description(scenario, max_words)
+    first_sentence = re.split(r"(?<=[.!?])\s+", scenario.strip(), maxsplit=1)[0]
+    requests = [chunks[0]] + [f"{first_sentence}\n\n{chunk}" for chunk in chunks[1:]]
+
+    def extract(chunk):
+        return extract_response(chunk, client)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(EXTRACTION_MAX_WORKERS, len(requests)))) as executor:
+        futures = [executor.submit(extract, chunk) for chunk in requests]
+
+    models, responses, last_error = [], [], None
+    for index, future in enumerate(futures):
+        try:
+            response, data = future.result()
+            responses.append(response)
+            models.append(DomainModel.from_extraction(data))
+        except Exception as e:
+            print(f"Error extracting chunk {index + 1} of {len(futures)}: {e}")
+            last_error = e
+    if not models:
+        raise last_error
+    return merge_models(models).to_extraction(), responses
+
+def gpt_v2_extract(scenario, client):
+    """
+    Extract the structured domain model of a scenario together with its PlantUML.
+
+    Concurrent calls for the same description share one extraction.
+
+    Returns:
+        tuple: (structured extraction from process_response, post-processed PlantUML text)
+    """
+    return _extraction_flight.do(fingerprint("extraction", prompts.PROMPT_VERSIONS["extraction"], scenario), lambda: _extract(scenario, client))
+
+def _extract(scenario, client):
+    with stage("uml_extraction"):
+        if EXTRACTION_CHUNK_WORDS and len(scenario.split()) > EXTRACTION_CHUNK_WORDS:
+            data, response = extract_chunked(scenario, client)
+        else:
+            response, data = extract_response(scenario, client)
+    with stage("post_processing"):
+        plant_uml = convert_to_plantuml(data, response)
+        plant_uml = post_process(plant_uml)
+    return data, plant_uml
+
 def gpt_v2_interface(scenario, client):
-    response = prompt(scenario, client)
-    data = process_response(response)
-    plant_uml = convert_to_plantuml(data, response)
-    plant_uml = post_process(plant_uml)
+    _, plant_uml = gpt_v2_extract(scenario, client)
     return plant_uml
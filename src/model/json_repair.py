@@ -0,0 +1,210 @@
+import json
+
+_CLOSERS = {"{": "}", "[": "]"}
+_LITERALS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+
+
+class _EndOfInput(Exception):
+    """The text ended inside a value."""
+
+
+class SalvageResult:
+    """
+    Outcome of parsing possibly truncated or malformed JSON.
+
+    Attributes:
+        data: The recovered value. Containers cut off by the end of the text keep only their
+            complete elements.
+        complete (bool): True when the text parsed without any repair.
+        closed_keys (set): Top-level keys whose value was read to its end.
+    """
+
+    def __init__(self, data, complete, closed_keys):
+        self.data = data
+        self.complete = complete
+        self.closed_keys = closed_keys
+
+
+class _Parser:
+    """Lenient recursive-descent JSON parser that stops cleanly at the end of the text."""
+
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+        self.repaired = False
+        self.closed_keys = set()
+
+    def peek(self):
+        self.skip_whitespace()
+        if self.pos >= len(self.text):
+            raise _EndOfInput()
+        return self.text[self.pos]
+
+    def skip_whitespace(self):
+        while self.pos < len(self.text) and self.text[self.pos] in " \t\r\n":
+            self.pos += 1
+
+    def parse_value(self, top_level=False):
+        """Return (value, closed): closed is False when the text ended inside the value."""
+        char = self.peek()
+        if char == "{":
+            return self.parse_object(top_level)
+        if char == "[":
+            return self.parse_array()
+        if char in "\"'":
+            return self.parse_string(), True
+        return self.parse_literal(), True
+
+    def parse_object(self, top_level=False):
+        self.pos += 1
+        result = {}
+        while True:
+            try:
+                char = self.peek()
+                if char == "}":
+                    self.pos += 1
+                    return result, True
+                if char == ",":
+                    # Leading, doubled or trailing comma
+                    self.pos += 1
+                    self.repaired = self.repaired or self.peek() == "}"
+                    continue
+                key = self.parse_string() if char in "\"'" else self.parse_bare_key()
+                if self.peek() != ":":
+                    self.repaired = True
+                    continue
+                self.pos += 1
+                value, closed = self.parse_value()
+            except _EndOfInput:
+                return result, False
+            if closed:
+                result[key] = value
+                if top_level:
+                    self.closed_keys.add(key)
+            elif top_level and isinstance(value, (list, dict)):
+                # Keep the complete elements of a section that was cut off
+                result[key] = value
+            if not closed:
+                return result, False
+
+    def parse_array(self):
+        self.pos += 1
+        result = []
+        while True:
+            try:
+                char = self.peek()
+                if char == "]":
+                    self.pos += 1
+                    return result, True
+                if char == ",":
+                    self.pos += 1
+                    continue
+                if char in "}":
+                    # Mismatched closer: treat it as the end of the array
+                    self.repaired = True
+                    return result, True
+                value, closed = self.parse_value()
+            except _EndOfInput:
+                return result, False
+            if not closed:
+                return result, False
+            result.append(value)
+
+    def parse_string(self):
+        quote = self.text[self.pos]
+        if quote == "'":
+            self.repaired = True
+        self.pos += 1
+        chars = []
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if char == "\\":
+                if self.pos + 1 >= len(self.text):
+                    break
+                escape = self.text[self.pos + 1]
+                if escape == "u" and self.pos + 6 <= len(self.text):
+                    try:
+                        chars.append(chr(int(self.text[self.pos + 2:self.pos + 6], 16)))
+                        self.pos += 6
+                    except ValueError:
+                        # Malformed escape: keep it as literal text
+                        self.repaired = True
+                        chars.append("\\u")
+                        self.pos += 2
+                    continue
+                chars.append({"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}.get(escape, escape))
+                self.pos += 2
+                continue
+            self.pos += 1
+            if char == quote:
+                return "".join(chars)
+            chars.append(char)
+        raise _EndOfInput()
+
+    def parse_bare_key(self):
+        self.repaired = True
+        start = self.pos
+        while self.pos < len(self.text) and self.text[self.pos] not in ":,{}[] \t\r\n":
+            self.pos += 1
+        if self.pos >= len(self.text):
+            raise _EndOfInput()
+        if self.pos == start:
+            # Stray character: skip it
+            self.pos += 1
+        return self.text[start:self.pos]
+
+    def parse_literal(self):
+        start = self.pos
+        while self.pos < len(self.text) and self.text[self.pos] not in ",}] \t\r\n":
+            self.pos += 1
+        if self.pos >= len(self.text):
+            # A number or keyword at the very end may itself be cut off
+            raise _EndOfInput()
+        token = self.text[start:self.pos]
+        if token in _LITERALS:
+            return _LITERALS[token]
+        try:
+            return json.loads(token)
+        except ValueError:
+            self.repaired = True
+            return token
+
+
+def strip_fences(text):
+    """Drop Markdown code fences and any prose before the first brace or bracket."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    return text[min(starts):] if starts else text
+
+
+def salvage(text):
+    """
+    Parse JSON that may be truncated or slightly malformed.
+
+    Recovers every complete element: strings, numbers and containers that were closed before
+    the text ended. Tolerates code fences, single quotes, bare keys and missing or trailing
+    commas.
+
+    Args:
+        text (str): The raw model output.
+
+    Returns:
+        SalvageResult: The recovered data (None when nothing could be recovered).
+    """
+    text = text or ""
+    try:
+        data = json.loads(text)
+        return SalvageResult(data, True, set(data) if isinstance(data, dict) else set())
+    except ValueError:
+        pass
+
+    parser = _Parser(strip_fences(text))
+    try:
+        data, _ = parser.parse_value(top_level=True)
+    except _EndOfInput:
+        data = None
+    return SalvageResult(data, False, parser.closed_keys)
@@ -1,11 +1,18 @@
 from src.model.openai_client import OpenAIClient
 from src.model.chat_history import ChatHistory
 from src.model.domain_model_description import DomainModelDescription
-import os
 import json
+from src.model.metrics import stage, DMD_EDITS
+from src.model import dmd_edits, model_router, prompts
+from src.model.single_flight import SingleFlight, fingerprint
 
 class LLMService:
     """Service for language model operations."""
+
+    # Shared by all instances so identical concurrent calls from different requests coalesce
+    _classification_flight = SingleFlight("classification")
+    _description_flight = SingleFlight("dmd_generation")
+    _edit_flight = SingleFlight("dmd_edit")
     
     def __init__(self):
         """Initialize the LLM service with chat history and domain model description objects."""
@@ -18,105 +25,22 @@ class LLMService:
         Determine if the input has enough information for domain model description or if it's an update to an existing one.
         Also detects style change requests and irrelevant/casual messages.
         """
-        
-        try:
-            functions = [
-                {
-                    "name": "get_decision",
-                    "description": "Returns a decision about domain model generation and appropriate response",
-                    "parameters": {
-                        "type": "object",
-                        "required": ["decision", "is_update", "is_casual_comment", "is_style_change", "suggestions"],
-                        "properties": {
-                            "decision": {
-                                "type": "boolean",
-                                "description": "True if there's enough information for a domain model, False otherwise"
-                            },
-                            "is_update": {
-                                "type": "boolean", 
-                                "description": "True if this is an update to an existing domain model rather than a first request"
-                            },
-                            "is_casual_comment": {
-                                "type": "boolean",
-                                "description": "True if this is just a casual comment (like 'wow', 'nice') that doesn't require updating the domain model"
-                            },
-                            "is_style_change": {
-                                "type": "boolean",
-                                "description": "True if the user is requesting to change the style/formatting of the description without changing the domain content"
-                            },
-                            "style_type": {
-                                "type": "string",
-                                "description": "If is_style_change is true, specifies the requested style (e.g., 'shorter', 'technical', 'software_engineer')"
-                            },
-                            "suggestions": {
-                                "type": "array",
-                                "items": {
-                                    "type": "string",
-                                    "description": "A suggestion or response line"
-                                },
-                                "description": "Array of strings that form the complete response to show the user"
-                            }
-                        }
-                    }
-                }
-            ]
-
-            system_prompt = """You are an expert domain modeling engineer specialized in UML and domain-driven design.
-
-YOUR TASK: Analyze chat history to determine if a domain model can be generated, updated, if the message is a style change request, or if it's unrelated to domain modeling.
-
-MESSAGE CLASSIFICATION:
-1. INITIAL DOMAIN MODEL REQUEST: When user first describes multiple entities (3+) and relationships (2+) in their domain.
-   - Example: "I want to open a store with products, customers, and employees. Customers buy products and employees sell them."
-
-2. DOMAIN MODEL UPDATE: When user adds new entities or relationships to an existing model.
-   - Example: "Now I also want to add suppliers who provide products to the store."
-   - Look for phrases like "add", "also", "now include", "additionally"
-
-3. STYLE CHANGE REQUEST: User wants to change how the description is written, not the content.
-   - Examples: "make the description shorter", "can you write it from a software engineer's perspective", "simplify the description"
-   - For these, identify the specific style requested (shorter, technical, software_engineer, etc.)
-
-4. CASUAL COMMENT: Brief reactions that don't add domain information.
-   - Examples: "wow", "nice", "thank you", "looks good", "great", "awesome", "perfect"
-   - IMPORTANT: If a domain model exists and user sends ONLY praise/acknowledgment, classify as CASUAL
-
-5. QUESTION/CLARIFICATION: User asks about the domain model without adding new information.
-   - Example: "What does this relationship mean?" or "Can you explain this part?"
-
-6. OFF-TOPIC: Message unrelated to domain modeling.
-   - Example: "What's the weather today?"
-
-HOW TO DETERMINE IF A DOMAIN MODEL EXISTS:
-- Look for previous bot messages containing detailed entity descriptions
-- Look for phrases like "Here's the domain model" or "I've updated the domain model"
-
-RESPONSE GUIDELINES:
-- For STYLE CHANGE REQUESTS: Acknowledge the style change request.
-  "I've reformatted the domain model description as requested."
-  "I've made the description more technical as requested."
-
-- For CASUAL COMMENTS: Acknowledge without regenerating model. Use varied responses like:
-  "Glad you like it! Let me know if you want to add more entities or relationships."
-  "Thanks! I'm here if you need to make any changes to the model."
-
-- For DOMAIN MODEL UPDATES: Acknowledge changes and provide extension suggestions.
-  
-- For INITIAL REQUESTS: Neutral response with helpful suggestions.
-
-IMPORTANT: Response should be in bullet points(3 max).
-"""
-        
-            messages = [
-                {"role": "system", "content": [{"type": "text", "text": system_prompt}]},
-                {"role": "user", "content": [{"type": "text", "text": chat_history_text}]}
-            ]
+        with stage("classification"):
+            return self._classification_flight.do(
+                fingerprint("classification", prompts.PROMPT_VERSIONS["classification"], chat_history_text),
+                lambda: self._determine_input_type(chat_history_text)
+            )
 
-            response = self.client.chat.completions.create(
-                model=os.getenv("GPT_MODEL"),
-                messages=messages,
-                functions=functions,
-                function_call={"name": "get_decision"}
+    def _determine_input_type(self, chat_history_text):
+        try:
+            # Static prefix (functions and system prompt) first, the conversation last
+            response = model_router.complete(
+                self.client,
+                model_router.CLASSIFICATION,
+                len(chat_history_text),
+                messages=[*prompts.CLASSIFICATION_PREFIX, prompts.user_message(chat_history_text)],
+                functions=prompts.CLASSIFICATION_FUNCTIONS,
+                function_call=prompts.CLASSIFICATION_FUNCTION_CALL
             )
             
             function_call = response.choices[0].message.function_call
@@ -165,31 +89,95 @@ IMPORTANT: Response should be in bullet points(3 max).
                 "suggestions": ["I encountered an issue while analyzing your input. Could you try describing your domain again with key entities and relationships?"]
             }
 
-    def generate_domain_model_description(self, chat_history_text):
-        """Generate a structured domain model description from the given chat history."""
+    def generate_domain_model_description(self, chat_history_text, classification=None):
+        """
+        Generate a structured domain model description from the given chat history.
+        The classification result of the turn, when given, steers which model is used.
+        """
+        generated_domain_model_description = self._shared_domain_model_description(chat_history_text, classification)
+        self.current_domain_model_description.set_text(generated_domain_model_description)
+        return generated_domain_model_description
+
+    def _shared_domain_model_description(self, chat_history_text, classification):
+        """Generate a description through the single-flight layer, without changing the service state."""
+        # Only the parts of the classification that affect routing belong in the fingerprint
+        route_hint = {key: (classification or {}).get(key, False) for key in ("is_update", "is_style_change")}
+        with stage("dmd_generation"):
+            try:
+                return self._description_flight.do(
+                    fingerprint("dmd_generation", prompts.PROMPT_VERSIONS["dmd_generation"], chat_history_text, route_hint),
+                    lambda: self._generate_domain_model_description(chat_history_text, classification)
+                )
+            except Exception as e:
+                print(f"Error generating domain model description: {e}")
+                return "An error occurred while generating the domain model description."
+
+    def _generate_domain_model_description(self, chat_history_text, classification):
+        """Make the description generation call; errors propagate to the single-flight caller."""
+        messages = [
+            *prompts.DMD_PREFIX,
+            prompts.user_message(f"Generate a domain model description for the following conversation: \n\n{chat_history_text}")
+        ]
+
+        response = model_router.complete(
+            self.client, model_router.DMD_GENERATION, len(chat_history_text), classification, messages=messages
+        )
+        generated_domain_model_description = response.choices[0].message.content.strip()
+        return generated_domain_model_description
+
+    def update_domain_model_description(self, chat_history_text, classification, current_description, user_message):
+        """
+        Produce the description for a modelling turn, editing the current one when possible.
+
+        For updates to an existing description the model is given only that description and the
+        latest message and returns sentence edits, which are applied and validated here. Anything
+        else, or edits that fail validation, falls back to full regeneration. The current description
+        is left unchanged; the caller sets it once the result is used, since a description finished
+        after the turn's deadline is stored on the saved version instead.
+
+        Returns:
+            tuple: (description, changes) where changes lists the inserted, replaced and deleted
+            sentences, or is None when the description was regenerated in full.
+        """
+        document = dmd_edits.SentenceDocument(current_description)
+        classification = classification or {}
+        if (dmd_edits.DMD_EDIT_UPDATES and classification.get("is_update") and not classification.get("is_style_change")
+                and len(document) >= dmd_edits.DMD_EDIT_MIN_SENTENCES):
+            with stage("dmd_generation"):
+                try:
+                    description, changes = self._edit_flight.do(
+                        fingerprint("dmd_edit", prompts.PROMPT_VERSIONS["dmd_edit"], current_description, user_message),
+                        lambda: self._edit_domain_model_description(document, user_message)
+                    )
+                    DMD_EDITS.inc(outcome="applied")
+                    return description, changes
+                except dmd_edits.DmdEditError as e:
+                    DMD_EDITS.inc(outcome="invalid")
+                    print(f"Rejected domain model description edits, regenerating: {e}")
+                except Exception as e:
+                    DMD_EDITS.inc(outcome="error")
+                    print(f"Error editing domain model description, regenerating: {e}")
+        return self._shared_domain_model_description(chat_history_text, classification), None
+
+    def _edit_domain_model_description(self, document, user_message):
+        """Ask for sentence edits and apply them; invalid edits raise DmdEditError."""
+        numbered = document.numbered()
+        response = model_router.complete(
+            self.client,
+            model_router.DMD_EDIT,
+            len(numbered) + len(user_message),
+            messages=[
+                *prompts.DMD_EDIT_PREFIX,
+                prompts.user_message(f"Current domain model description:\n{numbered}\n\nLatest user message:\n{user_message}")
+            ],
+            response_format=prompts.DMD_EDIT_RESPONSE_FORMAT
+        )
         try:
-            prompts = [
-                {
-                    "role": "system",
-                    "content": [{"type": "text", "text": 
-                        "You are a domain modeling expert. Your task is to generate a structured, precise description of a domain model in clear, natural language."
-                        "\n\nExample format: 'The following domain model describes the entities Salesperson, RepairPerson, Customer, and Bike. Salesperson, RepairPerson, and Customer are connected to the entity Bike through associations. The Salesperson is associated with the Bike entity with the description 'sells' and 1 Salesperson can sell many Bikes. The RepairPerson is associated with the Bike entity with the description 'repairs' and 1 RepairPerson can repair many Bikes. The Customer is associated with the Bike entity with the description 'buys' and 1 Customer can buy many Bikes."
-                        "IMPORTANT: Only describe entities and relationships explicitly mentioned by the user. Do not add any additional entities, relationships, or functionalities that were not explicitly stated. Stick strictly to what the user has described. Focus on clarifying the existing entities and relationships without elaboration beyond the user's input."
-                    }]
-                },
-                {"role": "user", "content": [{"type": "text", "text": f"Generate a domain model description for the following conversation: \n\n{chat_history_text}"}]}
-            ]
+            edits = json.loads(response.choices[0].message.content)["edits"]
+        except (TypeError, KeyError, ValueError) as e:
+            raise dmd_edits.DmdEditError(f"Unreadable edits: {e}")
+        return document.apply(edits)
 
-            response = self.client.chat.completions.create(
-                model=os.getenv("GPT_MODEL"), messages=prompts
-            )
-            generated_domain_model_description = response.choices[0].message.content.strip()
-            self.current_domain_model_description.set_text(generated_domain_model_description)
-            return generated_domain_model_description
-        except Exception as e:
-            print(f"Error generating domain model description: {e}")
-            return "An error occurred while generating the domain model description."
-    
     # Add helper methods to manage chat history
     def add_to_chat_history(self, role, content):
         """Add an entry to the chat history."""
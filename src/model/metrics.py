@@ -0,0 +1,281 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, wide enough for multi-second LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Monotonically increasing value per label combination."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """Increase the counter for the given labels."""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Return the current value for the given labels."""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative bucketed distribution of observed values per label combination."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """Record one observation for the given labels."""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def totals(self, **labels):
+        """Return (observation count, sum of observed values) for the given labels."""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._values.get(key)
+            return (series["count"], series["sum"]) if series else (0, 0.0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', bound)])} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series['count']}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "dmc_http_request_duration_seconds", "Latency of HTTP requests by endpoint.", ("endpoint", "method", "status"))
+STAGE_SECONDS = REGISTRY.histogram(
+    "dmc_stage_duration_seconds", "Latency of chat pipeline stages.", ("stage",))
+DB_OPERATION_SECONDS = REGISTRY.histogram(
+    "dmc_db_operation_duration_seconds", "Latency of MongoDB operations.", ("collection", "operation"))
+DB_ERRORS = REGISTRY.counter(
+    "dmc_db_errors_total", "MongoDB operations that raised.", ("collection", "operation"))
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "dmc_llm_call_duration_seconds", "Latency of individual LLM API calls.", ("call_site", "model"))
+LLM_CALLS = REGISTRY.counter(
+    "dmc_llm_calls_total", "LLM API calls by outcome.", ("call_site", "model", "outcome"))
+LLM_TOKENS = REGISTRY.counter(
+    "dmc_llm_tokens_total", "Tokens reported in LLM responses, by kind (prompt/completion/cached_prompt).", ("call_site", "model", "kind"))
+LLM_ROUTES = REGISTRY.counter(
+    "dmc_llm_routes_total", "Routing decisions by call site, tier and the model that served the call.", ("call_site", "tier", "model"))
+LLM_FALLBACKS = REGISTRY.counter(
+    "dmc_llm_fallbacks_total", "Calls retried on a fallback model.", ("call_site", "model"))
+LLM_HEDGES = REGISTRY.counter(
+    "dmc_llm_hedges_total", "Hedged LLM calls: duplicates sent and which attempt answered first.", ("call_site", "model", "outcome"))
+EXTRACTION_REPAIRS = REGISTRY.counter(
+    "dmc_extraction_repairs_total", "Extraction responses repaired locally and follow-ups for their missing sections.", ("outcome",))
+DMD_EDITS = REGISTRY.counter(
+    "dmc_dmd_edits_total", "Incremental description updates: applied, or rejected and regenerated in full.", ("outcome",))
+LOCAL_ANSWERS_TOTAL = REGISTRY.counter(
+    "dmc_local_answers_total", "Structural questions answered from the domain model index without an LLM call.", ("kind",))
+SINGLE_FLIGHT_CALLS = REGISTRY.counter(
+    "dmc_single_flight_calls_total", "Coalesced LLM calls by role: leaders made the call, followers shared its result.", ("name", "role"))
+DEADLINE_EXCEEDED = REGISTRY.counter(
+    "dmc_deadline_exceeded_total", "Chat stages cut off by the request deadline.", ("stage",))
+
+
+@contextmanager
+def stage(name):
+    """Time a chat pipeline stage (classification, dmd_generation, uml_extraction, post_processing)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=name)
+
+
+def record_llm_call(call_site, model, started, response=None, error=None):
+    """
+    Record the latency, outcome and token usage of one LLM API call.
+
+    Args:
+        call_site (str): Which pipeline call made the request (classification, dmd_generation, dmd_edit, extraction).
+        model (str): The model requested.
+        started (float): time.perf_counter() value taken before the call.
+        response: The API response, whose usage is recorded when present.
+        error (Exception): The exception raised by the call, if any.
+    """
+    model = model or "unknown"
+    LLM_CALL_SECONDS.observe(time.perf_counter() - started, call_site=call_site, model=model)
+    LLM_CALLS.inc(call_site=call_site, model=model, outcome="error" if error is not None else "ok")
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, call_site=call_site, model=model, kind="prompt")
+        LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, call_site=call_site, model=model, kind="completion")
+        # Prompt tokens served from the provider's prompt cache (a subset of the prompt tokens)
+        details = getattr(usage, "prompt_tokens_details", None)
+        LLM_TOKENS.inc(getattr(details, "cached_tokens", 0) or 0, call_site=call_site, model=model, kind="cached_prompt")
+
+
+class _InstrumentedCursor:
+    """
+    Proxy around a cursor that adds the time spent fetching its results to the operation's latency.
+
+    find and aggregate return before anything is read from the database, so the operation is
+    observed once, when the cursor is exhausted, closed or discarded.
+    """
+
+    def __init__(self, cursor, collection, operation, elapsed):
+        self._cursor = cursor
+        self._iterator = None
+        self._collection = collection
+        self._operation = operation
+        self._elapsed = elapsed
+        self._observed = False
+
+    def _observe(self):
+        if not self._observed:
+            self._observed = True
+            DB_OPERATION_SECONDS.observe(self._elapsed, collection=self._collection, operation=self._operation)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._cursor, name)
+        if not callable(attribute):
+            return attribute
+
+        def chained(*args, **kwargs):
+            result = attribute(*args, **kwargs)
+            # sort, skip, limit and batch_size return the cursor itself
+            return self if result is self._cursor else result
+        return chained
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            if self._iterator is None:
+                self._iterator = iter(self._cursor)
+            document = next(self._iterator)
+        except StopIteration:
+            self._elapsed += time.perf_counter() - start
+            self._observe()
+            raise
+        except Exception:
+            self._elapsed += time.perf_counter() - start
+            DB_ERRORS.inc(collection=self._collection, operation=self._operation)
+            self._observe()
+            raise
+        self._elapsed += time.perf_counter() - start
+        return document
+
+    def close(self):
+        try:
+            self._cursor.close()
+        finally:
+            self._observe()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        if not self.__dict__.get("_observed", True):
+            self._observe()
+
+
+class InstrumentedCollection:
+    """Proxy around a pymongo collection that times every operation."""
+
+    # Operations returning a lazy cursor; their time includes iterating it
+    CURSOR_OPERATIONS = ("find", "aggregate")
+
+    def __init__(self, collection):
+        self._collection = collection
+        self._name = collection.name
+
+    def __getattr__(self, operation):
+        attribute = getattr(self._collection, operation)
+        if not callable(attribute):
+            return attribute
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = attribute(*args, **kwargs)
+            except Exception:
+                DB_ERRORS.inc(collection=self._name, operation=operation)
+                DB_OPERATION_SECONDS.observe(time.perf_counter() - start, collection=self._name, operation=operation)
+                raise
+            if operation in self.CURSOR_OPERATIONS:
+                return _InstrumentedCursor(result, self._name, operation, time.perf_counter() - start)
+            DB_OPERATION_SECONDS.observe(time.perf_counter() - start, collection=self._name, operation=operation)
+            return result
+        return timed
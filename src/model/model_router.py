@@ -0,0 +1,295 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from src.model.metrics import record_llm_call, LLM_ROUTES, LLM_FALLBACKS, LLM_HEDGES
+
+CLASSIFICATION = "classification"
+DMD_GENERATION = "dmd_generation"
+DMD_EDIT = "dmd_edit"
+EXTRACTION = "extraction"
+
+FAST = "fast"
+STRONG = "strong"
+
+# Inputs up to this many characters are routed to the fast tier
+FAST_MAX_CHARS = {
+    CLASSIFICATION: int(os.getenv("ROUTE_CLASSIFICATION_FAST_MAX_CHARS", "6000")),
+    DMD_GENERATION: int(os.getenv("ROUTE_DMD_GENERATION_FAST_MAX_CHARS", "1500")),
+    # Edits must preserve the existing model, so they stay on the strong tier; their output is short
+    DMD_EDIT: int(os.getenv("ROUTE_DMD_EDIT_FAST_MAX_CHARS", "0")),
+    EXTRACTION: int(os.getenv("ROUTE_EXTRACTION_FAST_MAX_CHARS", "800"))
+}
+# When the strong tier's recent latency exceeds this many seconds, the fast tier is used instead
+LATENCY_BUDGETS = {
+    CLASSIFICATION: float(os.getenv("ROUTE_CLASSIFICATION_LATENCY_BUDGET", "4")),
+    DMD_GENERATION: float(os.getenv("ROUTE_DMD_GENERATION_LATENCY_BUDGET", "15")),
+    DMD_EDIT: float(os.getenv("ROUTE_DMD_EDIT_LATENCY_BUDGET", "8")),
+    EXTRACTION: float(os.getenv("ROUTE_EXTRACTION_LATENCY_BUDGET", "30"))
+}
+# Consecutive failures after which a model is skipped for COOLDOWN_SECONDS
+FAILURE_THRESHOLD = int(os.getenv("ROUTE_FAILURE_THRESHOLD", "3"))
+COOLDOWN_SECONDS = float(os.getenv("ROUTE_COOLDOWN_SECONDS", "30"))
+# Weight of the newest observation in the latency moving average
+EWMA_ALPHA = 0.3
+# Latency older than this many seconds is ignored, so a model demoted for being slow is tried again
+LATENCY_TTL_SECONDS = float(os.getenv("ROUTE_LATENCY_TTL_SECONDS", "120"))
+
+# Hedging: when a call is slower than this percentile of recent calls, a duplicate is sent
+LLM_HEDGING = os.getenv("LLM_HEDGING", "").lower() in ("1", "true", "yes")
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+# At most this fraction of calls may be hedged
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", "0.05"))
+# Hedge only once this many recent latencies are known for the call site and model
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+
+class _ModelStats:
+    """Live latency and failure statistics used for routing decisions."""
+
+    def __init__(self):
+        self._latency = {}  # (call_site, model) -> (EWMA seconds, monotonic time of the last sample)
+        self._recent = {}  # (call_site, model) -> recent latencies, for percentiles
+        self._failures = {}  # model -> consecutive failures
+        self._cooldown_until = {}  # model -> monotonic deadline
+        self._lock = threading.Lock()
+
+    def record(self, call_site, model, duration, ok):
+        with self._lock:
+            if ok:
+                now = time.monotonic()
+                previous = self._fresh_latency(call_site, model, now)
+                self._latency[(call_site, model)] = (duration if previous is None else (
+                    EWMA_ALPHA * duration + (1 - EWMA_ALPHA) * previous), now)
+                self._recent.setdefault((call_site, model), deque(maxlen=LATENCY_WINDOW)).append(duration)
+                self._failures[model] = 0
+            else:
+                self._failures[model] = self._failures.get(model, 0) + 1
+                if self._failures[model] >= FAILURE_THRESHOLD:
+                    self._cooldown_until[model] = time.monotonic() + COOLDOWN_SECONDS
+
+    def _fresh_latency(self, call_site, model, now):
+        entry = self._latency.get((call_site, model))
+        if entry is None or now - entry[1] > LATENCY_TTL_SECONDS:
+            return None
+        return entry[0]
+
+    def latency(self, call_site, model):
+        """Moving average latency, or None when the model has no sample within LATENCY_TTL_SECONDS."""
+        with self._lock:
+            return self._fresh_latency(call_site, model, time.monotonic())
+
+    def percentile(self, call_site, model, percent):
+        """Nearest-rank percentile of recent successful latencies, or None with too few samples."""
+        with self._lock:
+            recent = sorted(self._recent.get((call_site, model), ()))
+        if len(recent) < HEDGE_MIN_SAMPLES:
+            return None
+        return recent[max(0, math.ceil(percent / 100 * len(recent)) - 1)]
+
+    def healthy(self, model):
+        with self._lock:
+            return self._cooldown_until.get(model, 0) <= time.monotonic()
+
+
+stats = _ModelStats()
+
+
+class _HedgeBudget:
+    """Caps hedged calls to a fraction of all calls."""
+
+    def __init__(self, max_ratio):
+        self.max_ratio = max_ratio
+        self.calls = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def count_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def available(self):
+        with self._lock:
+            return self.hedges + 1 <= self.max_ratio * self.calls
+
+    def try_acquire(self):
+        with self._lock:
+            if self.hedges + 1 > self.max_ratio * self.calls:
+                return False
+            self.hedges += 1
+            return True
+
+
+hedge_budget = _HedgeBudget(HEDGE_MAX_RATIO)
+# Duplicate requests run here; primary attempts never queue behind them
+_hedge_executor = ThreadPoolExecutor(max_workers=int(os.getenv("HEDGE_MAX_WORKERS", "32")), thread_name_prefix="llm-hedge")
+
+
+def _model_list(value):
+    return [model.strip() for model in value.split(",") if model.strip()]
+
+
+def route_models(call_site, tier):
+    """
+    Return the configured models of one tier for a call site, primary first.
+
+    ROUTE_<CALL_SITE>_<TIER>_MODELS overrides ROUTER_<TIER>_MODELS. Read at call time so values
+    loaded from .env after import are honoured.
+    """
+    override = os.getenv(f"ROUTE_{call_site.upper()}_{tier.upper()}_MODELS")
+    if override is not None:
+        return _model_list(override)
+    if tier == FAST:
+        # Opt-in: without fast models every call stays on the strong tier
+        return _model_list(os.getenv("ROUTER_FAST_MODELS", ""))
+    default = "gpt-4o" if call_site == EXTRACTION else os.getenv("GPT_MODEL") or "gpt-4o"
+    return _model_list(os.getenv("ROUTER_STRONG_MODELS", default))
+
+
+def choose_tier(call_site, input_size, hint=None):
+    """
+    Decide which tier handles a call.
+
+    Args:
+        call_site (str): CLASSIFICATION, DMD_GENERATION, DMD_EDIT or EXTRACTION.
+        input_size (int): Length of the variable part of the prompt in characters.
+        hint (dict): The classification result of the turn, when known.
+
+    Returns:
+        str: FAST or STRONG.
+    """
+    hint = hint or {}
+    if not route_models(call_site, FAST):
+        return STRONG
+    if call_site == DMD_GENERATION and hint.get("is_style_change"):
+        # Rewording an existing description does not need the strong model
+        tier = FAST
+    elif call_site == DMD_GENERATION and hint.get("is_update"):
+        # Updates must preserve the whole existing model
+        tier = STRONG
+    else:
+        tier = FAST if input_size <= FAST_MAX_CHARS[call_site] else STRONG
+
+    if tier == STRONG:
+        strong = [model for model in route_models(call_site, STRONG) if stats.healthy(model)]
+        latency = stats.latency(call_site, strong[0]) if strong else None
+        if latency is not None and latency > LATENCY_BUDGETS[call_site]:
+            tier = FAST
+    return tier
+
+
+def _candidates(call_site, tier):
+    """Models to try in order: the chosen tier, then the other tier as fallback, skipping models cooling down."""
+    other = STRONG if tier == FAST else FAST
+    ordered = []
+    for model in route_models(call_site, tier) + route_models(call_site, other):
+        if model not in ordered:
+            ordered.append(model)
+    healthy = [model for model in ordered if stats.healthy(model)]
+    return healthy or ordered
+
+
+def _attempt(client, call_site, model, kwargs):
+    """Make one API call and record its latency, outcome and usage."""
+    started = time.perf_counter()
+    try:
+        response = client.chat.completions.create(model=model, **kwargs)
+    except Exception as e:
+        stats.record(call_site, model, time.perf_counter() - started, ok=False)
+        record_llm_call(call_site, model, started, error=e)
+        raise
+    stats.record(call_site, model, time.perf_counter() - started, ok=True)
+    record_llm_call(call_site, model, started, response)
+    return response
+
+
+def _start_primary(client, call_site, model, kwargs):
+    """Start a primary attempt on its own thread, so the caller can return a faster duplicate's answer."""
+    future = Future()
+    future.set_running_or_notify_cancel()
+
+    def run():
+        try:
+            future.set_result(_attempt(client, call_site, model, kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="llm-primary", daemon=True).start()
+    return future
+
+
+def _hedged_attempt(client, call_site, model, kwargs):
+    """
+    Make one API call, sending a duplicate if it is slower than the hedge percentile.
+
+    Calls that cannot be hedged (hedging off, no latency history yet or no budget left) run on the
+    caller's thread. Otherwise the synchronous client would block the caller until the primary
+    answers, so the primary gets a thread of its own and only the duplicate uses the bounded pool.
+    The first successful response wins. A duplicate that has not started is cancelled; one already
+    in flight cannot be interrupted, so its response is discarded.
+    """
+    if not LLM_HEDGING:
+        return _attempt(client, call_site, model, kwargs)
+    hedge_budget.count_call()
+    delay = stats.percentile(call_site, model, HEDGE_PERCENTILE)
+    if delay is None or not hedge_budget.available():
+        return _attempt(client, call_site, model, kwargs)
+
+    primary = _start_primary(client, call_site, model, kwargs)
+    done, _ = wait([primary], timeout=delay)
+    if done or not hedge_budget.try_acquire():
+        return primary.result()
+
+    LLM_HEDGES.inc(call_site=call_site, model=model, outcome="sent")
+    hedge = _hedge_executor.submit(_attempt, client, call_site, model, kwargs)
+    pending = {primary, hedge}
+    last_error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None:
+                last_error = future.exception()
+                continue
+            for loser in pending:
+                loser.cancel()
+            LLM_HEDGES.inc(call_site=call_site, model=model, outcome="hedge_won" if future is hedge else "primary_won")
+            return future.result()
+    raise last_error
+
+
+def complete(client, call_site, input_size, hint=None, **kwargs):
+    """
+    Create a chat completion on the model routed for the call site, falling back on errors.
+
+    With LLM_HEDGING enabled, slow calls are hedged (see _hedged_attempt).
+
+    Args:
+        client: The OpenAI client.
+        call_site (str): CLASSIFICATION, DMD_GENERATION, DMD_EDIT or EXTRACTION.
+        input_size (int): Length of the variable part of the prompt in characters.
+        hint (dict): The classification result of the turn, when known.
+        **kwargs: Arguments for client.chat.completions.create, without model.
+
+    Returns:
+        The API response of the first model that succeeded. Raises the last error if all fail.
+    """
+    tier = choose_tier(call_site, input_size, hint)
+    candidates = _candidates(call_site, tier)
+    if not candidates:
+        raise ValueError(f"No models configured for {call_site}")
+    last_error = None
+    for attempt, model in enumerate(candidates):
+        if attempt:
+            LLM_FALLBACKS.inc(call_site=call_site, model=model)
+            print(f"Falling back to {model} for {call_site} after error: {last_error}")
+        try:
+            response = _hedged_attempt(client, call_site, model, kwargs)
+        except Exception as e:
+            last_error = e
+            continue
+        LLM_ROUTES.inc(call_site=call_site, tier=tier, model=model)
+        return response
+    raise last_error
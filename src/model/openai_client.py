@@ -1,14 +1,14 @@
-from openai import OpenAI
-from dotenv import load_dotenv
 import os
+from src.model.resources import load_environment
 
 class OpenAIClient:
     _client = None
 
     @classmethod
     def initialize(cls):
-        """Initialize the OpenAI client."""
-        load_dotenv(override=True)
+        """Initialize the OpenAI client. The openai package is imported here because it is slow to import."""
+        from openai import OpenAI
+        load_environment()
         cls._client = OpenAI(
             api_key=os.getenv("OPENAI_API_KEY"),
         )
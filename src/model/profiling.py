@@ -0,0 +1,198 @@
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+# Secret that enables profiling of a request via the X-Profile header or ?profile= query parameter
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+# Fraction of all requests (0..1) profiled without being asked
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "50"))
+
+
+def enabled():
+    """Profiling hooks are only installed when a token or a sample rate is configured."""
+    return bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+def token_matches(candidate):
+    """Check a supplied token against PROFILE_TOKEN in constant time."""
+    # Bytes, because compare_digest rejects str with non-ASCII characters
+    return bool(PROFILE_TOKEN) and bool(candidate) and hmac.compare_digest(candidate.encode(), PROFILE_TOKEN.encode())
+
+
+def should_profile(candidate_token):
+    """Decide whether to profile the current request."""
+    if token_matches(candidate_token):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _frame_label(code):
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{os.path.basename(code.co_filename)}:{name}"
+
+
+# Thread id -> the profiler sampling that thread
+_profilers = {}
+_profilers_lock = threading.Lock()
+
+
+def current():
+    """Return the profiler sampling the calling thread, or None."""
+    with _profilers_lock:
+        return _profilers.get(threading.get_ident())
+
+
+def propagate(function):
+    """
+    Wrap a function handed to a worker thread, so the profiler of the calling thread also
+    samples the worker while it runs the function. Returns function unchanged when not profiling.
+    """
+    profiler = current()
+    if profiler is None:
+        return function
+
+    def sampled(*args, **kwargs):
+        profiler.follow()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profiler.unfollow()
+    return sampled
+
+
+class SamplingProfiler:
+    """
+    Sample the call stacks of one thread, and of the worker threads it hands work to (see
+    propagate), at a fixed interval from a background thread.
+
+    Samples are aggregated as folded stacks ("outer;inner count"), the input format of
+    flamegraph.pl and speedscope. Stacks of worker threads start with a "thread:<name>" frame.
+    """
+
+    def __init__(self, thread_id=None, interval=PROFILE_INTERVAL_SECONDS):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.counts = {}
+        self.samples = 0
+        self.started = None
+        self.duration = 0.0
+        self._threads = {self.thread_id: None}  # thread id -> root frame label (None for the profiled thread)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        with _profilers_lock:
+            _profilers[self.thread_id] = self
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling; safe to call more than once."""
+        if self._thread is None:
+            return self
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.duration = time.perf_counter() - self.started
+        with _profilers_lock:
+            for thread_id in list(self._threads):
+                if _profilers.get(thread_id) is self:
+                    del _profilers[thread_id]
+        return self
+
+    def follow(self):
+        """Also sample the calling thread until unfollow."""
+        thread_id = threading.get_ident()
+        with self._lock:
+            if self._stop.is_set():
+                return
+            self._threads[thread_id] = f"thread:{threading.current_thread().name}"
+        with _profilers_lock:
+            _profilers[thread_id] = self
+
+    def unfollow(self):
+        """Stop sampling the calling thread (a no-op for the profiled thread itself)."""
+        thread_id = threading.get_ident()
+        if thread_id == self.thread_id:
+            return
+        with self._lock:
+            self._threads.pop(thread_id, None)
+        with _profilers_lock:
+            if _profilers.get(thread_id) is self:
+                del _profilers[thread_id]
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                threads = list(self._threads.items())
+            for thread_id, root in threads:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if root is not None:
+                    stack.append(root)
+                key = ";".join(reversed(stack))
+                self.counts[key] = self.counts.get(key, 0) + 1
+                self.samples += 1
+
+    def folded(self):
+        """Return the profile as folded stacks, one stack per line."""
+        return "\n".join(f"{stack} {count}" for stack, count in sorted(self.counts.items())) + "\n"
+
+
+class ProfileStore:
+    """In-memory store of the most recent profiles of this worker."""
+
+    def __init__(self, max_profiles=PROFILE_MAX_STORED):
+        self.max_profiles = max_profiles
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profiler, method, path, endpoint, status):
+        profile_id = uuid.uuid4().hex[:12]
+        entry = {
+            "id": profile_id,
+            "method": method,
+            "path": path,
+            "endpoint": endpoint,
+            "status": status,
+            "duration_ms": round(profiler.duration * 1000, 1),
+            "samples": profiler.samples,
+            "interval_ms": profiler.interval * 1000,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "folded": profiler.folded()
+        }
+        with self._lock:
+            self._profiles[profile_id] = entry
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def list(self):
+        """Return profile metadata, newest first."""
+        with self._lock:
+            return [{key: value for key, value in entry.items() if key != "folded"}
+                    for entry in reversed(self._profiles.values())]
+
+    def get(self, profile_id):
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+store = ProfileStore()
@@ -1,25 +1,95 @@
-import os
-from pymongo import MongoClient
 from datetime import datetime
+from src.model.metrics import InstrumentedCollection
+from src.model.resources import get_mongo_client, DATABASE_NAME
+from src.model import project_transfer, structure_index
+from src.model.svg_renderer import model_hash
 
 class ProjectService:
     """Service for project database operations with embedded version history."""
     
-    def __init__(self):
-        """Initialize connection to MongoDB."""
+    def __init__(self, collection=None, archive_collection=None):
+        """Initialize connection to MongoDB, or use the given projects collection (e.g. an in-memory stand-in)."""
+        if collection is not None:
+            self.client = None
+            self.db = None
+            self.projects_collection = InstrumentedCollection(collection)
+            self.archive_collection = InstrumentedCollection(archive_collection) if archive_collection is not None else None
+            return
         try:
-            mongo_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
-            print(f"Connecting to MongoDB at: {mongo_uri}")
-            self.client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
-            self.client.server_info()
-            print("MongoDB connection successful")
-            self.db = self.client.get_database("domain_modelling_copilot")
-            self.projects_collection = self.db.get_collection("projects")
+            # The client is shared by all services; the startup phase checks that the server is reachable
+            self.client = get_mongo_client()
+            self.db = self.client.get_database(DATABASE_NAME)
+            self.projects_collection = InstrumentedCollection(self.db.get_collection("projects"))
+            # Versions removed from project documents by compaction
+            self.archive_collection = InstrumentedCollection(self.db.get_collection("project_versions_archive"))
         except Exception as e:
             print(f"MongoDB connection error: {str(e)}")
             self.client = None
             self.db = None
             self.projects_collection = None
+            self.archive_collection = None
+
+    # Projection that loads only the version tree (no DMD/PlantUML payloads)
+    VERSION_TREE_PROJECTION = {"_id": 0, "head": 1, "versions.version": 1, "versions.parent": 1}
+
+    @staticmethod
+    def _parent_of(version):
+        """Return the parent version number of a version entry (None for the root)."""
+        if "parent" in version:
+            return version["parent"]
+        # Versions saved before the version tree existed form a linear history
+        return version["version"] - 1 if version["version"] > 1 else None
+
+    @staticmethod
+    def _head_of(project_doc):
+        """Return the version number the project's head pointer refers to."""
+        head = project_doc.get("head")
+        if head is None:
+            versions = project_doc.get("versions", [])
+            head = versions[-1]["version"] if versions else None
+        return head
+
+    def _lineage(self, versions, head):
+        """Return the versions on the path from the initial version to head, oldest first."""
+        by_number = {version["version"]: version for version in versions}
+        lineage = []
+        current = by_number.get(head)
+        while current is not None:
+            lineage.append(current)
+            parent = self._parent_of(current)
+            current = by_number.get(parent) if parent is not None else None
+        lineage.reverse()
+        return lineage
+
+    @staticmethod
+    def _content_of(version, by_number):
+        """Return the entry holding a version's DMD and PlantUML: itself, or the one it refers to with same_as."""
+        if "same_as" in version:
+            return by_number.get(version["same_as"], version)
+        return version
+
+    def _resolve_content(self, project_name, version):
+        """Load the referenced entry of a version stored with same_as (for $elemMatch projections)."""
+        if "same_as" not in version:
+            return version
+        project_doc = self.projects_collection.find_one(
+            {"project_name": project_name},
+            {"_id": 0, "versions": {"$elemMatch": {"version": version["same_as"]}}}
+        )
+        return project_doc["versions"][0] if project_doc and project_doc.get("versions") else version
+
+    def _children_of(self, versions, version_number):
+        """Return the version numbers branching off the given version."""
+        return [version["version"] for version in versions if self._parent_of(version) == version_number]
+
+    def _navigation_state(self, versions, head):
+        """Return whether undo and redo are possible from the given head."""
+        by_number = {version["version"]: version for version in versions}
+        head_version = by_number.get(head)
+        return {
+            "can_undo": head_version is not None and self._parent_of(head_version) is not None,
+            "can_redo": bool(self._children_of(versions, head))
+        }
     
     def get_projects(self):
         """Get list of all projects."""
@@ -53,9 +123,12 @@ class ProjectService:
             project_doc = {
                 "project_name": project_name,
                 "created_at": datetime.now(),
+                "head": 1,
+                "revision": 0,
                 "versions": [
                     {
                         "version": 1,
+                        "parent": None,
                         "user_input": None,  # No user input for initial version
                         "assistant": initial_assistant,
                         "domain_model_description": initial_dmd,
@@ -95,8 +168,34 @@ class ProjectService:
             print(f"Error renaming project: {e}")
             return {"error": f"Failed to rename project: {str(e)}"}, 500
     
-    def get_project_data(self, project_name):
-        """Get the latest project state and reconstructed chat history."""
+    @staticmethod
+    def make_etag(project_id, head, revision):
+        """Build the entity tag identifying a project state from its id, head and write revision."""
+        return f"{project_id}-v{head}-r{revision or 0}"
+
+    def get_project_etag(self, project_name):
+        """Get the current entity tag of a project without loading its versions."""
+        try:
+            if not project_name or self.projects_collection is None:
+                return None
+            project_doc = self.projects_collection.find_one({"project_name": project_name}, {"head": 1, "revision": 1})
+            if not project_doc:
+                return None
+            head = project_doc.get("head")
+            if head is None:
+                # Projects created before the head pointer existed need the version list
+                head = self._head_of(self.projects_collection.find_one({"project_name": project_name}, self.VERSION_TREE_PROJECTION))
+            return self.make_etag(project_doc["_id"], head, project_doc.get("revision"))
+        except Exception as e:
+            print(f"Error retrieving project etag: {e}")
+            return None
+
+    def get_project_data(self, project_name, since_version=None):
+        """Get the latest project state and reconstructed chat history.
+
+        When since_version is an ancestor of the head, only the chat messages added after it
+        and the fields that changed since it are returned.
+        """
         try:
             if not project_name:
                 return {"error": "Project name is required."}, 400
@@ -111,25 +210,52 @@ class ProjectService:
             if not versions:
                 return {"error": f"No version data found for project '{project_name}'."}, 404
 
-            # The latest version represents the current state
-            latest_version = versions[-1]
+            # The head pointer selects the current state; undo/redo only move it
+            head = self._head_of(project_doc)
+            lineage = self._lineage(versions, head)
+            head_version = lineage[-1]
+            by_number = {version["version"]: version for version in versions}
+            head_content = self._content_of(head_version, by_number)
+            
+            current_domain_model = head_content.get("domain_model_description")
+            current_plant_uml = head_content.get("plant_uml")
             
-            current_domain_model = latest_version.get("domain_model_description")
-            current_plant_uml = latest_version.get("plant_uml")
+            # A client that already holds an ancestor of head only needs what came after it
+            lineage_numbers = [version["version"] for version in lineage]
+            base_version = None
+            if since_version in lineage_numbers:
+                base_index = lineage_numbers.index(since_version)
+                base_version = lineage[base_index]
+                lineage = lineage[base_index + 1:]
+            base_content = self._content_of(base_version, by_number) if base_version is not None else None
             
-            # Reconstruct chat history from all versions
+            # Reconstruct chat history along the branch that leads to head
             chat_history = []
-            for version in versions:
+            for version in lineage:
+                # Turns of archived ancestors are kept as text on the next version that was not archived
+                for turn in version.get("archived_turns", []):
+                    if turn.get("user_input"):
+                        chat_history.append({"role": "user", "content": turn["user_input"]})
+                    if turn.get("assistant"):
+                        chat_history.append({"role": "assistant", "content": turn["assistant"]})
                 if version.get("user_input"):
                     chat_history.append({"role": "user", "content": version["user_input"]})
                 if version.get("assistant"):
                     chat_history.append({"role": "assistant", "content": version["assistant"]})
             
             project_data = {
-                "domain_model_description": current_domain_model,
-                "plant_uml": current_plant_uml,
-                "chat_history": chat_history
+                "chat_history": chat_history,
+                "version": head,
+                "etag": self.make_etag(project_doc["_id"], head, project_doc.get("revision")),
+                "delta": base_version is not None,
+                **self._navigation_state(versions, head)
             }
+            if base_content is None or base_content.get("domain_model_description") != current_domain_model:
+                project_data["domain_model_description"] = current_domain_model
+            # PlantUML attached after the client may have loaded the base version is always resent
+            if base_content is None or base_content.get("uml_late") or base_content.get("plant_uml") != current_plant_uml:
+                project_data["plant_uml"] = current_plant_uml
+            project_data["uml_pending"] = bool(head_version.get("uml_pending"))
             
             print(f"Project data retrieved successfully for '{project_name}'")
             return {"project_data": project_data}, 200
@@ -137,8 +263,13 @@ class ProjectService:
             print(f"Error retrieving project data: {e}")
             return {"error": f"Failed to retrieve project data: {str(e)}"}, 500
     
-    def save_version(self, project_name, user_input, assistant, domain_model_description, plant_uml):
-        """Add a new version to the project's versions array."""
+    def save_version(self, project_name, user_input, assistant, domain_model_description, plant_uml, domain_model=None, uml_pending=False):
+        """Add a new version to the project's versions array.
+
+        domain_model is the structured extraction behind plant_uml; when the PlantUML is carried
+        over from the head version, so is its structured model. uml_pending marks a version whose
+        PlantUML is still being generated and will be attached with attach_version_uml.
+        """
         try:
             if not project_name:
                 return {"error": "Project name is required."}, 400
@@ -153,15 +284,23 @@ class ProjectService:
             # Get versions array or initialize if not exists
             versions = project_doc.get("versions", [])
             
+            # New versions branch off the head, which may be behind the newest version after an undo
+            head = self._head_of(project_doc)
+            
             # If there are existing versions, use their values as fallbacks
+            head_content = None
             if versions:
-                latest_version = versions[-1]
-                # Ensure we're not saving null values by using the previous version as fallback
+                head_version = next((version for version in versions if version["version"] == head), versions[-1])
+                head_content = self._content_of(head_version, {version["version"]: version for version in versions})
+                # Ensure we're not saving null values by using the head version as fallback
                 if domain_model_description is None:
-                    domain_model_description = latest_version.get("domain_model_description", "Welcome to your new project! Start by describing your domain.")
+                    domain_model_description = head_content.get("domain_model_description", "Welcome to your new project! Start by describing your domain.")
                 
                 if plant_uml is None:
-                    plant_uml = latest_version.get("plant_uml", "@startuml\nskinparam monochrome true\ntitle Your New Project\n\nclass ExampleEntity {\n  +id: string\n  +name: string\n}\n\nnote \"Start building your domain model!\" as N1\n@enduml")
+                    plant_uml = head_content.get("plant_uml", "@startuml\nskinparam monochrome true\ntitle Your New Project\n\nclass ExampleEntity {\n  +id: string\n  +name: string\n}\n\nnote \"Start building your domain model!\" as N1\n@enduml")
+                
+                if domain_model is None and plant_uml == head_content.get("plant_uml"):
+                    domain_model = head_content.get("domain_model")
             else:
                 # Initialize with defaults if this is somehow the first version
                 if domain_model_description is None:
@@ -170,26 +309,43 @@ class ProjectService:
                 if plant_uml is None:
                     plant_uml = "@startuml\nskinparam monochrome true\ntitle Your New Project\n\nclass ExampleEntity {\n  +id: string\n  +name: string\n}\n\nnote \"Start building your domain model!\" as N1\n@enduml"
             
-            # Determine next version number
-            next_version = len(versions) + 1
+            # Determine next version number; compaction may have archived old versions, so count from the highest
+            next_version = max((version["version"] for version in versions), default=0) + 1
             
             # Create new version object
             new_version = {
                 "version": next_version,
+                "parent": head,
                 "user_input": user_input,
                 "assistant": assistant,
                 "domain_model_description": domain_model_description,
                 "plant_uml": plant_uml,
+                "domain_model": domain_model,
                 "timestamp": datetime.now()
             }
+            if domain_model:
+                # Identifies the structured model across workers, e.g. for its structure index
+                new_version["model_hash"] = model_hash(domain_model)
+            if uml_pending:
+                new_version["uml_pending"] = True
+            elif (head_content is not None and not head_content.get("uml_pending")
+                  and domain_model_description == head_content.get("domain_model_description")
+                  and plant_uml == head_content.get("plant_uml")):
+                # A turn that changed nothing refers to the entry holding the content instead of copying it
+                for field in ("domain_model_description", "plant_uml", "domain_model", "model_hash"):
+                    new_version.pop(field, None)
+                new_version["same_as"] = head_content["version"]
             
-            # Add the new version to the versions array
+            # Add the new version to the versions array and move the head onto it.
+            # The version filter keeps a concurrent save from reusing the same number.
             result = self.projects_collection.update_one(
-                {"project_name": project_name},
-                {"$push": {"versions": new_version}}
+                {"project_name": project_name, "versions.version": {"$ne": next_version}},
+                {"$push": {"versions": new_version}, "$set": {"head": next_version}, "$inc": {"revision": 1}}
             )
             
             if result.modified_count > 0:
+                # Index the structured model now, so questions about it are answered without loading it
+                structure_index.record(domain_model, new_version.get("model_hash"))
                 return {"message": f"Version {next_version} for project '{project_name}' saved successfully.", "version": next_version}, 200
             else:
                 return {"error": "Failed to save version."}, 500
@@ -197,35 +353,261 @@ class ProjectService:
             print(f"Error saving project version: {e}")
             return {"error": f"Failed to save project version: {str(e)}"}, 500
 
+    def attach_version_description(self, project_name, version, domain_model_description):
+        """Attach a late domain model description to a version saved with uml_pending.
+
+        The flag stays set: the PlantUML for the new description follows with attach_version_uml.
+        """
+        try:
+            if self.projects_collection is None:
+                return {"error": "Database connection not available."}, 500
+
+            result = self.projects_collection.update_one(
+                {"project_name": project_name, "versions": {"$elemMatch": {"version": version, "uml_pending": True}}},
+                {"$set": {"versions.$.domain_model_description": domain_model_description}, "$inc": {"revision": 1}}
+            )
+            if result.modified_count > 0:
+                return {"message": f"Description attached to version {version} of project '{project_name}'.", "version": version}, 200
+            return {"error": f"Version {version} of project '{project_name}' is not waiting for its description."}, 404
+        except Exception as e:
+            print(f"Error attaching description to version: {e}")
+            return {"error": f"Failed to attach description: {str(e)}"}, 500
+
+    def attach_version_uml(self, project_name, version, plant_uml=None, domain_model=None):
+        """Attach late PlantUML to a version saved with uml_pending and clear the flag.
+
+        Without plant_uml (the background generation failed) only the flag is cleared, leaving the
+        carried-over PlantUML in place. The revision is bumped so cached project data is revalidated.
+        """
+        try:
+            if self.projects_collection is None:
+                return {"error": "Database connection not available."}, 500
+
+            update = {"versions.$.uml_pending": False, "versions.$.uml_late": True}
+            if plant_uml is not None:
+                update["versions.$.plant_uml"] = plant_uml
+                update["versions.$.domain_model"] = domain_model
+                update["versions.$.model_hash"] = model_hash(domain_model) if domain_model else None
+            result = self.projects_collection.update_one(
+                {"project_name": project_name, "versions": {"$elemMatch": {"version": version, "uml_pending": True}}},
+                {"$set": update, "$inc": {"revision": 1}}
+            )
+            if result.modified_count > 0:
+                if plant_uml is not None:
+                    structure_index.record(domain_model, update["versions.$.model_hash"])
+                return {"message": f"PlantUML attached to version {version} of project '{project_name}'.", "version": version}, 200
+            return {"error": f"Version {version} of project '{project_name}' is not waiting for PlantUML."}, 404
+        except Exception as e:
+            print(f"Error attaching PlantUML to version: {e}")
+            return {"error": f"Failed to attach PlantUML: {str(e)}"}, 500
+
+    def get_version_uml(self, project_name, version):
+        """Get a version's PlantUML and description, and whether they are still being generated."""
+        try:
+            if not project_name or version is None:
+                return {"error": "Project name and version are required."}, 400
+            if self.projects_collection is None:
+                return {"error": "Database connection not available."}, 500
+
+            project_doc = self.projects_collection.find_one(
+                {"project_name": project_name},
+                {"_id": 0, "versions": {"$elemMatch": {"version": version}}}
+            )
+            if not project_doc or not project_doc.get("versions"):
+                return {"error": f"Version {version} of project '{project_name}' not found."}, 404
+
+            version_doc = self._resolve_content(project_name, project_doc["versions"][0])
+            return {
+                "version": version,
+                "uml_pending": version_doc.get("uml_pending", False),
+                "plant_uml": version_doc.get("plant_uml"),
+                "domain_model_description": version_doc.get("domain_model_description")
+            }, 200
+        except Exception as e:
+            print(f"Error retrieving version PlantUML: {e}")
+            return {"error": f"Failed to retrieve version PlantUML: {str(e)}"}, 500
+
+    def get_version_model_hash(self, project_name, version):
+        """Get the hash of a version's structured model without loading the model (None when not stored)."""
+        project_doc = self.projects_collection.find_one(
+            {"project_name": project_name},
+            {"_id": 0, "versions.version": 1, "versions.same_as": 1, "versions.model_hash": 1}
+        )
+        by_number = {entry["version"]: entry for entry in (project_doc or {}).get("versions", [])}
+        if version not in by_number:
+            return None
+        return self._content_of(by_number[version], by_number).get("model_hash")
+
+    def get_version_domain_model(self, project_name, version=None):
+        """Get the structured domain model stored with a version (the head version by default)."""
+        try:
+            if not project_name:
+                return {"error": "Project name is required."}, 400
+            if self.projects_collection is None:
+                return {"error": "Database connection not available."}, 500
+
+            if version is None:
+                project_doc = self.projects_collection.find_one({"project_name": project_name}, self.VERSION_TREE_PROJECTION)
+                if not project_doc:
+                    return {"error": f"Project '{project_name}' not found."}, 404
+                version = self._head_of(project_doc)
+
+            project_doc = self.projects_collection.find_one(
+                {"project_name": project_name},
+                {"_id": 0, "versions": {"$elemMatch": {"version": version}}}
+            )
+            if not project_doc or not project_doc.get("versions"):
+                return {"error": f"Version {version} of project '{project_name}' not found."}, 404
+
+            domain_model = self._resolve_content(project_name, project_doc["versions"][0]).get("domain_model")
+            if not domain_model:
+                return {"error": f"Version {version} of project '{project_name}' has no structured domain model."}, 404
+            return {"domain_model": domain_model, "version": version}, 200
+        except Exception as e:
+            print(f"Error retrieving domain model: {e}")
+            return {"error": f"Failed to retrieve domain model: {str(e)}"}, 500
+
     def undo_version(self, project_name):
-        """Remove the latest version from the project's versions array."""
+        """Move the project's head pointer to the parent of the current version."""
         try:
             if not project_name:
                 return {"error": "Project name is required."}, 400
             if self.projects_collection is None:
                 return {"error": "Database connection not available."}, 500
 
-            # Find the project
-            project_doc = self.projects_collection.find_one({"project_name": project_name})
+            project_doc = self.projects_collection.find_one({"project_name": project_name}, self.VERSION_TREE_PROJECTION)
             if not project_doc:
                 return {"error": f"Project '{project_name}' not found."}, 404
             
             versions = project_doc.get("versions", [])
-            if len(versions) <= 1:
+            head = self._head_of(project_doc)
+            head_version = next((version for version in versions if version["version"] == head), None)
+            if head_version is None or self._parent_of(head_version) is None:
                 return {"error": "Cannot undo the initial project version."}, 400
             
-            # Remove the last element from the versions array using $pop operation
-            result = self.projects_collection.update_one(
-                {"project_name": project_name},
-                {"$pop": {"versions": 1}}  # 1 to remove the last element
-            )
-            
-            if result.modified_count == 0:
-                return {"error": "Failed to undo version."}, 500
+            return self._move_head(project_name, versions, head, self._parent_of(head_version))
+        except Exception as e:
+            print(f"Error undoing version: {e}")
+            return {"error": f"Failed to undo version: {str(e)}"}, 500
+
+    def redo_version(self, project_name):
+        """Move the project's head pointer to the most recent version branching off the current one."""
+        try:
+            if not project_name:
+                return {"error": "Project name is required."}, 400
+            if self.projects_collection is None:
+                return {"error": "Database connection not available."}, 500
 
-            # After removing, get the project data with the previous version
-            return self.get_project_data(project_name)
+            project_doc = self.projects_collection.find_one({"project_name": project_name}, self.VERSION_TREE_PROJECTION)
+            if not project_doc:
+                return {"error": f"Project '{project_name}' not found."}, 404
+            
+            versions = project_doc.get("versions", [])
+            head = self._head_of(project_doc)
+            children = self._children_of(versions, head)
+            if not children:
+                return {"error": "Nothing to redo."}, 400
             
+            return self._move_head(project_name, versions, head, max(children))
         except Exception as e:
-            print(f"Error undoing version: {e}")
-            return {"error": f"Failed to undo version: {str(e)}"}, 500
\ No newline at end of file
+            print(f"Error redoing version: {e}")
+            return {"error": f"Failed to redo version: {str(e)}"}, 500
+
+    def _move_head(self, project_name, versions, current_head, target):
+        """Point the head at the target version and return only that version's content."""
+        # Matching on the head we read makes concurrent undo/redo clicks fail instead of skipping versions;
+        # None also matches projects created before the head pointer existed. Versions are immutable,
+        # so the pre-update document already holds the target version's content.
+        updated_doc = self.projects_collection.find_one_and_update(
+            {"project_name": project_name, "head": {"$in": [current_head, None]}},
+            {"$set": {"head": target}, "$inc": {"revision": 1}},
+            projection={"_id": 0, "versions": {"$elemMatch": {"version": target}}}
+        )
+        if not updated_doc or not updated_doc.get("versions"):
+            return {"error": "The project was changed concurrently. Please reload and try again."}, 409
+
+        target_version = self._resolve_content(project_name, updated_doc["versions"][0])
+        project_data = {
+            "domain_model_description": target_version.get("domain_model_description"),
+            "plant_uml": target_version.get("plant_uml"),
+            "version": target,
+            **self._navigation_state(versions, target)
+        }
+        return {"message": f"Project '{project_name}' is now at version {target}.", "project_data": project_data}, 200
+
+    def compaction_candidates(self, min_versions, batch_size=100, after_id=None):
+        """Return a cursor over projects holding more than min_versions versions, in _id order after after_id."""
+        query = {f"versions.{min_versions}": {"$exists": True}}
+        if after_id is not None:
+            query["_id"] = {"$gt": after_id}
+        return self.projects_collection.find(query, batch_size=batch_size).sort("_id", 1)
+
+    def compact_project(self, project_doc, kept):
+        """
+        Move every version not in kept to the archive collection.
+
+        Kept versions whose parent was archived are re-parented onto their nearest kept ancestor,
+        so undo skips the archived versions; version numbers never change. The chat turns of the
+        skipped ancestors stay on the kept version as archived_turns, so the chat history is
+        unchanged. The project is only rewritten if no other write happened since project_doc was read.
+
+        Returns:
+            int: The number of archived versions (0 when nothing changed or the project was busy).
+        """
+        if self.archive_collection is None:
+            raise RuntimeError("Archive collection not available.")
+        versions = project_doc.get("versions", [])
+        by_number = {version["version"]: version for version in versions}
+        archived = [version for version in versions if version["version"] not in kept]
+        if not archived:
+            return 0
+
+        remaining = []
+        for version in versions:
+            if version["version"] not in kept:
+                continue
+            parent = self._parent_of(version)
+            turns = []
+            while parent is not None and parent not in kept:
+                ancestor = by_number.get(parent)
+                if ancestor is None:
+                    parent = None
+                    break
+                turn = {key: ancestor[key] for key in ("user_input", "assistant") if ancestor.get(key)}
+                turns = ancestor.get("archived_turns", []) + ([turn] if turn else []) + turns
+                parent = self._parent_of(ancestor)
+            entry = {**version, "parent": parent}
+            if turns:
+                entry["archived_turns"] = turns + version.get("archived_turns", [])
+            remaining.append(entry)
+
+        from pymongo import ReplaceOne
+        # Archive first: ids are deterministic, so a retry after a failed or skipped update is harmless
+        archived_at = datetime.now()
+        self.archive_collection.bulk_write([
+            ReplaceOne({"_id": f"{project_doc['_id']}:{version['version']}"}, {
+                "_id": f"{project_doc['_id']}:{version['version']}",
+                "project_id": project_doc["_id"],
+                "project_name": project_doc.get("project_name"),
+                "version": version,
+                "archived_at": archived_at
+            }, upsert=True)
+            for version in archived
+        ], ordered=False)
+        result = self.projects_collection.update_one(
+            {"_id": project_doc["_id"], "revision": project_doc.get("revision")},
+            {"$set": {"versions": remaining}, "$inc": {"revision": 1}}
+        )
+        return len(archived) if result.modified_count > 0 else 0
+
+    def export_projects(self, batch_size=project_transfer.EXPORT_BATCH_SIZE):
+        """Return a generator of NDJSON lines, one per project with its version history."""
+        if self.projects_collection is None:
+            raise RuntimeError("Database connection not available.")
+        return project_transfer.iter_export(self.projects_collection, batch_size)
+
+    def import_projects(self, lines, batch_size=project_transfer.IMPORT_BATCH_SIZE, ordered=False, checkpoint=None):
+        """Bulk-import NDJSON project lines (see project_transfer.import_lines)."""
+        if self.projects_collection is None:
+            raise RuntimeError("Database connection not available.")
+        return project_transfer.import_lines(self.projects_collection, lines, batch_size, ordered, checkpoint)
@@ -0,0 +1,147 @@
+import hmac
+import json
+import os
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+# Admin secret for GET /export_projects via the X-Export-Token header; unset keeps export CLI-only
+EXPORT_TOKEN = os.getenv("EXPORT_TOKEN", "")
+
+
+def export_token_matches(candidate):
+    """Check a supplied token against EXPORT_TOKEN in constant time."""
+    return bool(EXPORT_TOKEN) and bool(candidate) and hmac.compare_digest(candidate.encode(), EXPORT_TOKEN.encode())
+
+
+def iter_export(collection, batch_size=EXPORT_BATCH_SIZE, query=None):
+    """
+    Yield every project as one line of NDJSON, including its full version history.
+
+    Documents are read through a batched cursor in _id order, so memory use does not grow with
+    the number of projects. Extended JSON keeps ObjectIds and dates intact for import_lines.
+
+    Args:
+        collection: The projects collection.
+        batch_size (int): Documents fetched per round trip.
+        query (dict): Optional filter, e.g. {"project_name": {"$in": [...]}}.
+    """
+    from bson import json_util
+    cursor = collection.find(query or {}, batch_size=batch_size).sort("_id", 1)
+    try:
+        for document in cursor:
+            yield json_util.dumps(document, json_options=json_util.RELAXED_JSON_OPTIONS) + "\n"
+    finally:
+        cursor.close()
+
+
+def _read_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path) as file:
+        return json.load(file).get("line", 0)
+
+
+def _write_checkpoint(path, line):
+    if not path:
+        return
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as file:
+        json.dump({"line": line}, file)
+    os.replace(temporary, path)
+
+
+def import_lines(collection, lines, batch_size=IMPORT_BATCH_SIZE, ordered=False, checkpoint=None):
+    """
+    Bulk-import projects from NDJSON lines produced by iter_export.
+
+    Each project replaces the document with the same _id (or is inserted), so re-running an
+    import is safe. After every batch the number of lines written without a gap is stored in
+    the checkpoint file; it never moves past a document that failed, even when later documents
+    of an unordered import succeeded. A later run with the same checkpoint skips those lines,
+    retrying the failed documents and rewriting what came after them. The checkpoint is
+    removed once an import finishes without failures. Lines that are not valid JSON, or documents
+    without an _id, count as failed documents at their line.
+
+    Args:
+        collection: The projects collection.
+        lines: Iterable of NDJSON lines (e.g. an open file).
+        batch_size (int): Documents per bulk write.
+        ordered (bool): Stop at the first failing document instead of writing the rest of the batch.
+        checkpoint (str): Optional path of the resume checkpoint file.
+
+    Returns:
+        dict: Counts of read, inserted and replaced projects, failed documents, the line of the
+        first failed document (None without failures), and whether the import stopped early.
+    """
+    from bson import json_util
+    from pymongo import ReplaceOne
+    from pymongo.errors import BulkWriteError
+    resume_from = _read_checkpoint(checkpoint)
+    summary = {"resumed_at_line": resume_from, "read": 0, "inserted": 0, "replaced": 0, "failed": 0,
+               "first_failed_line": None, "stopped": False}
+    operations = []
+    operation_lines = []  # input line number of each pending operation
+    line_number = 0
+
+    def flush():
+        try:
+            result = collection.bulk_write(operations, ordered=ordered)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            errors = details.get("writeErrors", [])
+            summary["failed"] += len(errors)
+            for error in errors[:5]:
+                print(f"Import error at batch index {error.get('index')}: {error.get('errmsg')}")
+            if errors and summary["first_failed_line"] is None:
+                summary["first_failed_line"] = operation_lines[min(error.get("index", 0) for error in errors)]
+            if ordered:
+                summary["stopped"] = True
+        summary["inserted"] += details.get("nUpserted", 0)
+        summary["replaced"] += details.get("nModified", 0)
+        operations.clear()
+        operation_lines.clear()
+
+    def advance(line):
+        # Resume after the last line written without a failure before it
+        if summary["first_failed_line"] is None:
+            _write_checkpoint(checkpoint, line)
+        else:
+            _write_checkpoint(checkpoint, summary["first_failed_line"] - 1)
+
+    for line_number, line in enumerate(lines, start=1):
+        if line_number <= resume_from or not line.strip():
+            continue
+        summary["read"] += 1
+        try:
+            document = json_util.loads(line)
+            operation = ReplaceOne({"_id": document["_id"]}, document, upsert=True)
+        except (ValueError, KeyError, TypeError) as e:
+            # Write the lines before it first, so failures are reported in line order
+            if operations:
+                flush()
+            if not summary["stopped"]:
+                print(f"Import error at line {line_number}: {e!r}")
+                summary["failed"] += 1
+                if summary["first_failed_line"] is None:
+                    summary["first_failed_line"] = line_number
+                summary["stopped"] = ordered
+            advance(line_number)
+            if summary["stopped"]:
+                return summary
+            continue
+        operations.append(operation)
+        operation_lines.append(line_number)
+        if len(operations) >= batch_size:
+            flush()
+            advance(line_number)
+            if summary["stopped"]:
+                return summary
+    if operations:
+        flush()
+        advance(line_number)
+        if summary["stopped"]:
+            return summary
+    if summary["first_failed_line"] is None and checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return summary
@@ -0,0 +1,360 @@
+import functools
+import json
+from types import MappingProxyType
+
+# Static prompt material of every LLM call site, built once at import and frozen.
+# Requests send it first and the variable content last, so consecutive calls of a call site
+# share a byte-identical prefix that the provider can serve from its prompt cache.
+# Bump a call site's version whenever its prompt material changes.
+PROMPT_VERSIONS = MappingProxyType({
+    "classification": "1",
+    "dmd_generation": "1",
+    "dmd_edit": "1",
+    "extraction": "4"
+})
+
+
+class _FrozenDict(dict):
+    """A dict that refuses changes; still a dict, so JSON encoding and the OpenAI client accept it."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Prompt constants are read-only")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def freeze(value):
+    """Recursively turn dicts into read-only dicts and lists into tuples."""
+    if isinstance(value, dict):
+        return _FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Return a mutable deep copy of frozen prompt material."""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+def system_message(text):
+    return {"role": "system", "content": [{"type": "text", "text": text}]}
+
+
+def user_message(text):
+    return {"role": "user", "content": [{"type": "text", "text": text}]}
+
+
+def assistant_message(text):
+    return {"role": "assistant", "content": [{"type": "text", "text": text}]}
+
+
+STRING = freeze({"type": "string"})
+
+
+# Classification (LLMService.determine_input_type)
+CLASSIFICATION_FUNCTIONS = freeze([
+    {
+        "name": "get_decision",
+        "description": "Returns a decision about domain model generation and appropriate response",
+        "parameters": {
+            "type": "object",
+            "required": ["decision", "is_update", "is_casual_comment", "is_style_change", "suggestions"],
+            "properties": {
+                "decision": {
+                    "type": "boolean",
+                    "description": "True if there's enough information for a domain model, False otherwise"
+                },
+                "is_update": {
+                    "type": "boolean", 
+                    "description": "True if this is an update to an existing domain model rather than a first request"
+                },
+                "is_casual_comment": {
+                    "type": "boolean",
+                    "description": "True if this is just a casual comment (like 'wow', 'nice') that doesn't require updating the domain model"
+                },
+                "is_style_change": {
+                    "type": "boolean",
+                    "description": "True if the user is requesting to change the style/formatting of the description without changing the domain content"
+                },
+                "style_type": {
+                    "type": "string",
+                    "description": "If is_style_change is true, specifies the requested style (e.g., 'shorter', 'technical', 'software_engineer')"
+                },
+                "suggestions": {
+                    "type": "array",
+                    "items": {
+                        "type": "string",
+                        "description": "A suggestion or response line"
+                    },
+                    "description": "Array of strings that form the complete response to show the user"
+                }
+            }
+        }
+    }
+])
+
+CLASSIFICATION_FUNCTION_CALL = freeze({"name": "get_decision"})
+
+CLASSIFICATION_SYSTEM_PROMPT = """You are an expert domain modeling engineer specialized in UML and domain-driven design.
+
+YOUR TASK: Analyze chat history to determine if a domain model can be generated, updated, if the message is a style change request, or if it's unrelated to domain modeling.
+
+MESSAGE CLASSIFICATION:
+1. INITIAL DOMAIN MODEL REQUEST: When user first describes multiple entities (3+) and relationships (2+) in their domain.
+   - Example: "I want to open a store with products, customers, and employees. Customers buy products and employees sell them."
+
+2. DOMAIN MODEL UPDATE: When user adds new entities or relationships to an existing model.
+   - Example: "Now I also want to add suppliers who provide products to the store."
+   - Look for phrases like "add", "also", "now include", "additionally"
+
+3. STYLE CHANGE REQUEST: User wants to change how the description is written, not the content.
+   - Examples: "make the description shorter", "can you write it from a software engineer's perspective", "simplify the description"
+   - For these, identify the specific style requested (shorter, technical, software_engineer, etc.)
+
+4. CASUAL COMMENT: Brief reactions that don't add domain information.
+   - Examples: "wow", "nice", "thank you", "looks good", "great", "awesome", "perfect"
+   - IMPORTANT: If a domain model exists and user sends ONLY praise/acknowledgment, classify as CASUAL
+
+5. QUESTION/CLARIFICATION: User asks about the domain model without adding new information.
+   - Example: "What does this relationship mean?" or "Can you explain this part?"
+
+6. OFF-TOPIC: Message unrelated to domain modeling.
+   - Example: "What's the weather today?"
+
+HOW TO DETERMINE IF A DOMAIN MODEL EXISTS:
+- Look for previous bot messages containing detailed entity descriptions
+- Look for phrases like "Here's the domain model" or "I've updated the domain model"
+
+RESPONSE GUIDELINES:
+- For STYLE CHANGE REQUESTS: Acknowledge the style change request.
+  "I've reformatted the domain model description as requested."
+  "I've made the description more technical as requested."
+
+- For CASUAL COMMENTS: Acknowledge without regenerating model. Use varied responses like:
+  "Glad you like it! Let me know if you want to add more entities or relationships."
+  "Thanks! I'm here if you need to make any changes to the model."
+
+- For DOMAIN MODEL UPDATES: Acknowledge changes and provide extension suggestions.
+  
+- For INITIAL REQUESTS: Neutral response with helpful suggestions.
+
+IMPORTANT: Response should be in bullet points(3 max).
+"""
+
+CLASSIFICATION_PREFIX = freeze([system_message(CLASSIFICATION_SYSTEM_PROMPT)])
+
+
+# Domain model description generation (LLMService.generate_domain_model_description)
+DMD_SYSTEM_PROMPT = (
+    "You are a domain modeling expert. Your task is to generate a structured, precise description of a domain model in clear, natural language."
+    "\n\nExample format: 'The following domain model describes the entities Salesperson, RepairPerson, Customer, and Bike. Salesperson, RepairPerson, and Customer are connected to the entity Bike through associations. The Salesperson is associated with the Bike entity with the description 'sells' and 1 Salesperson can sell many Bikes. The RepairPerson is associated with the Bike entity with the description 'repairs' and 1 RepairPerson can repair many Bikes. The Customer is associated with the Bike entity with the description 'buys' and 1 Customer can buy many Bikes."
+    "IMPORTANT: Only describe entities and relationships explicitly mentioned by the user. Do not add any additional entities, relationships, or functionalities that were not explicitly stated. Stick strictly to what the user has described. Focus on clarifying the existing entities and relationships without elaboration beyond the user's input."
+)
+
+DMD_PREFIX = freeze([system_message(DMD_SYSTEM_PROMPT)])
+
+
+# Incremental description updates (LLMService.update_domain_model_description)
+DMD_EDIT_SYSTEM_PROMPT = (
+    "You are a domain modeling expert maintaining a domain model description written in clear, natural language. "
+    "You receive the current description, one sentence per line with an anchor such as [S3], and the user's latest message. "
+    "Return only the edits needed to reflect the message: 'insert_after' adds a sentence after the anchored sentence "
+    "(anchor S0 inserts before the first one), 'replace' rewrites the anchored sentence, 'delete' removes it (use an empty text). "
+    "Keep the style of the existing sentences, e.g. 'The Customer is associated with the Order entity with the description "
+    "'places' and 1 Customer can place many Orders.' Update the sentence listing the entities when entities are added or removed. "
+    "Never include anchors in the text. Leave every other sentence untouched and return no edits when nothing needs to change. "
+    "Only describe entities and relationships explicitly stated by the user."
+)
+
+DMD_EDIT_RESPONSE_FORMAT = freeze({
+    "type": "json_schema",
+    "json_schema": {
+        "name": "domain_model_description_edits",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "edits": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "op": {"type": "string", "enum": ["insert_after", "replace", "delete"]},
+                            "anchor": STRING,
+                            "text": STRING
+                        },
+                        "required": ["op", "anchor", "text"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["edits"],
+            "additionalProperties": False
+        }
+    }
+})
+
+DMD_EDIT_PREFIX = freeze([system_message(DMD_EDIT_SYSTEM_PROMPT)])
+
+
+# UML extraction (gpt2.prompt)
+EXTRACTION_SECTIONS = ("attributes", "associations", "generalizations", "aggregations", "compositions")
+
+EXTRACTION_RESPONSE_FORMAT = freeze({
+    "type": "json_schema",
+    "json_schema": {
+        "name": "domain_model_extraction",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "attributes": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"entity": STRING, "property": STRING},
+                        "required": ["entity", "property"],
+                        "additionalProperties": False
+                    }
+                },
+                "associations": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"source": STRING, "sourceMultiplicity": STRING, "targetMultiplicity": STRING, "target": STRING, "relationship": STRING},
+                        "required": ["source", "sourceMultiplicity", "targetMultiplicity", "target", "relationship"],
+                        "additionalProperties": False
+                    }
+                },
+                "generalizations": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"superclass": STRING, "subclass": STRING},
+                        "required": ["superclass", "subclass"],
+                        "additionalProperties": False
+                    }
+                },
+                "aggregations": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"parent": STRING, "parentMultiplicity": STRING, "child": STRING, "childMultiplicity": STRING},
+                        "required": ["parent", "parentMultiplicity", "child", "childMultiplicity"],
+                        "additionalProperties": False
+                    }
+                },
+                "compositions": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {"parent": STRING, "child": STRING},
+                        "required": ["parent", "child"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["attributes", "associations", "generalizations", "aggregations", "compositions"],
+            "additionalProperties": False
+        }
+    }
+})
+
+# The fixed instructions, the output schema and a worked example form the static prefix. Providers
+# only cache prefixes from about PROMPT_CACHE_MIN_TOKENS tokens on, and the examples selected per
+# scenario come after it, so the prefix alone has to reach that length.
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+EXTRACTION_RULES = """You extract UML domain models from natural language descriptions of a domain.
+Read the whole description first, then return every entity's attributes, the associations between entities with both multiplicities and a short relationship name, the generalizations, the aggregations and the compositions it states. Leave a section empty when the text states nothing for it; never invent elements the text does not support.
+
+Entities:
+- An entity is a kind of thing the system keeps information about: a person, role, object, place, event or document. Use singular CamelCase names ("OrderLine", not "order lines" or "Order_Lines").
+- Named individuals ("Alice", "CameraCorp", "Flight LH123") are instances, not entities. Model the kind they belong to instead ("Customer", "Manufacturer", "Flight").
+- Use the same spelling for an entity everywhere in the answer, and prefer the term the text uses most often.
+- Do not model the system itself, the user of the system or the organisation that runs it unless the text gives it attributes or relationships.
+
+Attributes:
+- Attributes are simple values of one entity: names, numbers, dates, amounts, codes, flags and short texts. Use lowerCamelCase names ("birthDate", "serialNumber", "email").
+- A value that is itself an entity with its own relationships is an association, not an attribute.
+- An attribute stated for a superclass belongs to the superclass only; do not repeat it on the subclasses.
+
+Associations:
+- An association links two different entities (or an entity to itself) with a verb phrase read from source to target ("places", "is enrolled in", "refers to"). Choose the direction the sentence reads in.
+- sourceMultiplicity is how many source objects relate to one target object; targetMultiplicity is how many target objects relate to one source object.
+- Write multiplicities as "1", "0..1", "0..*", "1..*" or an explicit range such as "2..5". Use "0..*" for "many", "several" or "any number", "1..*" for "at least one" or "one or more", "0..1" for "at most one" or "optionally", and "1" for "exactly one" or "each ... has one".
+- When the text gives no number for one end, use "0..*" for that end.
+- Do not repeat as an association a relationship that is already a generalization, aggregation or composition.
+
+Generalizations:
+- A generalization states that every subclass object is also a superclass object: "Cars and vans are vehicles", "A manager is a kind of employee". The superclass is the more general entity.
+- Return one generalization per subclass.
+
+Aggregations and compositions:
+- A composition is a whole-part relationship where the part cannot exist without its whole and is deleted with it ("consists of", "is made up of", "only exists as part of"). The part belongs to exactly one whole.
+- An aggregation is a whole-part relationship where the part can exist on its own or be shared by several wholes ("holds", "groups", "can be transferred to another").
+- parentMultiplicity and childMultiplicity follow the association rules above. A whole-part relationship that is neither clearly dependent nor clearly independent is an aggregation."""
+
+EXTRACTION_EXAMPLE = """Example description:
+A travel agency sells trips to customers; a customer can book many trips, and each booking is for exactly one trip. Every trip consists of stages that are deleted together with the trip. Guides lead trips, and a guide leads at least one trip. Guides and drivers are employees with a staff number. A trip has a title and a price, and a customer has a name and an email address. The agency's fleet groups its buses, and a bus can be moved to another fleet.
+
+Example answer:
+""" + json.dumps({
+    "attributes": [
+        {"entity": "Employee", "property": "staffNumber"},
+        {"entity": "Trip", "property": "title"},
+        {"entity": "Trip", "property": "price"},
+        {"entity": "Customer", "property": "name"},
+        {"entity": "Customer", "property": "email"}
+    ],
+    "associations": [
+        {"source": "TravelAgency", "sourceMultiplicity": "1", "targetMultiplicity": "0..*", "target": "Trip", "relationship": "sells"},
+        {"source": "Customer", "sourceMultiplicity": "1", "targetMultiplicity": "0..*", "target": "Booking", "relationship": "makes"},
+        {"source": "Booking", "sourceMultiplicity": "0..*", "targetMultiplicity": "1", "target": "Trip", "relationship": "is for"},
+        {"source": "Guide", "sourceMultiplicity": "0..*", "targetMultiplicity": "1..*", "target": "Trip", "relationship": "leads"}
+    ],
+    "generalizations": [
+        {"superclass": "Employee", "subclass": "Guide"},
+        {"superclass": "Employee", "subclass": "Driver"}
+    ],
+    "aggregations": [
+        {"parent": "Fleet", "parentMultiplicity": "1", "child": "Bus", "childMultiplicity": "0..*"}
+    ],
+    "compositions": [
+        {"parent": "Trip", "child": "Stage"}
+    ]
+}, indent=1)
+
+EXTRACTION_SYSTEM_PROMPT = "\n\n".join([
+    EXTRACTION_RULES,
+    "Answer with one JSON object with exactly these sections; every field is a string:\n"
+    + json.dumps(EXTRACTION_RESPONSE_FORMAT["json_schema"]["schema"]["properties"], sort_keys=True),
+    EXTRACTION_EXAMPLE
+])
+
+EXTRACTION_PREFIX = freeze([system_message(EXTRACTION_SYSTEM_PROMPT)])
+
+
+@functools.lru_cache(maxsize=None)
+def response_format_for(sections=None):
+    """
+    The extraction response format, restricted to the given sections when set.
+
+    Args:
+        sections (tuple): Section names in EXTRACTION_SECTIONS order, or None for all.
+    """
+    if not sections:
+        return EXTRACTION_RESPONSE_FORMAT
+    response_format = thaw(EXTRACTION_RESPONSE_FORMAT)
+    schema = response_format["json_schema"]["schema"]
+    schema["properties"] = {name: schema["properties"][name] for name in sections}
+    schema["required"] = list(sections)
+    return freeze(response_format)
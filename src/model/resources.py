@@ -0,0 +1,44 @@
+import os
+import threading
+
+DATABASE_NAME = "domain_modelling_copilot"
+
+_lock = threading.Lock()
+_environment_loaded = False
+_mongo_client = None
+
+
+def load_environment():
+    """Load .env into the environment once per process; later calls are no-ops."""
+    global _environment_loaded
+    if _environment_loaded:
+        return
+    with _lock:
+        if not _environment_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _environment_loaded = True
+
+
+def get_mongo_client():
+    """
+    Return the process-wide MongoClient, creating it on first use.
+
+    pymongo is imported here rather than at module level so importing the app stays fast. The
+    client connects lazily and keeps one connection pool shared by every service.
+    """
+    global _mongo_client
+    if _mongo_client is None:
+        load_environment()
+        with _lock:
+            if _mongo_client is None:
+                from pymongo import MongoClient
+                mongo_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
+                print(f"Connecting to MongoDB at: {mongo_uri}")
+                _mongo_client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
+    return _mongo_client
+
+
+def get_database():
+    """Return the application database on the shared client."""
+    return get_mongo_client().get_database(DATABASE_NAME)
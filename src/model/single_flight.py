@@ -0,0 +1,181 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from src.model.metrics import SINGLE_FLIGHT_CALLS
+from src.model.resources import get_database
+
+# "mongo" also coalesces identical calls across worker processes through a shared collection
+SINGLE_FLIGHT_SHARED = os.getenv("SINGLE_FLIGHT_SHARED", "").lower()
+# How long a worker waits for another worker's result before making the call itself
+SINGLE_FLIGHT_WAIT_SECONDS = float(os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", "90"))
+SINGLE_FLIGHT_POLL_SECONDS = 0.25
+# Finished results stay readable this long for followers that poll late; a TTL index removes them later
+SINGLE_FLIGHT_RESULT_GRACE_SECONDS = 5
+
+
+def fingerprint(*parts):
+    """Hash the parts of a request that determine its result."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """One in-flight call that followers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _SharedStore:
+    """MongoDB collection that lets workers see each other's in-flight calls and results."""
+
+    def __init__(self):
+        self._collection = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    def collection(self):
+        if self._collection is not None or self._failed:
+            return self._collection
+        with self._lock:
+            if self._collection is None and not self._failed:
+                try:
+                    collection = get_database().get_collection("inflight_requests")
+                    collection.create_index("expires_at", expireAfterSeconds=0)
+                    self._collection = collection
+                except Exception as e:
+                    print(f"Single-flight store unavailable, coalescing within this worker only: {e}")
+                    self._failed = True
+        return self._collection
+
+
+_shared_store = _SharedStore()
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key into one upstream call.
+
+    The first caller (the leader) runs the function; callers arriving while it runs wait and
+    receive a copy of its result, or its exception. Nothing is cached after the call finishes.
+    """
+
+    def __init__(self, name, shared=SINGLE_FLIGHT_SHARED == "mongo"):
+        self.name = name
+        self.shared = shared
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        """
+        Run function once for all concurrent callers with the same key.
+
+        Args:
+            key (str): Request fingerprint (see fingerprint()).
+            function: Zero-argument callable making the upstream call.
+
+        Returns:
+            The function's result; followers get a deep copy so they cannot affect each other.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            SINGLE_FLIGHT_CALLS.inc(name=self.name, role="follower")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = self._run_shared(key, function) if self.shared else self._run(function)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _run(self, function):
+        SINGLE_FLIGHT_CALLS.inc(name=self.name, role="leader")
+        return function()
+
+    def _run_shared(self, key, function):
+        """Lead the call across workers, or wait for the worker that already leads it."""
+        collection = _shared_store.collection()
+        if collection is None:
+            return self._run(function)
+
+        entry_id = f"{self.name}:{key}"
+        owner = uuid.uuid4().hex
+        try:
+            claimed = self._claim(collection, entry_id, owner)
+        except Exception as e:
+            print(f"Error registering shared single-flight call: {e}")
+            return self._run(function)
+        if not claimed:
+            result = self._wait_shared(collection, entry_id)
+            if result is not None:
+                return result
+            # The other worker failed or took too long: make the call ourselves
+            return self._run(function)
+
+        try:
+            result = self._run(function)
+        except Exception as e:
+            collection.update_one({"_id": entry_id, "owner": owner},
+                                  {"$set": {"status": "error", "error": str(e), "expires_at": datetime.utcnow()}})
+            raise
+        try:
+            collection.update_one({"_id": entry_id, "owner": owner}, {"$set": {
+                "status": "done",
+                "result": json.dumps(result),
+                "is_tuple": isinstance(result, tuple),
+                "expires_at": datetime.utcnow() + timedelta(seconds=SINGLE_FLIGHT_RESULT_GRACE_SECONDS)
+            }})
+        except Exception as e:
+            print(f"Error publishing shared single-flight result: {e}")
+        return result
+
+    def _claim(self, collection, entry_id, owner):
+        """Become the leader for a key unless a live entry exists; expired entries are taken over."""
+        from pymongo.errors import DuplicateKeyError
+        lease = {
+            "owner": owner,
+            "status": "pending",
+            "expires_at": datetime.utcnow() + timedelta(seconds=SINGLE_FLIGHT_WAIT_SECONDS)
+        }
+        try:
+            collection.insert_one({"_id": entry_id, **lease})
+            return True
+        except DuplicateKeyError:
+            result = collection.update_one({"_id": entry_id, "expires_at": {"$lt": datetime.utcnow()}},
+                                           {"$set": lease, "$unset": {"result": "", "error": ""}})
+            return result.modified_count > 0
+
+    def _wait_shared(self, collection, entry_id):
+        """Poll for another worker's result; returns None when it failed or did not finish in time."""
+        deadline = time.monotonic() + SINGLE_FLIGHT_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            entry = collection.find_one({"_id": entry_id})
+            if entry is None or entry["status"] == "error" or entry["expires_at"] < datetime.utcnow():
+                # Gone, failed, or abandoned by a worker that died
+                return None
+            if entry["status"] == "done":
+                SINGLE_FLIGHT_CALLS.inc(name=self.name, role="shared_follower")
+                result = json.loads(entry["result"])
+                return tuple(result) if entry.get("is_tuple") else result
+            time.sleep(SINGLE_FLIGHT_POLL_SECONDS)
+        return None
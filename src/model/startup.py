@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+
+# Warm up connections and controllers in the background as soon as the app is imported
+PREWARM_ON_START = os.getenv("PREWARM_ON_START", "1").lower() not in ("0", "false", "no")
+# Also open a connection to the OpenAI API during warm-up (one cheap models.list call)
+PREWARM_LLM = os.getenv("PREWARM_LLM", "1").lower() not in ("0", "false", "no")
+# After startup, readiness re-checks the database at most this often
+READINESS_CHECK_SECONDS = 5
+
+
+class StartupState:
+    """Progress of the startup phase and the cached readiness of the database."""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.phases = {}  # name -> {"ok", "seconds", "error"}
+        self.done = threading.Event()
+        self._database_ok = False
+        self._database_checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, name, started, error=None):
+        with self._lock:
+            self.phases[name] = {
+                "ok": error is None,
+                "seconds": round(time.monotonic() - started, 3),
+                **({"error": str(error)} if error is not None else {})
+            }
+            if name == "database":
+                self._database_ok = error is None
+                self._database_checked_at = time.monotonic()
+
+    def database_ok(self):
+        """Whether the database answered a ping recently; pings again when the last result is stale."""
+        with self._lock:
+            fresh = time.monotonic() - self._database_checked_at < READINESS_CHECK_SECONDS
+            if fresh:
+                return self._database_ok
+        started = time.monotonic()
+        try:
+            _ping_database()
+            self.record("database", started)
+        except Exception as e:
+            self.record("database", started, e)
+        return self._database_ok
+
+
+state = StartupState()
+
+
+def _ping_database():
+    from src.model.resources import get_mongo_client
+    get_mongo_client().admin.command("ping")
+
+
+def _warm_llm():
+    from src.model.openai_client import OpenAIClient
+    client = OpenAIClient.get_client()
+    if PREWARM_LLM:
+        # Establishes the pooled HTTPS connection that the first chat request would otherwise open
+        client.with_options(timeout=10, max_retries=0).models.list()
+
+
+def prewarm(build_controllers):
+    """
+    Run the startup phases concurrently: ping the database, open the LLM connection and build
+    the controllers (which imports the slow modules). Marks the state done when all finished.
+    """
+    phases = {"database": _ping_database, "llm": _warm_llm, "controllers": build_controllers}
+
+    def run(name, function):
+        started = time.monotonic()
+        try:
+            function()
+            state.record(name, started)
+        except Exception as e:
+            print(f"Startup phase '{name}' failed: {e}")
+            state.record(name, started, e)
+
+    # Daemon threads, so a process that only imports the app can still exit immediately
+    threads = [threading.Thread(target=run, args=(name, function), name=f"prewarm-{name}", daemon=True)
+               for name, function in phases.items()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    state.done.set()
+    print(f"Startup finished in {time.monotonic() - state.started_at:.2f}s: "
+          + ", ".join(f"{name} {'ok' if phase['ok'] else 'failed'}" for name, phase in state.phases.items()))
+
+
+def start(build_controllers):
+    """Start the startup phase in the background, unless PREWARM_ON_START is off."""
+    if not PREWARM_ON_START:
+        state.done.set()
+        return None
+    thread = threading.Thread(target=prewarm, args=(build_controllers,), name="startup", daemon=True)
+    thread.start()
+    return thread
+
+
+def liveness():
+    """The process is up and serving requests."""
+    return {"status": "ok", "uptime_seconds": round(time.monotonic() - state.started_at, 1)}
+
+
+def readiness():
+    """
+    Whether the instance should receive traffic: startup has finished, the controllers were
+    built and the database answers. A failed LLM warm-up is reported but does not block traffic.
+
+    Returns:
+        tuple: (ready, details dict)
+    """
+    if not state.done.is_set():
+        return False, {"status": "starting", "phases": dict(state.phases)}
+    controllers = state.phases.get("controllers")
+    ready = (controllers is None or controllers["ok"]) and state.database_ok()
+    return ready, {"status": "ready" if ready else "not_ready", "phases": dict(state.phases)}
@@ -0,0 +1,236 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from src.model.domain_model_ir import (DomainModel, canonical_entity_key,
+                                       ASSOCIATION, GENERALIZATION, AGGREGATION, COMPOSITION)
+from src.model.svg_renderer import model_hash
+
+# Answer structural questions about the current model from its index instead of the LLM
+LOCAL_ANSWERS_ENABLED = os.getenv("LOCAL_ANSWERS", "1").lower() not in ("0", "false", "no")
+# Indexes kept in memory (least recently used are dropped), shared by versions and projects with the same model
+STRUCTURE_INDEX_CACHE_SIZE = int(os.getenv("STRUCTURE_INDEX_CACHE_SIZE", "256"))
+
+_indexes = OrderedDict()  # model hash -> StructureIndex
+_lock = threading.Lock()
+
+_WORD = re.compile(r"[A-Za-z0-9_]+")
+_MAX_NAME_WORDS = 3
+# Messages that ask for a change are never answered locally, even when phrased as a question
+_CHANGE_REQUEST = re.compile(
+    r"\b(add|adding|remove|delete|drop|rename|change|replace|update|modify|make|should|could|can you|let'?s|"
+    r"also|instead|now|include|introduce|create|merge|split|move)\b", re.IGNORECASE)
+# Only messages that open as a question or a request to list something are looked up
+_QUESTION = re.compile(r"^\s*(what|which|who|how|does|do|is|are|list|show|tell)\b", re.IGNORECASE)
+# Hypotheticals ("What if Customer had an email?") are modelling discussions for the LLM
+_HYPOTHETICAL = re.compile(r"\b(if|suppose|supposing|imagine|would|were|had)\b", re.IGNORECASE)
+_ENTITY_LIST = re.compile(r"\b(entities|classes)\b", re.IGNORECASE)
+_ATTRIBUTES = re.compile(r"\b(attributes?|properties|property|fields?)\b", re.IGNORECASE)
+_INHERITANCE = re.compile(r"\b(inherit\w*|superclass\w*|subclass\w*|parent class|child class\w*|extends?|"
+                          r"specializ\w*|generaliz\w*|kinds? of|types? of)\b", re.IGNORECASE)
+_RELATIONS = re.compile(r"\b(relat\w*|connect\w*|associat\w*|linked|links?|multiplicit\w*|how many|"
+                        r"cardinalit\w*|aggregat\w*|compos\w*)\b", re.IGNORECASE)
+# The word after "related to", "connected with", ... names the other end of the question
+_RELATED_TO = re.compile(r"\b(?:relat\w*|connect\w*|link\w*|associat\w*)\s+(?:to|with)\s+(?:an?\s+|the\s+)?(\w+)",
+                         re.IGNORECASE)
+_GENERIC_WORDS = {"other", "others", "another", "any", "anything", "each", "every", "which", "what", "whom",
+                  "it", "them", "something", "entity", "entities", "class", "classes"}
+
+
+class StructureIndex:
+    """
+    Lookup tables over one structured domain model: attributes, incoming and outgoing relations
+    with their multiplicities, and the inheritance chain of every entity.
+    """
+
+    def __init__(self, data):
+        model = DomainModel.from_extraction(data or {})
+        self.entities = list(model.entities)
+        self.attributes = {name: list(entity.attributes) for name, entity in model.entities.items()}
+        self.outgoing = {name: model.outgoing(name) for name in self.entities}
+        self.incoming = {name: model.incoming(name) for name in self.entities}
+        self.superclasses = {name: [relation.source for relation in model.incoming(name, GENERALIZATION)]
+                             for name in self.entities}
+        self.subclasses = {name: [relation.target for relation in model.outgoing(name, GENERALIZATION)]
+                           for name in self.entities}
+        self._names = {canonical_entity_key(name): name for name in self.entities}
+
+    def _matches(self, words):
+        """(entity, first word, word count) of every entity name in a list of words; longest names win."""
+        matches = []
+        position = 0
+        while position < len(words):
+            for size in range(min(_MAX_NAME_WORDS, len(words) - position), 0, -1):
+                name = self._names.get(canonical_entity_key("".join(words[position:position + size])))
+                if name is not None:
+                    matches.append((name, position, size))
+                    position += size
+                    break
+            else:
+                position += 1
+        return matches
+
+    def find_entities(self, text):
+        """Return the entities mentioned in text, in order of appearance; longest names win."""
+        found = []
+        for name, _, _ in self._matches(_WORD.findall(text)):
+            if name not in found:
+                found.append(name)
+        return found
+
+    def names_unknown_entity(self, text):
+        """
+        Whether text names something that is not an entity of the model: a capitalized word
+        after the first that is not part of an entity name, or the other end of "related to ...".
+        """
+        words = _WORD.findall(text)
+        covered = {position for _, start, size in self._matches(words) for position in range(start, start + size)}
+        if any(position not in covered and word[0].isupper() and word != "I"
+               for position, word in enumerate(words) if position):
+            return True
+        for match in _RELATED_TO.finditer(text):
+            if match.group(1).lower() in _GENERIC_WORDS:
+                continue
+            following = _WORD.findall(text[match.start(1):])
+            if not any(start == 0 for _, start, _ in self._matches(following)):
+                return True
+        return False
+
+    def inheritance_chain(self, name):
+        """Superclasses of an entity, nearest first, stopping at cycles."""
+        chain = []
+        current = name
+        while self.superclasses.get(current):
+            current = self.superclasses[current][0]
+            if current in chain or current == name:
+                break
+            chain.append(current)
+        return chain
+
+    def relations_of(self, name):
+        """Every relation touching an entity, outgoing first."""
+        return self.outgoing.get(name, []) + [relation for relation in self.incoming.get(name, [])
+                                              if relation.source != relation.target]
+
+    def between(self, first, second):
+        """Relations connecting two entities, in either direction."""
+        return [relation for relation in self.relations_of(first) if {relation.source, relation.target} == {first, second}]
+
+    def answer(self, question):
+        """
+        Answer a structural question about the model, or return None when it needs the LLM.
+
+        Returns:
+            tuple: (question kind, answer text) or None.
+        """
+        if (not self.entities or not _QUESTION.search(question) or _CHANGE_REQUEST.search(question)
+                or _HYPOTHETICAL.search(question) or self.names_unknown_entity(question)):
+            return None
+        mentioned = self.find_entities(question)
+        if not mentioned and _ENTITY_LIST.search(question):
+            return "entities", "The domain model contains these entities:\n" + "\n".join(
+                f"- {name}" for name in self.entities)
+        if len(mentioned) == 1 and _ATTRIBUTES.search(question):
+            name = mentioned[0]
+            inherited = [(superclass, attribute) for superclass in self.inheritance_chain(name)
+                         for attribute in self.attributes.get(superclass, [])]
+            if not self.attributes[name] and not inherited:
+                return "attributes", f"{name} has no attributes in the current domain model."
+            lines = [f"- {attribute}" for attribute in self.attributes[name]]
+            lines += [f"- {attribute} (inherited from {superclass})" for superclass, attribute in inherited]
+            return "attributes", f"{name} has these attributes:\n" + "\n".join(lines)
+        if len(mentioned) == 1 and _INHERITANCE.search(question):
+            name = mentioned[0]
+            chain, subclasses = self.inheritance_chain(name), self.subclasses[name]
+            lines = []
+            if chain:
+                lines.append(f"- {name} inherits from " + " → ".join(chain))
+            if subclasses:
+                lines.append(f"- Subclasses of {name}: " + ", ".join(subclasses))
+            if not lines:
+                lines.append(f"- {name} has no superclass and no subclasses")
+            return "inheritance", "\n".join(lines)
+        if len(mentioned) == 2 and (_RELATIONS.search(question) or _INHERITANCE.search(question)):
+            relations = self.between(*mentioned)
+            if not relations:
+                return "relation", f"{mentioned[0]} and {mentioned[1]} are not directly related in the current domain model."
+            return "relation", "\n".join(f"- {describe_relation(relation)}" for relation in relations)
+        if len(mentioned) == 1 and _RELATIONS.search(question):
+            name = mentioned[0]
+            relations = self.relations_of(name)
+            if not relations:
+                return "relations", f"{name} has no relationships in the current domain model."
+            return "relations", f"{name} is related to:\n" + "\n".join(
+                f"- {describe_relation(relation)}" for relation in relations)
+        return None
+
+
+def describe_relation(relation):
+    """One readable line for a relation, including its multiplicities."""
+    if relation.kind == ASSOCIATION:
+        text = f"{relation.source} {relation.label or 'is associated with'} {relation.target}"
+        if relation.source_multiplicity or relation.target_multiplicity:
+            text += (f" ({relation.source_multiplicity or '?'} {relation.source} to "
+                     f"{relation.target_multiplicity or '?'} {relation.target})")
+        return text
+    if relation.kind == GENERALIZATION:
+        return f"{relation.target} is a kind of {relation.source}"
+    if relation.kind == AGGREGATION:
+        return (f"{relation.source} has {relation.target} (aggregation, {relation.source_multiplicity or '?'} "
+                f"{relation.source} to {relation.target_multiplicity or '?'} {relation.target})")
+    if relation.kind == COMPOSITION:
+        return f"{relation.source} is composed of {relation.target} (composition)"
+    return f"{relation.source} {relation.kind} {relation.target}"
+
+
+def _index_for(data, key=None):
+    key = key or model_hash(data)
+    with _lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+    index = StructureIndex(data)
+    with _lock:
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > STRUCTURE_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
+
+
+def record(data, key=None):
+    """
+    Index the structured model of a newly saved version.
+
+    Versions and projects that carry the same model share one index.
+    """
+    if not data:
+        return
+    try:
+        _index_for(data, key)
+    except Exception as e:
+        print(f"Error indexing domain model {key or ''}: {e}")
+
+
+def get_index(key, load):
+    """
+    Return the index of a structured model, or None when there is none.
+
+    Indexes are keyed by the model hash stored on the version, so they never go stale when
+    another worker attaches a model or renames the project.
+
+    Args:
+        key: The version's model hash, or None when it has none stored (older versions).
+        load: Called on a miss to fetch the version's structured model (or None).
+    """
+    if key is not None:
+        with _lock:
+            index = _indexes.get(key)
+            if index is not None:
+                _indexes.move_to_end(key)
+                return index
+    data = load()
+    if not data:
+        return None
+    return _index_for(data, key)
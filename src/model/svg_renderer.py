@@ -0,0 +1,261 @@
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from xml.sax.saxutils import escape
+from src.model.domain_model_ir import DomainModel
+
+# Drawing constants (pixels)
+FONT_SIZE = 12
+CHAR_WIDTH = 7
+LINE_HEIGHT = 18
+BOX_PADDING = 10
+MIN_BOX_WIDTH = 90
+COLUMN_GAP = 70
+ROW_GAP = 90
+MARGIN = 30
+
+# Part of every SVG ETag, so clients holding output of an older renderer revalidate to the new one.
+# Bump it whenever the rendered output changes (layout, styling, labels).
+RENDERER_VERSION = "2"
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_size = int(os.getenv("SVG_RENDER_CACHE_SIZE", "256"))
+
+
+def model_hash(data):
+    """
+    Compute a stable hash of a structured domain model.
+
+    Args:
+        data (dict): The extraction produced by gpt2.process_response.
+
+    Returns:
+        str: Hex digest that is identical for identical models regardless of key order.
+    """
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def render_svg(data):
+    """
+    Render a structured domain model as an SVG class diagram, reusing cached output.
+
+    Args:
+        data (dict): The extraction produced by gpt2.process_response.
+
+    Returns:
+        tuple: (svg text, model hash)
+    """
+    key = model_hash(data)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key], key
+
+    svg = _draw(data)
+
+    with _cache_lock:
+        _cache[key] = svg
+        _cache.move_to_end(key)
+        while len(_cache) > _cache_size:
+            _cache.popitem(last=False)
+    return svg, key
+
+
+def _collect(data):
+    """Gather entities (in first-seen order), their attributes and the edges to draw from the IR."""
+    model = DomainModel.from_extraction(data)
+    entities = OrderedDict((entity.name, entity.attributes) for entity in model.entities.values())
+    # Edges point from the owning end (association source, superclass, whole) to the dependent end
+    edges = [{
+        "kind": relation.kind,
+        "source": relation.source,
+        "target": relation.target,
+        "source_label": relation.source_multiplicity or "",
+        "target_label": relation.target_multiplicity or "",
+        "label": relation.label or ""
+    } for relation in model.relations]
+    return entities, edges
+
+
+def _layers(entities, edges):
+    """Assign each entity a layer so superclasses and wholes sit above their subclasses and parts."""
+    hierarchy = [edge for edge in edges if edge["kind"] != "association" and edge["source"] != edge["target"]]
+    incoming = {name: 0 for name in entities}
+    children = {name: [] for name in entities}
+    for edge in hierarchy:
+        incoming[edge["target"]] += 1
+        children[edge["source"]].append(edge["target"])
+
+    layer = {name: 0 for name in entities}
+    queue = [name for name in entities if incoming[name] == 0]
+    while queue:
+        name = queue.pop(0)
+        for child in children[name]:
+            layer[child] = max(layer[child], layer[name] + 1)
+            incoming[child] -= 1
+            if incoming[child] == 0:
+                queue.append(child)
+    # Entities left with incoming edges are on a cycle; their provisional layer is kept
+
+    rows = {}
+    for name in entities:
+        rows.setdefault(layer[name], []).append(name)
+
+    # Wrap very wide layers so association-only models do not become a single long row
+    max_per_row = max(4, math.ceil(math.sqrt(len(entities)) * 1.5))
+    wrapped = []
+    for index in sorted(rows):
+        row = rows[index]
+        for start in range(0, len(row), max_per_row):
+            wrapped.append(row[start:start + max_per_row])
+    return wrapped
+
+
+def _order_rows(rows, edges):
+    """Order each row by the mean position of its neighbours in the row above to reduce crossings."""
+    neighbours = {}
+    for edge in edges:
+        neighbours.setdefault(edge["source"], []).append(edge["target"])
+        neighbours.setdefault(edge["target"], []).append(edge["source"])
+
+    position = {name: index for index, name in enumerate(rows[0])} if rows else {}
+    for row in rows[1:]:
+        original = {name: index for index, name in enumerate(row)}
+
+        def barycenter(name, original=original):
+            placed = [position[other] for other in neighbours.get(name, []) if other in position]
+            return sum(placed) / len(placed) if placed else original[name]
+        row.sort(key=barycenter)
+        position.update({name: index for index, name in enumerate(row)})
+    return rows
+
+
+def _box_size(name, attributes):
+    """Return (width, height) of an entity box."""
+    longest = max([len(name)] + [len(attr) + 2 for attr in attributes])
+    width = max(MIN_BOX_WIDTH, longest * CHAR_WIDTH + 2 * BOX_PADDING)
+    height = LINE_HEIGHT + BOX_PADDING * 2 + max(1, len(attributes)) * LINE_HEIGHT
+    return width, height
+
+
+def _layout(entities, edges):
+    """Compute box geometry {name: (x, y, width, height)} and the canvas size."""
+    rows = _order_rows(_layers(entities, edges), edges)
+    sizes = {name: _box_size(name, attributes) for name, attributes in entities.items()}
+
+    row_widths = [sum(sizes[name][0] for name in row) + COLUMN_GAP * (len(row) - 1) for row in rows]
+    canvas_width = (max(row_widths) if row_widths else 0) + 2 * MARGIN
+
+    boxes = {}
+    y = MARGIN
+    for row, row_width in zip(rows, row_widths):
+        x = (canvas_width - row_width) / 2
+        row_height = max(sizes[name][1] for name in row)
+        for name in row:
+            width, height = sizes[name]
+            boxes[name] = (x, y, width, height)
+            x += width + COLUMN_GAP
+        y += row_height + ROW_GAP
+    canvas_height = y - ROW_GAP + MARGIN if rows else 2 * MARGIN
+    return boxes, canvas_width, canvas_height
+
+
+def _border_point(box, toward):
+    """Return where the line from the box centre toward a point leaves the box."""
+    x, y, width, height = box
+    cx, cy = x + width / 2, y + height / 2
+    dx, dy = toward[0] - cx, toward[1] - cy
+    if dx == 0 and dy == 0:
+        return cx, cy
+    scale = min(
+        (width / 2) / abs(dx) if dx else float("inf"),
+        (height / 2) / abs(dy) if dy else float("inf")
+    )
+    return cx + dx * scale, cy + dy * scale
+
+
+def _text(x, y, content, anchor="start", weight="normal", size=FONT_SIZE):
+    return (f'<text x="{x:.1f}" y="{y:.1f}" font-size="{size}" text-anchor="{anchor}" '
+            f'font-weight="{weight}">{escape(str(content))}</text>')
+
+
+def _draw_edge(edge, boxes):
+    """Draw one relation as a line with its UML end marker, multiplicities and label."""
+    source_box, target_box = boxes[edge["source"]], boxes[edge["target"]]
+    source_center = (source_box[0] + source_box[2] / 2, source_box[1] + source_box[3] / 2)
+    target_center = (target_box[0] + target_box[2] / 2, target_box[1] + target_box[3] / 2)
+    x1, y1 = _border_point(source_box, target_center)
+    x2, y2 = _border_point(target_box, source_center)
+
+    if edge["source"] == edge["target"]:
+        # Self relation: loop on the right-hand side of the box
+        x, y, width, height = source_box
+        right, top = x + width, y + height / 3
+        parts = [f'<path d="M{right:.1f},{top:.1f} h30 v{height / 3:.1f} h-30" fill="none" class="edge"/>']
+        if edge.get("label"):
+            parts.append(_text(right + 34, top + height / 6 + 4, edge["label"]))
+        return "\n".join(parts)
+
+    markers = {
+        "generalization": ' marker-start="url(#generalization)"',
+        "aggregation": ' marker-start="url(#aggregation)"',
+        "composition": ' marker-start="url(#composition)"'
+    }
+    parts = [f'<line x1="{x1:.1f}" y1="{y1:.1f}" x2="{x2:.1f}" y2="{y2:.1f}" class="edge"{markers.get(edge["kind"], "")}/>']
+
+    # Multiplicities sit just off each end of the line
+    length = math.hypot(x2 - x1, y2 - y1) or 1
+    ux, uy = (x2 - x1) / length, (y2 - y1) / length
+    offset_x, offset_y = -uy * 8, ux * 8
+    if edge.get("source_label"):
+        parts.append(_text(x1 + ux * 22 + offset_x, y1 + uy * 22 + offset_y + 4, edge["source_label"], "middle", size=11))
+    if edge.get("target_label"):
+        parts.append(_text(x2 - ux * 22 + offset_x, y2 - uy * 22 + offset_y + 4, edge["target_label"], "middle", size=11))
+    if edge.get("label"):
+        parts.append(_text((x1 + x2) / 2 - offset_x, (y1 + y2) / 2 - offset_y + 4, edge["label"], "middle", size=11))
+    return "\n".join(parts)
+
+
+def _draw_box(name, attributes, box):
+    """Draw an entity as a UML class box with a name compartment and an attribute compartment."""
+    x, y, width, height = box
+    header = LINE_HEIGHT + BOX_PADDING
+    parts = [
+        f'<rect x="{x:.1f}" y="{y:.1f}" width="{width:.1f}" height="{height:.1f}" class="entity"/>',
+        _text(x + width / 2, y + BOX_PADDING + FONT_SIZE, name, "middle", "bold"),
+        f'<line x1="{x:.1f}" y1="{y + header:.1f}" x2="{x + width:.1f}" y2="{y + header:.1f}" class="divider"/>'
+    ]
+    for index, attr in enumerate(attributes):
+        parts.append(_text(x + BOX_PADDING, y + header + BOX_PADDING / 2 + FONT_SIZE + index * LINE_HEIGHT, f"+{attr}"))
+    return "\n".join(parts)
+
+
+def _draw(data):
+    """Lay out and draw the full diagram."""
+    entities, edges = _collect(data)
+    boxes, width, height = _layout(entities, edges)
+
+    body = [_draw_edge(edge, boxes) for edge in edges]
+    body += [_draw_box(name, attributes, boxes[name]) for name, attributes in entities.items()]
+
+    return "\n".join([
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}" '
+        f'viewBox="0 0 {width:.0f} {height:.0f}" font-family="Helvetica, Arial, sans-serif">',
+        "<defs>",
+        '<marker id="generalization" viewBox="0 0 20 20" refX="0" refY="10" markerWidth="14" markerHeight="14" orient="auto">'
+        '<path d="M0,10 L20,0 L20,20 Z" fill="#fff" stroke="#333"/></marker>',
+        '<marker id="aggregation" viewBox="0 0 24 12" refX="0" refY="6" markerWidth="18" markerHeight="9" orient="auto">'
+        '<path d="M0,6 L12,0 L24,6 L12,12 Z" fill="#fff" stroke="#333"/></marker>',
+        '<marker id="composition" viewBox="0 0 24 12" refX="0" refY="6" markerWidth="18" markerHeight="9" orient="auto">'
+        '<path d="M0,6 L12,0 L24,6 L12,12 Z" fill="#333" stroke="#333"/></marker>',
+        "</defs>",
+        "<style>.entity{fill:#fefece;stroke:#a80036;stroke-width:1.2}.divider{stroke:#a80036}"
+        ".edge{stroke:#333;stroke-width:1.2}text{fill:#222}</style>",
+        *body,
+        "</svg>"
+    ])
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+
+# Newest versions kept in full in the project document
+RETENTION_KEEP_VERSIONS = int(os.getenv("RETENTION_KEEP_VERSIONS", "50"))
+# Older versions whose number is a multiple of this are kept as milestones
+RETENTION_MILESTONE_EVERY = int(os.getenv("RETENTION_MILESTONE_EVERY", "10"))
+# At most this many milestones (the newest ones) are kept besides the initial version
+RETENTION_MAX_MILESTONES = int(os.getenv("RETENTION_MAX_MILESTONES", "20"))
+# Background compaction interval; 0 disables the background job
+COMPACTION_INTERVAL_SECONDS = float(os.getenv("COMPACTION_INTERVAL_SECONDS", "0"))
+# Throttling: pause between projects and cap on projects per run
+COMPACTION_PAUSE_SECONDS = float(os.getenv("COMPACTION_PAUSE_SECONDS", "0.2"))
+COMPACTION_MAX_PROJECTS = int(os.getenv("COMPACTION_MAX_PROJECTS", "100"))
+
+
+class RetentionPolicy:
+    """Decides which versions of a project stay in the project document."""
+
+    def __init__(self, keep=RETENTION_KEEP_VERSIONS, milestone_every=RETENTION_MILESTONE_EVERY,
+                 max_milestones=RETENTION_MAX_MILESTONES):
+        self.keep = keep
+        self.milestone_every = milestone_every
+        self.max_milestones = max_milestones
+
+    def min_versions(self):
+        """Projects with fewer versions than this are left alone, so compaction does not run every turn."""
+        return self.keep + self.max_milestones + max(self.milestone_every, 1)
+
+    def kept_versions(self, versions, head, parent_of):
+        """
+        Return the version numbers to keep.
+
+        Kept are the newest `keep` versions, the head and its `keep` nearest ancestors (so undo
+        keeps working after stepping back), the initial version, the newest milestones, and every
+        version that a kept version refers to with same_as.
+        """
+        numbers = sorted(version["version"] for version in versions)
+        if not numbers:
+            return set()
+        kept = set(numbers[-self.keep:]) if self.keep else set()
+        kept.add(numbers[0])
+
+        by_number = {version["version"]: version for version in versions}
+        current = by_number.get(head)
+        for _ in range(self.keep + 1):
+            if current is None:
+                break
+            kept.add(current["version"])
+            parent = parent_of(current)
+            current = by_number.get(parent) if parent is not None else None
+
+        if self.milestone_every > 0 and self.max_milestones > 0:
+            milestones = [number for number in numbers if number % self.milestone_every == 0 and number not in kept]
+            kept.update(milestones[-self.max_milestones:])
+
+        kept.update(by_number[number]["same_as"] for number in list(kept)
+                    if "same_as" in by_number[number] and by_number[number]["same_as"] in by_number)
+        return kept
+
+
+def run_compaction(project_service, policy=None, max_projects=COMPACTION_MAX_PROJECTS,
+                   pause=COMPACTION_PAUSE_SECONDS, dry_run=False, after_id=None):
+    """
+    Compact up to max_projects projects, pausing between them to limit database load.
+
+    Projects are visited in _id order, starting after after_id. A run that stops at max_projects
+    reports where it stopped, so the next run continues there instead of re-examining the same
+    projects (branched projects can stay above the policy's minimum after compaction).
+
+    Returns:
+        dict: Projects examined and compacted, versions archived (or that would be, for dry_run),
+        and resume_after: the _id to pass as after_id to the next run (None once all were visited).
+    """
+    policy = policy or RetentionPolicy()
+    summary = {"examined": 0, "compacted": 0, "archived_versions": 0, "resume_after": None}
+    cursor = project_service.compaction_candidates(policy.min_versions(), after_id=after_id)
+    try:
+        for project_doc in cursor:
+            if summary["examined"] >= max_projects:
+                break
+            summary["examined"] += 1
+            summary["resume_after"] = project_doc["_id"]
+            versions = project_doc.get("versions", [])
+            kept = policy.kept_versions(versions, project_service._head_of(project_doc), project_service._parent_of)
+            if dry_run:
+                archived = len(versions) - len(kept)
+            else:
+                try:
+                    archived = project_service.compact_project(project_doc, kept)
+                except Exception as e:
+                    print(f"Error compacting project '{project_doc.get('project_name')}': {e}")
+                    archived = 0
+            if archived:
+                summary["compacted"] += 1
+                summary["archived_versions"] += archived
+            if pause:
+                time.sleep(pause)
+        else:
+            # Every candidate was visited; the next run starts from the beginning
+            summary["resume_after"] = None
+    finally:
+        cursor.close()
+    return summary
+
+
+def start_background_compaction(interval=COMPACTION_INTERVAL_SECONDS):
+    """Start a daemon thread that compacts projects every interval seconds (no-op when interval is 0)."""
+    if interval <= 0:
+        return None
+
+    def loop():
+        from src.model.project_service import ProjectService
+        project_service = ProjectService()
+        resume_after = None
+        while True:
+            time.sleep(interval)
+            if project_service.projects_collection is None:
+                continue
+            try:
+                summary = run_compaction(project_service, after_id=resume_after)
+                resume_after = summary["resume_after"]
+                if summary["archived_versions"]:
+                    print(f"Compaction archived {summary['archived_versions']} versions "
+                          f"from {summary['compacted']} projects")
+            except Exception as e:
+                print(f"Error in background compaction: {e}")
+
+    thread = threading.Thread(target=loop, name="version-compaction", daemon=True)
+    thread.start()
+    return thread
@@ -12,6 +12,9 @@ class DomainModellingApp {
         
         // Only keep the loading state flag
         this.isLoadingState = false;
+        
+        // Version of the selected project currently shown; sent with chat turns for delta responses
+        this.currentVersion = null;
     }
 
     initialize() {
@@ -75,25 +78,36 @@ class DomainModellingApp {
         if (undoButton) {
             undoButton.addEventListener('click', () => this.handleUndoChange());
         }
+
+        const redoButton = document.getElementById('redoChangeBtn');
+        if (redoButton) {
+            redoButton.addEventListener('click', () => this.handleRedoChange());
+        }
     }
     
     handleUndoChange() {
+        this.moveProjectHead("/undo_project_change", "undoChangeBtn", "Undoing...");
+    }
+
+    handleRedoChange() {
+        this.moveProjectHead("/redo_project_change", "redoChangeBtn", "Redoing...");
+    }
+
+    // Undo and redo only move the project's head pointer. The chat history follows the head's lineage,
+    // so the project is reloaded afterwards; the cached version makes that a small delta where possible.
+    moveProjectHead(endpoint, buttonId, busyText) {
         const selectedProject = this.views.projectView.selectedProject;
         if (!selectedProject) {
             alert("Please select a project first.");
             return;
         }
 
-        if (!confirm(`Are you sure you want to undo the last version of project "${selectedProject}"?`)) {
-            return;
-        }
-
-        const undoButton = document.getElementById('undoChangeBtn');
-        const originalButtonText = undoButton.innerHTML;
-        undoButton.innerHTML = '<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span> Undoing...';
-        undoButton.disabled = true;
+        const button = document.getElementById(buttonId);
+        const originalButtonText = button.innerHTML;
+        button.innerHTML = `<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span> ${busyText}`;
+        button.disabled = true;
 
-        fetch("/undo_project_change", {
+        fetch(endpoint, {
             method: "POST",
             headers: { "Content-Type": "application/json" },
             body: JSON.stringify({ project_name: selectedProject }),
@@ -101,49 +115,38 @@ class DomainModellingApp {
         .then(response => response.json())
         .then(data => {
             if (data.error) {
-                alert(`Error undoing version: ${data.error}`);
-                
-                // If we can't undo any further, disable the button
-                if (data.error.includes("Cannot undo the initial project version")) {
-                    undoButton.disabled = true;
-                }
+                alert(`Error changing version: ${data.error}`);
             } else if (data.project_data) {
-                alert(data.message || "Project successfully reverted to previous version.");
-                
-                this.isLoadingState = true;
-                console.log('handleUndoChange: isLoadingState = true before loadProjectData');
-
-                this.views.projectView.loadProjectData(selectedProject, data.project_data)
-                    .catch(loadErr => {
-                        console.error("Error loading project data in undo:", loadErr);
-                    })
-                    .finally(() => {
-                        this.isLoadingState = false;
-                        console.log('handleUndoChange: isLoadingState reset after loadProjectData completed');
-                    });
-                
-                // Get project versions to determine if there's only one left
-                fetch(`/get_project_data?project_name=${encodeURIComponent(selectedProject)}`)
-                    .then(response => response.json())
-                    .then(projectInfo => {
-                        // Check if we need to disable the undo button (only 1 version remains)
-                        const versions = projectInfo.project_data?.versions || [];
-                        if (versions.length <= 1) {
-                            undoButton.disabled = true;
-                        }
-                    })
-                    .catch(err => console.error("Error checking versions:", err));
+                this.currentVersion = data.project_data.version;
+                this.updateHistoryButtons(data.project_data);
+                return this.views.projectView.loadProjectData(selectedProject, null, false);
             }
         })
         .catch(err => {
-            alert("An unexpected error occurred while undoing version.");
-            console.error("Undo error:", err);
+            alert("An unexpected error occurred while changing version.");
+            console.error("Version change error:", err);
         })
         .finally(() => {
-            undoButton.innerHTML = originalButtonText;
-            undoButton.disabled = false;
+            button.innerHTML = originalButtonText;
+            if (button.dataset.available === "true") {
+                button.disabled = false;
+            }
         });
     }
+
+    // Enable undo/redo according to the can_undo/can_redo flags returned by the server
+    updateHistoryButtons(projectData) {
+        const undoButton = document.getElementById('undoChangeBtn');
+        const redoButton = document.getElementById('redoChangeBtn');
+        if (undoButton) {
+            undoButton.dataset.available = String(Boolean(projectData.can_undo));
+            undoButton.disabled = !projectData.can_undo;
+        }
+        if (redoButton) {
+            redoButton.dataset.available = String(Boolean(projectData.can_redo));
+            redoButton.disabled = !projectData.can_redo;
+        }
+    }
     
     handleSendMessage(message) {
         if (!message) return;
@@ -165,10 +168,14 @@ class DomainModellingApp {
             headers: { "Content-Type": "application/json" },
             body: JSON.stringify({ 
                 message: message,
-                project_name: selectedProject // Include project name with every chat request
+                project_name: selectedProject, // Include project name with every chat request
+                since_version: this.currentVersion
             }),
         })
         .then((response) => {
+            if (response.status === 504) {
+                return response.json(); // Deadline exceeded: the body explains it
+            }
             if (!response.ok) {
                 throw new Error("Network response was not ok");
             }
@@ -177,6 +184,13 @@ class DomainModellingApp {
         .then((data) => {
             loadingIndicator.remove();
 
+            if (data.version !== undefined) {
+                this.currentVersion = data.version;
+            }
+            if (data.uml_pending) {
+                this.waitForPendingUML(selectedProject, data.version);
+            }
+
             if (data.error) {
                 this.views.chatView.displayErrorMessage(data.error);
             } else if (data.domain_model_description) {
@@ -190,6 +204,7 @@ class DomainModellingApp {
                 
                 // Update PlantUML if provided
                 if (data.plant_uml && data.plant_uml.trim()) {
+                    this.views.umlView.useProjectVersionDiagram(selectedProject, data.version);
                     this.views.umlView.setPlantUML(data.plant_uml);
                 }
                 
@@ -211,6 +226,7 @@ class DomainModellingApp {
                 
                 // Only update PlantUML if provided and not empty
                 if (data.plant_uml && data.plant_uml.trim()) {
+                    this.views.umlView.useProjectVersionDiagram(selectedProject, data.version);
                     this.views.umlView.setPlantUML(data.plant_uml);
                     
                     // Enable undo button when PlantUML changes
@@ -228,11 +244,40 @@ class DomainModellingApp {
         });
     }
     
-    // Add this method to the DomainModellingApp class
-    enableUndoButton() {
-        const undoButton = document.getElementById('undoChangeBtn');
-        if (undoButton) {
-            undoButton.disabled = false;
+    // Poll for the description and PlantUML the server is still generating after a turn ran out of time
+    waitForPendingUML(projectName, version, attempt = 0) {
+        if (attempt >= 40) {
+            return;
         }
+        setTimeout(() => {
+            if (this.views.projectView.selectedProject !== projectName || this.currentVersion !== version) {
+                return; // The user moved on; the diagram is picked up when the version is loaded again
+            }
+            fetch(`/version_uml?project_name=${encodeURIComponent(projectName)}&version=${version}`)
+            .then(response => response.json())
+            .then(data => {
+                if (data.error) {
+                    return;
+                }
+                if (data.uml_pending) {
+                    this.waitForPendingUML(projectName, version, attempt + 1);
+                } else if (this.views.projectView.selectedProject === projectName && this.currentVersion === version) {
+                    // A description that missed the deadline arrives together with its diagram
+                    if (data.domain_model_description) {
+                        this.views.umlView.setDomainModelDescription(data.domain_model_description, false);
+                    }
+                    if (data.plant_uml) {
+                        this.views.umlView.useProjectVersionDiagram(projectName, version);
+                        this.views.umlView.setPlantUML(data.plant_uml);
+                    }
+                }
+            })
+            .catch(err => console.error("Error fetching pending UML:", err));
+        }, 3000);
+    }
+
+    // A new turn always becomes the head of its branch: undo is possible, redo is not
+    enableUndoButton() {
+        this.updateHistoryButtons({ can_undo: true, can_redo: false });
     }
 }
\ No newline at end of file
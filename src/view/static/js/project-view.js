@@ -13,6 +13,9 @@ class ProjectView {
         this.selectedProject = null;
         this.umlView = null;
         this.chatView = null;
+        
+        // Last loaded state per project ({ etag, data }) used for conditional and delta requests
+        this.projectCache = {};
 
         // Add event listener for modal opening
         document.getElementById('projectModal').addEventListener('show.bs.modal', () => {
@@ -188,8 +191,8 @@ class ProjectView {
     
     // Update the loadProjectData method to use the shared UMLView instance
     // Allow passing projectData directly to avoid a fetch if data is already available (e.g., after undo)
-    // Ensure it returns a Promise
-    loadProjectData(projectName, directData = null) {
+    // Ensure it returns a Promise; notify=false skips the "loaded" toast (e.g. when reloading after undo)
+    loadProjectData(projectName, directData = null, notify = true) {
         const displayData = (projectData) => {
             // Update domain model description if available
             if (projectData.domain_model_description !== undefined) { // Check for undefined to allow empty string
@@ -201,6 +204,7 @@ class ProjectView {
             
             // Update PlantUML if available - use the shared UMLView instance
             if (projectData.plant_uml !== undefined && this.umlView) {
+                this.umlView.useProjectVersionDiagram(projectName, projectData.version);
                 this.umlView.setPlantUML(projectData.plant_uml);
             } else if (this.umlView) {
                 this.umlView.setPlantUML(""); // Clear PlantUML if not available
@@ -222,12 +226,27 @@ class ProjectView {
                 this.chatView.displayBotMessage("Chat history is empty for this version.");
             }
             
+            // Reflect whether the loaded version can be undone or redone
+            if (window.appInstance && projectData.can_undo !== undefined) {
+                window.appInstance.updateHistoryButtons(projectData);
+            }
+            if (window.appInstance && projectData.version !== undefined) {
+                window.appInstance.currentVersion = projectData.version;
+                if (projectData.uml_pending) {
+                    window.appInstance.waitForPendingUML(projectName, projectData.version);
+                }
+            }
+            
             // Update project name display on the select project button
             const selectProjectBtn = document.getElementById('selectProjectBtn');
             if (selectProjectBtn) {
                 selectProjectBtn.innerHTML = `<i class="bi bi-folder-check me-1"></i> ${projectName}`;
             }
 
+            if (!notify) {
+                return;
+            }
+
             // Show success notification
             const successNotification = document.createElement('div');
             successNotification.className = 'toast-notification';
@@ -267,8 +286,20 @@ class ProjectView {
         `;
         document.body.appendChild(loadingIndicator);
         
-        return fetch(`/get_project_data?project_name=${encodeURIComponent(projectName)}`)
+        // Ask only for what changed since the cached version; 304 means the cache is current
+        const cached = this.projectCache[projectName];
+        const params = new URLSearchParams({ project_name: projectName });
+        const headers = {};
+        if (cached) {
+            params.set("since_version", cached.data.version);
+            headers["If-None-Match"] = cached.etag;
+        }
+        
+        return fetch(`/get_project_data?${params}`, { headers, cache: "no-store" })
             .then((response) => {
+                if (response.status === 304 && cached) {
+                    return { project_data: cached.data, etag: cached.etag };
+                }
                 if (!response.ok) {
                     // Attempt to parse error from JSON response, otherwise use status text
                     return response.json().then(errData => {
@@ -277,14 +308,18 @@ class ProjectView {
                         throw new Error(response.statusText);
                     });
                 }
-                return response.json();
+                return response.json().then(data => ({ ...data, etag: response.headers.get("ETag") }));
             })
             .then((data) => {
                 if (data.error) {
                     alert(data.error);
                     throw new Error(data.error); // Make sure to throw to propagate to catch/finally
                 } else if (data.project_data) {
-                    displayData(data.project_data);
+                    const projectData = this.mergeProjectData(cached, data.project_data);
+                    if (data.etag) {
+                        this.projectCache[projectName] = { etag: data.etag, data: projectData };
+                    }
+                    displayData(projectData);
                 }
             })
             // Catch is handled by the caller if needed
@@ -296,6 +331,18 @@ class ProjectView {
             });
     }
     
+    // Apply a delta response (new messages and changed fields only) on top of the cached state
+    mergeProjectData(cached, projectData) {
+        if (!projectData.delta || !cached) {
+            return projectData;
+        }
+        return {
+            ...cached.data,
+            ...projectData,
+            chat_history: cached.data.chat_history.concat(projectData.chat_history)
+        };
+    }
+    
     selectProject(projectName) {
         // Helper method to auto-select a project in the dropdown
         const options = this.elements.existingProjects.options;
@@ -7,8 +7,15 @@ class UMLView {
             plantumlLoading: document.getElementById('plantumlLoading'),
             generateUMLBtn: document.getElementById('generateUMLBtn'),
             // Add the new loading indicator element
-            umlLoadingIndicator: document.getElementById('umlLoadingIndicator')
+            umlLoadingIndicator: document.getElementById('umlLoadingIndicator'),
+            diagramViewSelect: document.getElementById('diagramViewSelect')
         };
+        
+        if (this.elements.diagramViewSelect) {
+            this.elements.diagramViewSelect.addEventListener('change', (event) => {
+                this.showDiagramView(event.target.value);
+            });
+        }
 
         // Add validation to ensure all elements were found
         this.validateElements();
@@ -217,8 +224,86 @@ package "Business Domain" {
         return this.elements.domainModelText.textContent.trim();
     }
 
+    // Render the next diagram from the server-side SVG of a stored project version.
+    // The public PlantUML server is only used when that version has no structured model.
+    useProjectVersionDiagram(projectName, version) {
+        this.projectVersionDiagram = (projectName && version) ? { projectName, version } : null;
+    }
+
+    // Large models are split server-side into an overview and detail views; only the view
+    // the user is looking at is rendered and transferred.
+    loadDiagramViews(projectVersionDiagram) {
+        const { projectName, version } = projectVersionDiagram;
+        const query = `project_name=${encodeURIComponent(projectName)}&version=${version}`;
+        return fetch(`/diagram_views?${query}`)
+            .then(response => response.ok ? response.json() : { partitioned: false })
+            .then(data => {
+                if (!data.partitioned) {
+                    return false;
+                }
+                this.diagramViewQuery = query;
+                const select = this.elements.diagramViewSelect;
+                select.innerHTML = "";
+                select.appendChild(new Option(`Overview (${data.entity_count} entities)`, "overview"));
+                data.views.forEach(view => {
+                    select.appendChild(new Option(`${view.title} — ${view.entity_count} entities`, view.id));
+                });
+                select.classList.remove('d-none');
+                this.showDiagramView("overview");
+                return true;
+            })
+            .catch(() => false);
+    }
+
+    showDiagramView(viewId) {
+        const umlImage = document.getElementById('umlImage');
+        const umlPlaceholder = document.getElementById('umlPlaceholder');
+        if (!umlImage || !this.diagramViewQuery) {
+            return;
+        }
+        if (this.elements.umlLoadingIndicator) {
+            this.elements.umlLoadingIndicator.classList.remove('d-none');
+        }
+        umlImage.onload = () => {
+            umlPlaceholder.classList.add('d-none');
+            umlImage.classList.remove('d-none');
+            this.hideLoadingIndicator();
+        };
+        umlImage.onerror = () => {
+            console.error("Error loading diagram view");
+            this.hideLoadingIndicator();
+        };
+        umlImage.src = `/diagram_view?${this.diagramViewQuery}&view_id=${encodeURIComponent(viewId)}`;
+    }
+
+    hideDiagramViews() {
+        this.diagramViewQuery = null;
+        if (this.elements.diagramViewSelect) {
+            this.elements.diagramViewSelect.classList.add('d-none');
+        }
+    }
+
     // Update the renderPlantUMLDiagram method to handle the loading indicator
     renderPlantUMLDiagram(plantUML) {
+        const projectVersionDiagram = this.projectVersionDiagram;
+        this.projectVersionDiagram = null;
+        this.hideDiagramViews();
+
+        if (projectVersionDiagram && plantUML && plantUML.trim()) {
+            if (this.elements.umlLoadingIndicator) {
+                this.elements.umlLoadingIndicator.classList.remove('d-none');
+            }
+            this.loadDiagramViews(projectVersionDiagram).then(partitioned => {
+                if (!partitioned) {
+                    this.renderFullDiagram(plantUML, projectVersionDiagram);
+                }
+            });
+            return;
+        }
+        this.renderFullDiagram(plantUML, projectVersionDiagram);
+    }
+
+    renderFullDiagram(plantUML, projectVersionDiagram) {
         if (!plantUML || !plantUML.trim()) {
             // No PlantUML code to render
             this.hideLoadingIndicator();
@@ -243,7 +328,11 @@ package "Business Domain" {
             // Use the plantumlEncoder library instead of custom encoding
             const encodedUML = plantumlEncoder.encode(plantUML);
             // Use SVG format for better quality
-            const imageUrl = `https://www.plantuml.com/plantuml/svg/${encodedUML}`;
+            const plantUmlServerUrl = `https://www.plantuml.com/plantuml/svg/${encodedUML}`;
+            let usingFallback = !projectVersionDiagram;
+            const imageUrl = projectVersionDiagram
+                ? `/render_svg?project_name=${encodeURIComponent(projectVersionDiagram.projectName)}&version=${projectVersionDiagram.version}`
+                : plantUmlServerUrl;
                         
             // Find elements
             const umlImage = document.getElementById('umlImage');
@@ -274,6 +363,11 @@ package "Business Domain" {
                 };
                 
                 umlImage.onerror = () => {
+                    if (!usingFallback) {
+                        usingFallback = true;
+                        umlImage.src = plantUmlServerUrl;
+                        return;
+                    }
                     console.error("Error loading PlantUML diagram");
                     umlImage.classList.add('d-none');
                     umlPlaceholder.classList.remove('d-none');
@@ -0,0 +1,15 @@
+import pytest
+from scripts.fakes import build_app
+
+
+@pytest.fixture
+def app_and_collection():
+    """The Flask app wired to a fresh in-memory database and the fake LLM client."""
+    app, collection = build_app()
+    app.config["TESTING"] = True
+    return app, collection
+
+
+@pytest.fixture
+def client(app_and_collection):
+    return app_and_collection[0].test_client()
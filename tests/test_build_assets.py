@@ -0,0 +1,39 @@
+import json
+import os
+from scripts import build_assets
+from src.model import assets
+
+
+def _build(tmp_path, monkeypatch, generation):
+    monkeypatch.setattr(build_assets, "build_bundle", lambda name, sources: f"/* {generation} */ {name}\n")
+    return {name: details["file"] for name, details in build_assets.build(str(tmp_path)).items()}
+
+
+def _manifest(tmp_path):
+    with open(tmp_path / os.path.basename(assets.MANIFEST_PATH)) as file:
+        return json.load(file)
+
+
+def test_previous_build_is_kept_and_older_ones_are_removed(tmp_path, monkeypatch):
+    first = _build(tmp_path, monkeypatch, "first")
+    second = _build(tmp_path, monkeypatch, "second")
+    third = _build(tmp_path, monkeypatch, "third")
+
+    files = set(os.listdir(tmp_path))
+    assert all(name in files and name + ".gz" in files for name in list(second.values()) + list(third.values()))
+    assert not any(name in files for name in first.values())
+    assert _manifest(tmp_path) == {"bundles": third, "previous": second}
+
+    # Rebuilding unchanged sources keeps the same previous generation
+    assert _build(tmp_path, monkeypatch, "third") == third
+    assert _manifest(tmp_path)["previous"] == second
+    assert all(name in os.listdir(tmp_path) for name in second.values())
+
+
+def test_minify_js_keeps_strings_and_regular_expressions():
+    source = "// comment\nconst a = 'x // y';\n    const re = /a\\/b/g; /* block */\nreturn a / 2;\n"
+    assert build_assets.minify_js(source) == "const a = 'x // y';\nconst re = /a\\/b/g;\nreturn a / 2;\n"
+
+
+def test_minify_css_collapses_whitespace():
+    assert build_assets.minify_css("a  >  b {\n  margin: 0 auto;\n}\n/* c */") == "a>b{margin:0 auto}\n"
@@ -0,0 +1,63 @@
+import threading
+import time
+import pytest
+from src.controller import chat_controller
+from src.model.deadline import Deadline, DeadlineExceeded
+
+
+def test_stage_past_its_share_keeps_running():
+    release = threading.Event()
+    deadline = Deadline(0.05)
+    with pytest.raises(DeadlineExceeded) as exceeded:
+        deadline.run("classification", lambda: release.wait(2) and "late")
+    release.set()
+    assert exceeded.value.future.result(timeout=1) == "late"
+
+
+def test_abandoned_stages_do_not_delay_new_ones():
+    release = threading.Event()
+    for _ in range(40):
+        Deadline(5).submit(release.wait, 2)
+    try:
+        assert Deadline(5).run("classification", lambda: "ready") == "ready"
+    finally:
+        release.set()
+
+
+def test_late_description_is_stored_on_the_version(client, monkeypatch):
+    import src.app as web
+    controller = web.chat_controller
+    llm_service = controller.llm_service
+    llm_service.current_domain_model_description.set_text("Shown description.")
+    finished = threading.Event()
+
+    def classify(chat_history_text):
+        return {"decision": True, "is_casual_comment": False, "is_update": False, "suggestions": ["Working on it."]}
+
+    def slow_generation(chat_history_text, classification):
+        time.sleep(0.3)
+        finished.set()
+        return "Customers place orders."
+
+    monkeypatch.setattr(llm_service, "determine_input_type", classify)
+    monkeypatch.setattr(llm_service, "_generate_domain_model_description", slow_generation)
+    monkeypatch.setattr(chat_controller, "Deadline", lambda: Deadline(0.1))
+    project_name = client.post("/create_project").get_json()["project_name"]
+
+    response = client.post("/chat", json={"message": "Customers place orders.", "project_name": project_name})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["uml_pending"] is True
+    assert data["suggestion"] == "Working on it."
+    assert finished.wait(2)
+
+    service = controller.project_service
+    for _ in range(100):
+        stored, _ = service.get_version_uml(project_name, data["version"])
+        if not stored["uml_pending"]:
+            break
+        time.sleep(0.02)
+    assert stored["uml_pending"] is False
+    assert stored["domain_model_description"] == "Customers place orders."
+    assert stored["plant_uml"] != data["plant_uml"]
+    assert llm_service.get_current_domain_model_description() == "Shown description."
@@ -0,0 +1,38 @@
+from src.model.project_service import ProjectService
+from src.model.svg_renderer import RENDERER_VERSION
+
+DOMAIN_MODEL = {
+    "attributes": [{"entity": "Order Line", "property": "quantity"}, {"entity": "Customer", "property": "e-mail address"}],
+    "associations": [{"source": "Customer", "sourceMultiplicity": "1", "targetMultiplicity": "0..*",
+                      "target": "Order Line", "relationship": "orders"}],
+    "generalizations": [], "aggregations": [], "compositions": []
+}
+
+
+def test_svg_etag_includes_renderer_version_and_revalidates(app_and_collection):
+    app, collection = app_and_collection
+    service = ProjectService(collection=collection)
+    project_name = service.create_project()[0]["project_name"]
+    service.save_version(project_name, "Customers order lines.", "Done.", "A description.", "@startuml\n@enduml",
+                         domain_model=DOMAIN_MODEL)
+    client = app.test_client()
+    url = f"/render_svg?project_name={project_name}"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.mimetype == "image/svg+xml"
+    etag = response.headers["ETag"].strip('"')
+    assert etag.startswith(f"{RENDERER_VERSION}-")
+
+    assert client.get(url, headers={"If-None-Match": f'"{etag}"'}).status_code == 304
+    # An SVG drawn by another renderer version is never confirmed as current
+    stale = client.get(url, headers={"If-None-Match": f'"0-{etag.split("-", 1)[1]}"'})
+    assert stale.status_code == 200
+
+
+def test_svg_uses_post_processed_names(client):
+    svg = client.post("/render_svg", json={"domain_model": DOMAIN_MODEL}).get_data(as_text=True)
+    assert "OrderLine" in svg
+    assert "Order Line" not in svg
+    assert "EMail" in svg
+    assert "e-mail address" not in svg
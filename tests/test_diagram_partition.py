@@ -0,0 +1,59 @@
+from src.model import diagram_partition
+from src.model.diagram_partition import (
+    OVERVIEW_ID, partition_model, needs_partitioning, overview_model, view_model, overview_plantuml
+)
+from src.model.svg_renderer import model_hash
+
+
+def _chain(names, kind="associations"):
+    if kind == "generalizations":
+        return [{"superclass": first, "subclass": second} for first, second in zip(names, names[1:])]
+    return [{"source": first, "sourceMultiplicity": "1", "targetMultiplicity": "0..*", "target": second,
+             "relationship": "has"} for first, second in zip(names, names[1:])]
+
+
+def _model(**sections):
+    data = {"attributes": [], "associations": [], "generalizations": [], "aggregations": [], "compositions": []}
+    data.update(sections)
+    return data
+
+
+def test_views_cover_every_entity_once_within_the_size_limit(monkeypatch):
+    monkeypatch.setattr(diagram_partition, "MAX_VIEW_ENTITIES", 3)
+    monkeypatch.setattr(diagram_partition, "PARTITION_THRESHOLD", 4)
+    names = [f"Entity{index}" for index in range(8)]
+    data = _model(associations=_chain(names), attributes=[{"entity": "Loner", "property": "name"}])
+    partition = partition_model(data, model_hash(data) + "-small-views")
+
+    assert needs_partitioning(partition)
+    placed = [name for view in partition["views"] for name in view["entities"]]
+    assert sorted(placed) == sorted(names + ["Loner"])
+    assert all(len(view["entities"]) <= 3 for view in partition["views"])
+    assert OVERVIEW_ID not in [view["id"] for view in partition["views"]]
+
+
+def test_inheritance_clusters_stay_in_one_view(monkeypatch):
+    monkeypatch.setattr(diagram_partition, "MAX_VIEW_ENTITIES", 3)
+    data = _model(generalizations=_chain(["Person", "Employee", "Manager"], "generalizations"),
+                  associations=_chain(["Manager", "Team", "Project", "Task"]))
+    partition = partition_model(data, model_hash(data) + "-clusters")
+
+    view_of = partition["view_of"]
+    assert view_of["Person"] == view_of["Employee"] == view_of["Manager"]
+
+
+def test_detail_view_keeps_external_ends_and_overview_counts_links(monkeypatch):
+    monkeypatch.setattr(diagram_partition, "MAX_VIEW_ENTITIES", 2)
+    data = _model(associations=_chain(["A", "B", "C", "D"]))
+    partition = partition_model(data, model_hash(data) + "-links")
+    first, second = partition["views"]
+
+    detail, external = view_model(partition, first["id"])
+    assert set(detail.entities) == set(first["entities"]) | set(external)
+    assert external == [name for name in second["entities"] if name in external]
+    assert len(external) == 1
+
+    overview = overview_model(partition)
+    assert [relation.label for relation in overview.relations] == ["1 relation"]
+    assert view_model(partition, "view-99") == (None, None)
+    assert f"{first['id'].replace('-', '_')} -- {second['id'].replace('-', '_')} : 1 relation" in overview_plantuml(partition)
@@ -0,0 +1,55 @@
+import pytest
+
+from src.model.dmd_edits import DmdEditError, SentenceDocument, has_changes
+
+TEXT = "A shop sells bikes. Customers buy bikes.\n\n- Each bike has a price. Each customer has a name."
+
+
+def test_sentences_are_anchored():
+    document = SentenceDocument(TEXT)
+    assert len(document) == 4
+    assert document.numbered().splitlines()[0] == "[S1] A shop sells bikes."
+    assert document.numbered().splitlines()[2] == "[S3] - Each bike has a price."
+
+
+def test_apply_keeps_the_layout_and_reports_changes():
+    text, changes = SentenceDocument(TEXT).apply([
+        {"op": "insert_after", "anchor": "S0", "text": "This is a bike shop."},
+        {"op": "replace", "anchor": "[S2]", "text": "Customers buy  many bikes."},
+        {"op": "delete", "anchor": "S4"},
+        {"op": "insert_after", "anchor": "S3", "text": "Each bike has a serial number."},
+    ])
+    assert text == ("This is a bike shop. A shop sells bikes. Customers buy many bikes.\n\n"
+                    "- Each bike has a price. Each bike has a serial number.")
+    assert changes == {
+        "inserted": ["This is a bike shop.", "Each bike has a serial number."],
+        "replaced": [{"before": "Customers buy bikes.", "after": "Customers buy many bikes."}],
+        "deleted": ["Each customer has a name."],
+    }
+    assert has_changes(changes)
+
+
+def test_lines_whose_sentences_are_deleted_disappear():
+    text, _ = SentenceDocument(TEXT).apply([{"op": "delete", "anchor": "S3"}, {"op": "delete", "anchor": "S4"}])
+    assert text == "A shop sells bikes. Customers buy bikes."
+
+
+def test_unchanged_replacement_is_not_a_change():
+    _, changes = SentenceDocument(TEXT).apply([{"op": "replace", "anchor": "S1", "text": "A shop sells bikes."}])
+    assert not has_changes(changes)
+    assert not has_changes(SentenceDocument(TEXT).apply([])[1])
+
+
+@pytest.mark.parametrize("edits", [
+    {"op": "replace", "anchor": "S1", "text": "x"},
+    [{"op": "rewrite", "anchor": "S1", "text": "x"}],
+    [{"op": "replace", "anchor": "S9", "text": "x"}],
+    [{"op": "delete", "anchor": "S0"}],
+    [{"op": "replace", "anchor": "S1", "text": "  "}],
+    [{"op": "insert_after", "anchor": "S1", "text": "[S2] Customers buy bikes."}],
+    [{"op": "replace", "anchor": "S1", "text": "x"}, {"op": "delete", "anchor": "S1"}],
+    [{"op": "delete", "anchor": f"S{number}"} for number in range(1, 5)],
+])
+def test_invalid_edits_are_rejected(edits):
+    with pytest.raises(DmdEditError):
+        SentenceDocument(TEXT).apply(edits)
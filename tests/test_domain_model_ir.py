@@ -0,0 +1,45 @@
+from src.model.domain_model_ir import ASSOCIATION, DomainModel, canonical_entity_key, merge_models
+
+
+def _model(associations=(), attributes=(), compositions=()):
+    return DomainModel.from_extraction({
+        "attributes": [{"entity": entity, "property": name} for entity, name in attributes],
+        "associations": [{"source": source, "sourceMultiplicity": source_multiplicity,
+                          "targetMultiplicity": target_multiplicity, "target": target, "relationship": label}
+                         for source, source_multiplicity, target_multiplicity, target, label in associations],
+        "generalizations": [],
+        "aggregations": [],
+        "compositions": [{"parent": parent, "child": child} for parent, child in compositions]
+    })
+
+
+def test_canonical_entity_key():
+    assert canonical_entity_key("Order Line") == "orderline"
+    assert canonical_entity_key("order_lines") == "orderline"
+    assert canonical_entity_key("OrderLine") == "orderline"
+    assert canonical_entity_key("Categories") == "category"
+    assert canonical_entity_key("Address") == "address"
+    assert canonical_entity_key("Bus") == "bus"
+
+
+def test_merge_reconciles_spellings_to_the_most_frequent():
+    first = _model(associations=[("OrderLine", "0..*", "1", "Product", "refers to")])
+    second = _model(attributes=[("order_lines", "quantity")])
+    third = _model(compositions=[("Order", "OrderLine")])
+    merged = merge_models([first, second, third])
+    assert "OrderLine" in merged.entities
+    assert "order_lines" not in merged.entities
+    assert merged.entities["OrderLine"].attributes == ["quantity"]
+
+
+def test_merge_deduplicates_relations_and_attributes():
+    first = _model(associations=[("Customer", "1", "0..*", "Order", "places")],
+                   attributes=[("Customer", "name")])
+    second = _model(associations=[("Customer", "0..1", "1..*", "Order", "Places "),
+                                  ("Customer", "1", "0..*", "Order", "cancels")],
+                    attributes=[("Customer", "Name"), ("Customer", "email")])
+    merged = merge_models([first, second])
+    associations = merged.relations_by_kind(ASSOCIATION)
+    assert [relation.label for relation in associations] == ["places", "cancels"]
+    assert (associations[0].source_multiplicity, associations[0].target_multiplicity) == ("1", "0..*")
+    assert merged.entities["Customer"].attributes == ["name", "email"]
@@ -0,0 +1,44 @@
+import json
+from scripts import evaluate
+from src.model.openai_client import OpenAIClient
+
+
+def _golden():
+    with open(evaluate.GOLDEN_SET_PATH, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def test_elements_are_read_back_from_plantuml():
+    entities, relations = evaluate.elements_from_plantuml(
+        '@startuml\nCustomer : name\nOrder "0..*" -- "1" Customer : places\n'
+        'Person <|-- Customer\nOrder *-- OrderLine\n@enduml'
+    )
+    assert entities == {"customer", "order", "person", "orderline"}
+    assert relations == {("association", "customer", "order"), ("generalization", "person", "customer"),
+                         ("composition", "order", "orderline")}
+
+
+def test_expected_extraction_scores_perfectly_against_itself():
+    golden = _golden()
+    cases = []
+    for case in golden["cases"]:
+        entities, relations = evaluate.expected_elements(case["expected"])
+        assert entities and relations
+        cases.append({"id": case["id"], "error": None, "stages": {},
+                      "entities": evaluate._counts(entities, entities), "relations": evaluate._counts(relations, relations)})
+    summary = evaluate.summarize("self", golden, "reference", cases, {})
+    assert summary["entities"] == {"precision": 1.0, "recall": 1.0}
+    assert summary["relations"] == {"precision": 1.0, "recall": 1.0}
+
+
+def test_committed_recordings_replay_the_golden_set(monkeypatch):
+    # The recordings hold the golden answers; a miss means prompts changed without re-recording.
+    # They were made with the default models, not the GPT_MODEL the app may have loaded from .env.
+    monkeypatch.delenv("GPT_MODEL", raising=False)
+    client = evaluate.EvaluationClient(None, "replay")
+    monkeypatch.setattr(OpenAIClient, "_client", client)
+    for case in _golden()["cases"]:
+        result = evaluate.run_case(case, client)
+        assert result["error"] is None, result["error"]
+        assert result["entities"]["fp"] == result["entities"]["fn"] == 0
+        assert result["relations"]["fp"] == result["relations"]["fn"] == 0
@@ -0,0 +1,70 @@
+import json
+from types import SimpleNamespace
+from src.model import gpt2, json_repair, prompts
+
+ASSOCIATION = {"source": "Customer", "sourceMultiplicity": "1", "targetMultiplicity": "0..*",
+               "target": "Order", "relationship": "places"}
+
+
+def test_valid_json_is_complete():
+    result = json_repair.salvage('{"a": [1, 2], "b": "x"}')
+    assert result.complete
+    assert result.data == {"a": [1, 2], "b": "x"}
+    assert result.closed_keys == {"a", "b"}
+
+
+def test_truncated_section_keeps_complete_elements():
+    text = '{"attributes": [{"entity": "Order", "property": "date"}], "associations": [{"source": "A"}, {"source": "B", "tar'
+    result = json_repair.salvage(text)
+    assert not result.complete
+    assert result.data == {"attributes": [{"entity": "Order", "property": "date"}], "associations": [{"source": "A"}]}
+    assert result.closed_keys == {"attributes"}
+
+
+def test_fences_single_quotes_bare_keys_and_trailing_commas():
+    text = "```json\n{names: ['Order', 'Customer',], \"count\": 2,}\n```"
+    result = json_repair.salvage(text)
+    assert result.data == {"names": ["Order", "Customer"], "count": 2}
+    assert result.closed_keys == {"names", "count"}
+
+
+def test_malformed_unicode_escape_is_kept_as_text():
+    result = json_repair.salvage('{"a": "\\uZZ12", "b": "\\u00e9"}')
+    assert result.data == {"a": "\\uZZ12", "b": "é"}
+    assert not result.complete
+
+
+def test_nothing_recoverable():
+    assert json_repair.salvage("").data is None
+    assert json_repair.salvage('{"a": "unterminated').data == {}
+
+
+class _ScriptedClient:
+    """Returns the given answers in order and records the messages of every call."""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = []
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, model=None, messages=None, **kwargs):
+        self.calls.append(messages)
+        content = self.answers.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+def test_follow_up_requests_only_missing_sections_and_includes_the_cut_off_answer():
+    truncated = json.dumps({"attributes": [{"entity": "Order", "property": "date"}],
+                            "associations": [ASSOCIATION]})[:-20]
+    complete_rest = json.dumps({"associations": [ASSOCIATION], "generalizations": [],
+                                "aggregations": [], "compositions": []})
+    client = _ScriptedClient([truncated, complete_rest])
+
+    _, data = gpt2.extract_response("Customers place orders.", client)
+
+    assert data["attributes"] == [{"entity": "Order", "property": "date"}]
+    assert data["associations"] == [ASSOCIATION]
+    follow_up = client.calls[1]
+    assert follow_up[-2] == prompts.assistant_message(truncated)
+    assert "Extract only these sections: associations, generalizations, aggregations, compositions." in \
+        json.dumps(follow_up[-1])
@@ -0,0 +1,59 @@
+import time
+from src.model.metrics import InstrumentedCollection, DB_OPERATION_SECONDS
+from scripts.fakes import FakeCollection
+
+
+class SlowCursor:
+    """Cursor that takes a while to deliver each document, like a round-trip per batch."""
+
+    def __init__(self, documents, delay):
+        self._documents = documents
+        self._delay = delay
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def close(self):
+        pass
+
+    def __iter__(self):
+        for document in self._documents:
+            time.sleep(self._delay)
+            yield document
+
+
+class SlowFindCollection(FakeCollection):
+    def find(self, query=None, projection=None, **kwargs):
+        return SlowCursor(list(super().find(query, projection, **kwargs)), 0.02)
+
+
+def test_find_is_observed_once_including_iteration():
+    collection = InstrumentedCollection(SlowFindCollection(name="metrics_find"))
+    collection.insert_many([{"n": 1}, {"n": 2}])
+    count, total = DB_OPERATION_SECONDS.totals(collection="metrics_find", operation="find")
+
+    cursor = collection.find({}).sort("n")
+    assert DB_OPERATION_SECONDS.totals(collection="metrics_find", operation="find") == (count, total)
+    assert [document["n"] for document in cursor] == [1, 2]
+
+    new_count, new_total = DB_OPERATION_SECONDS.totals(collection="metrics_find", operation="find")
+    assert new_count == count + 1
+    assert new_total - total >= 0.04
+
+
+def test_closed_or_discarded_cursors_are_observed():
+    collection = InstrumentedCollection(FakeCollection(name="metrics_close"))
+    collection.insert_one({"n": 1})
+    count, _ = DB_OPERATION_SECONDS.totals(collection="metrics_close", operation="find")
+
+    with collection.find({}) as cursor:
+        next(cursor)
+    collection.find({})
+    assert DB_OPERATION_SECONDS.totals(collection="metrics_close", operation="find")[0] == count + 2
+
+
+def test_other_operations_are_observed_immediately():
+    collection = InstrumentedCollection(FakeCollection(name="metrics_insert"))
+    count, _ = DB_OPERATION_SECONDS.totals(collection="metrics_insert", operation="insert_one")
+    collection.insert_one({"n": 1})
+    assert DB_OPERATION_SECONDS.totals(collection="metrics_insert", operation="insert_one")[0] == count + 1
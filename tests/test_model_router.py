@@ -0,0 +1,79 @@
+from src.model import model_router
+from src.model.model_router import CLASSIFICATION, FAST, STRONG, choose_tier
+
+
+def test_fast_tier_is_opt_in(monkeypatch):
+    monkeypatch.delenv("ROUTER_FAST_MODELS", raising=False)
+    monkeypatch.delenv("ROUTE_CLASSIFICATION_FAST_MODELS", raising=False)
+    assert model_router.route_models(CLASSIFICATION, FAST) == []
+    assert choose_tier(CLASSIFICATION, 10) == STRONG
+
+
+def test_slow_strong_model_is_retried_after_the_latency_ttl(monkeypatch):
+    monkeypatch.setenv("ROUTER_FAST_MODELS", "fast-model")
+    monkeypatch.setenv("ROUTER_STRONG_MODELS", "strong-model")
+    monkeypatch.setattr(model_router, "stats", model_router._ModelStats())
+    clock = [1000.0]
+    monkeypatch.setattr(model_router.time, "monotonic", lambda: clock[0])
+    large_input = model_router.FAST_MAX_CHARS[CLASSIFICATION] + 1
+
+    model_router.stats.record(CLASSIFICATION, "strong-model", model_router.LATENCY_BUDGETS[CLASSIFICATION] * 10, ok=True)
+    assert choose_tier(CLASSIFICATION, large_input) == FAST
+
+    clock[0] += model_router.LATENCY_TTL_SECONDS + 1
+    assert choose_tier(CLASSIFICATION, large_input) == STRONG
+
+    # A fresh sample after expiry starts a new average instead of blending in the stale one
+    model_router.stats.record(CLASSIFICATION, "strong-model", 0.5, ok=True)
+    assert model_router.stats.latency(CLASSIFICATION, "strong-model") == 0.5
+
+
+def _calling_threads(monkeypatch):
+    threads = []
+
+    def attempt(client, call_site, model, kwargs):
+        threads.append(model_router.threading.current_thread())
+        return "response"
+    monkeypatch.setattr(model_router, "_attempt", attempt)
+    return threads
+
+
+def test_calls_without_hedging_stay_on_the_caller_thread(monkeypatch):
+    threads = _calling_threads(monkeypatch)
+    budget = model_router._HedgeBudget(0.5)
+    monkeypatch.setattr(model_router, "hedge_budget", budget)
+    monkeypatch.setattr(model_router, "LLM_HEDGING", False)
+    assert model_router._hedged_attempt(None, CLASSIFICATION, "model", {}) == "response"
+    assert budget.calls == 0
+
+    # Hedging on, but no latency history to derive the hedge delay from yet
+    monkeypatch.setattr(model_router, "LLM_HEDGING", True)
+    monkeypatch.setattr(model_router, "stats", model_router._ModelStats())
+    assert model_router._hedged_attempt(None, CLASSIFICATION, "model", {}) == "response"
+    assert budget.calls == 1
+    assert threads == [model_router.threading.current_thread()] * 2
+
+
+def test_slow_primary_is_hedged_on_the_pool(monkeypatch):
+    release = model_router.threading.Event()
+    names = []
+
+    def attempt(client, call_site, model, kwargs):
+        names.append(model_router.threading.current_thread().name)
+        if len(names) == 1:
+            release.wait(2)
+            return "primary"
+        return "hedge"
+    monkeypatch.setattr(model_router, "_attempt", attempt)
+    monkeypatch.setattr(model_router, "LLM_HEDGING", True)
+    monkeypatch.setattr(model_router, "stats", model_router._ModelStats())
+    for _ in range(model_router.HEDGE_MIN_SAMPLES):
+        model_router.stats.record(CLASSIFICATION, "model", 0.01, ok=True)
+    budget = model_router._HedgeBudget(1.0)
+    budget.calls = 10
+    monkeypatch.setattr(model_router, "hedge_budget", budget)
+    try:
+        assert model_router._hedged_attempt(None, CLASSIFICATION, "model", {}) == "hedge"
+    finally:
+        release.set()
+    assert names[0] == "llm-primary" and names[1].startswith("llm-hedge")
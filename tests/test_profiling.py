@@ -0,0 +1,50 @@
+import threading
+import time
+from src.model import profiling
+from src.model.deadline import Deadline
+
+
+def test_token_matches_compares_in_constant_time(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+    assert profiling.token_matches("secret")
+    assert not profiling.token_matches("secreT")
+    assert not profiling.token_matches("")
+    assert not profiling.token_matches(None)
+
+
+def test_non_ascii_tokens_are_rejected_without_error(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+    assert not profiling.token_matches("sécret")
+
+
+def test_no_token_configured_never_matches(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+    assert not profiling.token_matches("")
+    assert not profiling.token_matches("anything")
+
+
+def _slow_stage(release):
+    release.wait(2)
+    return "done"
+
+
+def test_profiler_samples_stage_threads():
+    release = threading.Event()
+    profiler = profiling.SamplingProfiler(interval=0.002).start()
+    try:
+        future = Deadline(5).submit(_slow_stage, release)
+        time.sleep(0.05)
+        release.set()
+        assert future.result() == "done"
+    finally:
+        profiler.stop()
+
+    stage_stacks = [stack for stack in profiler.counts if stack.startswith("thread:stage")]
+    assert any("_slow_stage" in stack for stack in stage_stacks)
+    assert profiling.current() is None
+
+
+def test_unprofiled_submissions_are_not_wrapped():
+    def function():
+        pass
+    assert profiling.propagate(function) is function
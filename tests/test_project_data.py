@@ -0,0 +1,51 @@
+from src.model.project_service import ProjectService
+
+
+def _project(app_and_collection):
+    app, collection = app_and_collection
+    service = ProjectService(collection=collection)
+    project_name = service.create_project()[0]["project_name"]
+    service.save_version(project_name, "A", "Answer A", "Description A", "@startuml\n' A\n@enduml")
+    return app.test_client(), service, project_name
+
+
+def test_project_data_revalidates_with_etag(app_and_collection):
+    client, service, project_name = _project(app_and_collection)
+    url = f"/get_project_data?project_name={project_name}"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert "etag" not in response.get_json()["project_data"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    service.save_version(project_name, "B", "Answer B", "Description B", "@startuml\n' B\n@enduml")
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    # Undo changes the head, so the old tag no longer matches either
+    new_etag = response.headers["ETag"]
+    service.undo_version(project_name)
+    assert client.get(url, headers={"If-None-Match": new_etag}).status_code == 200
+
+
+def test_since_version_returns_only_what_changed(app_and_collection):
+    client, service, project_name = _project(app_and_collection)
+    service.save_version(project_name, "Thanks", "You're welcome", "Description A", "@startuml\n' A\n@enduml")
+
+    data = client.get(f"/get_project_data?project_name={project_name}&since_version=2").get_json()["project_data"]
+    assert data["delta"] is True
+    assert data["chat_history"] == [{"role": "user", "content": "Thanks"}, {"role": "assistant", "content": "You're welcome"}]
+    assert "domain_model_description" not in data and "plant_uml" not in data
+
+    service.save_version(project_name, "B", "Answer B", "Description B", "@startuml\n' A\n@enduml")
+    data = client.get(f"/get_project_data?project_name={project_name}&since_version=2").get_json()["project_data"]
+    assert data["domain_model_description"] == "Description B"
+    assert "plant_uml" not in data
+
+    # A version that is not an ancestor of the head gets the full state
+    service.undo_version(project_name)
+    data = client.get(f"/get_project_data?project_name={project_name}&since_version=4").get_json()["project_data"]
+    assert data["delta"] is False
+    assert len(data["chat_history"]) == 5
@@ -0,0 +1,100 @@
+import json
+from pymongo.errors import BulkWriteError
+from src.model import project_transfer
+from scripts.fakes import FakeCollection
+
+
+class FlakyCollection(FakeCollection):
+    """Rejects documents whose _id is in `failing`; an unordered bulk write still applies the rest."""
+
+    def __init__(self, failing):
+        super().__init__()
+        self.failing = set(failing)
+
+    def bulk_write(self, requests, ordered=True, **kwargs):
+        errors = [{"index": index, "errmsg": "rejected"} for index, request in enumerate(requests)
+                  if request._doc["_id"] in self.failing]
+        if not errors:
+            return super().bulk_write(requests, ordered=ordered)
+        applied = requests[:errors[0]["index"]] if ordered else [
+            request for request in requests if request._doc["_id"] not in self.failing]
+        details = super().bulk_write(applied, ordered=ordered).bulk_api_result if applied else {}
+        raise BulkWriteError({**details, "writeErrors": errors[:1] if ordered else errors})
+
+
+def _lines(count):
+    return [json.dumps({"_id": f"p{number}", "project_name": f"Project {number}"}) + "\n"
+            for number in range(1, count + 1)]
+
+
+def _checkpoint_line(path):
+    with open(path) as file:
+        return json.load(file)["line"]
+
+
+def test_unordered_failure_holds_the_checkpoint_and_a_rerun_retries_it(tmp_path):
+    checkpoint = str(tmp_path / "import.ckpt")
+    collection = FlakyCollection(failing={"p3"})
+
+    summary = project_transfer.import_lines(collection, _lines(8), batch_size=2, checkpoint=checkpoint)
+    assert summary["failed"] == 1
+    assert summary["first_failed_line"] == 3
+    assert _checkpoint_line(checkpoint) == 2
+    assert collection.count_documents({}) == 7
+
+    collection.failing.clear()
+    summary = project_transfer.import_lines(collection, _lines(8), batch_size=2, checkpoint=checkpoint)
+    assert summary["resumed_at_line"] == 2
+    assert summary["failed"] == 0
+    assert collection.count_documents({}) == 8
+    assert not (tmp_path / "import.ckpt").exists()
+
+
+def test_ordered_import_stops_before_the_failed_document(tmp_path):
+    checkpoint = str(tmp_path / "import.ckpt")
+    collection = FlakyCollection(failing={"p4"})
+
+    summary = project_transfer.import_lines(collection, _lines(6), batch_size=3, ordered=True, checkpoint=checkpoint)
+    assert summary["stopped"]
+    assert _checkpoint_line(checkpoint) == 3
+    assert collection.count_documents({}) == 3
+
+
+def test_clean_import_removes_the_checkpoint(tmp_path):
+    checkpoint = tmp_path / "import.ckpt"
+    summary = project_transfer.import_lines(FakeCollection(), _lines(5), batch_size=2, checkpoint=str(checkpoint))
+    assert summary["read"] == 5 and summary["first_failed_line"] is None
+    assert not checkpoint.exists()
+
+
+def test_malformed_lines_are_reported_without_losing_the_batch(tmp_path):
+    checkpoint = str(tmp_path / "import.ckpt")
+    lines = _lines(5)
+    lines[1] = '{"_id": "p2", "project_name": \n'
+    lines[3] = json.dumps({"project_name": "No id"}) + "\n"
+    collection = FakeCollection()
+
+    summary = project_transfer.import_lines(collection, lines, batch_size=3, checkpoint=checkpoint)
+    assert summary["failed"] == 2
+    assert summary["first_failed_line"] == 2
+    assert _checkpoint_line(checkpoint) == 1
+    assert sorted(document["_id"] for document in collection.find({})) == ["p1", "p3", "p5"]
+
+    summary = project_transfer.import_lines(FakeCollection(), lines, batch_size=1, ordered=True, checkpoint=checkpoint)
+    assert summary["stopped"] and summary["first_failed_line"] == 2
+    assert _checkpoint_line(checkpoint) == 1
+
+
+def test_export_requires_the_admin_token(client, monkeypatch):
+    client.post("/create_project")
+    monkeypatch.setattr(project_transfer, "EXPORT_TOKEN", "")
+    assert client.get("/export_projects").status_code == 404
+
+    monkeypatch.setattr(project_transfer, "EXPORT_TOKEN", "admin-secret")
+    assert client.get("/export_projects", headers={"X-Export-Token": "wrong"}).status_code == 404
+    assert client.get("/export_projects", headers={"X-Export-Token": "wrönG"}).status_code == 404
+
+    response = client.get("/export_projects", headers={"X-Export-Token": "admin-secret"})
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    assert [json.loads(line)["project_name"] for line in response.get_data(as_text=True).splitlines()] == ["Project 1"]
@@ -0,0 +1,18 @@
+import json
+import pytest
+from src.model import gpt2, prompts
+from src.model.example_store import estimate_tokens
+
+
+def test_extraction_prefix_is_identical_across_scenarios_and_long_enough_to_cache():
+    first = gpt2.extraction_messages("Customers place orders, and each order has a date.")
+    second = gpt2.extraction_messages("A library lends books to members. Each book has a title and an ISBN.")
+    prefix = len(prompts.EXTRACTION_PREFIX)
+    assert json.dumps(first[:prefix]) == json.dumps(second[:prefix])
+    assert first[prefix:] != second[prefix:]
+    assert estimate_tokens(prompts.EXTRACTION_SYSTEM_PROMPT) >= prompts.PROMPT_CACHE_MIN_TOKENS
+
+
+def test_prompt_constants_are_read_only():
+    with pytest.raises(TypeError):
+        prompts.EXTRACTION_RESPONSE_FORMAT["type"] = "text"
@@ -0,0 +1,78 @@
+from src.model import structure_index
+from src.model.project_service import ProjectService
+from src.model.structure_index import StructureIndex
+from src.model.svg_renderer import model_hash
+from scripts.fakes import FakeCollection
+
+MODEL = {
+    "attributes": [{"entity": "Customer", "property": "name"}, {"entity": "Order", "property": "date"},
+                   {"entity": "Person", "property": "email"}],
+    "associations": [{"source": "Customer", "sourceMultiplicity": "1", "targetMultiplicity": "0..*",
+                      "target": "Order", "relationship": "places"}],
+    "generalizations": [{"superclass": "Person", "subclass": "Customer"}],
+    "aggregations": [],
+    "compositions": [{"parent": "Order", "child": "Order Line"}]
+}
+
+
+def test_structural_questions_are_answered():
+    index = StructureIndex(MODEL)
+    kind, text = index.answer("What attributes does Customer have?")
+    assert kind == "attributes"
+    assert "- name" in text and "- email (inherited from Person)" in text
+
+    kind, text = index.answer("What is the relationship between Customer and Order?")
+    assert kind == "relation"
+    assert "Customer places Order (1 Customer to 0..* Order)" in text
+
+    assert index.answer("Which entities are in the model?")[0] == "entities"
+    assert index.answer("What does Customer inherit from?") == ("inheritance", "- Customer inherits from Person")
+    assert index.answer("How is order line related to other classes?")[0] == "relations"
+    assert index.answer("Is Customer related to Order?")[0] == "relation"
+
+
+def test_change_requests_and_hypotheticals_go_to_the_model():
+    index = StructureIndex(MODEL)
+    assert index.answer("What if Customer had an attribute email?") is None
+    assert index.answer("Suppose Order has a total; what attributes does Order have?") is None
+    assert index.answer("Can you add an attribute email to Customer?") is None
+    assert index.answer("Which attributes should Order have?") is None
+    # Statements ending in a question mark are not lookups
+    assert index.answer("Customer attributes?") is None
+    assert index.answer("Customers have a loyalty card, which attributes?") is None
+
+
+def test_unanswerable_questions_return_none():
+    index = StructureIndex(MODEL)
+    assert index.answer("What is the capital of France?") is None
+    # Definitions and questions about entities the model lacks need the LLM
+    assert index.answer("What does Customer mean?") is None
+    assert index.answer("Is Customer related to Product?") is None
+    assert index.answer("Is Customer connected to a supplier?") is None
+    assert StructureIndex({}).answer("Which entities are there?") is None
+
+
+def test_versions_store_their_model_hash_and_share_the_index():
+    service = ProjectService(collection=FakeCollection())
+    project_name = service.create_project()[0]["project_name"]
+    version = service.save_version(project_name, "Customers place orders.", "Done.", "Description.", "@startuml\n@enduml",
+                                   domain_model=MODEL)[0]["version"]
+    # A turn that changes nothing refers to the version holding the model
+    same = service.save_version(project_name, "Thanks!", "You're welcome.", "Description.", "@startuml\n@enduml")[0]["version"]
+
+    assert service.get_version_model_hash(project_name, version) == model_hash(MODEL)
+    assert service.get_version_model_hash(project_name, same) == model_hash(MODEL)
+    assert service.get_version_model_hash(project_name, 1) is None
+
+    def load():
+        raise AssertionError("the index is cached by the stored hash")
+    index = structure_index.get_index(model_hash(MODEL), load)
+    assert index.answer("What attributes does Order have?")[0] == "attributes"
+
+
+def test_index_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(structure_index, "_indexes", type(structure_index._indexes)())
+    monkeypatch.setattr(structure_index, "STRUCTURE_INDEX_CACHE_SIZE", 2)
+    for number in range(5):
+        structure_index.record({"attributes": [{"entity": f"Entity{number}", "property": "id"}]})
+    assert len(structure_index._indexes) == 2
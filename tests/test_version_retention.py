@@ -0,0 +1,80 @@
+from src.model.project_service import ProjectService
+from src.model.version_retention import RetentionPolicy, run_compaction
+from scripts.fakes import FakeCollection
+
+
+def _linear(count):
+    return [{"version": number, "parent": number - 1 if number > 1 else None} for number in range(1, count + 1)]
+
+
+def _parent_of(version):
+    return version.get("parent")
+
+
+def test_kept_versions_keeps_newest_initial_and_milestones():
+    policy = RetentionPolicy(keep=3, milestone_every=5, max_milestones=2)
+    kept = policy.kept_versions(_linear(30), 30, _parent_of)
+    # The head and its `keep` nearest ancestors, the initial version and the two newest milestones
+    assert kept == {1, 27, 28, 29, 30, 20, 25}
+
+
+def test_kept_versions_follows_the_head_after_undo():
+    policy = RetentionPolicy(keep=2, milestone_every=0, max_milestones=0)
+    kept = policy.kept_versions(_linear(20), 10, _parent_of)
+    assert {8, 9, 10} <= kept
+    assert {19, 20, 1} <= kept
+    assert 15 not in kept
+
+
+def test_kept_versions_keeps_same_as_targets():
+    versions = _linear(10)
+    versions[9]["same_as"] = 4
+    policy = RetentionPolicy(keep=1, milestone_every=0, max_milestones=0)
+    assert policy.kept_versions(versions, 10, _parent_of) == {1, 4, 9, 10}
+    assert policy.kept_versions([], None, _parent_of) == set()
+
+
+def _service_with_project(turns):
+    service = ProjectService(collection=FakeCollection(), archive_collection=FakeCollection("archive"))
+    project_name = service.create_project()[0]["project_name"]
+    for turn in range(2, turns + 1):
+        service.save_version(project_name, f"Message {turn}", f"Answer {turn}", f"Description {turn}", f"@startuml\n' {turn}\n@enduml")
+    return service, project_name
+
+
+def test_compaction_keeps_the_chat_history_and_undo():
+    service, project_name = _service_with_project(15)
+    before = service.get_project_data(project_name)[0]["project_data"]
+    policy = RetentionPolicy(keep=3, milestone_every=5, max_milestones=1)
+
+    summary = run_compaction(service, policy, pause=0)
+    assert summary["archived_versions"] == 15 - len({1, 10, 12, 13, 14, 15})
+    assert service.archive_collection.count_documents({}) == summary["archived_versions"]
+
+    after = service.get_project_data(project_name)[0]["project_data"]
+    assert after["chat_history"] == before["chat_history"]
+    assert after["domain_model_description"] == "Description 15"
+
+    # Compacting again after more turns keeps the turns archived the first time
+    for turn in range(16, 26):
+        service.save_version(project_name, f"Message {turn}", f"Answer {turn}", f"Description {turn}", "@startuml\n@enduml")
+    full = service.get_project_data(project_name)[0]["project_data"]["chat_history"]
+    run_compaction(service, policy, pause=0)
+    assert service.get_project_data(project_name)[0]["project_data"]["chat_history"] == full
+
+    # Undo skips archived versions
+    assert service.undo_version(project_name)[0]["project_data"]["version"] == 24
+
+
+def test_capped_runs_resume_after_the_last_examined_project():
+    service, first = _service_with_project(12)
+    second = service.create_project()[0]["project_name"]
+    for turn in range(2, 13):
+        service.save_version(second, f"Message {turn}", f"Answer {turn}", f"Description {turn}", "@startuml\n@enduml")
+    policy = RetentionPolicy(keep=2, milestone_every=0, max_milestones=0)
+
+    summary = run_compaction(service, policy, max_projects=1, pause=0)
+    assert summary["examined"] == 1 and summary["resume_after"] is not None
+    summary = run_compaction(service, policy, max_projects=1, pause=0, after_id=summary["resume_after"])
+    assert summary["examined"] == 1 and summary["compacted"] == 1
+    assert summary["resume_after"] is None
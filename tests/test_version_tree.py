@@ -0,0 +1,66 @@
+from src.model.project_service import ProjectService
+from scripts.fakes import FakeCollection
+
+
+def _project(turns):
+    service = ProjectService(collection=FakeCollection())
+    project_name = service.create_project()[0]["project_name"]
+    for turn in turns:
+        service.save_version(project_name, turn, f"Answer to {turn}", f"Description after {turn}", f"@startuml\n' {turn}\n@enduml")
+    return service, project_name
+
+
+def _state(service, project_name):
+    return service.get_project_data(project_name)[0]["project_data"]
+
+
+def _user_messages(project_data):
+    return [message["content"] for message in project_data["chat_history"] if message["role"] == "user"]
+
+
+def test_undo_and_redo_move_the_head_without_losing_versions():
+    service, project_name = _project(["A", "B", "C"])
+
+    result, status = service.undo_version(project_name)
+    assert status == 200
+    assert result["project_data"]["version"] == 3
+    assert result["project_data"]["can_redo"] and result["project_data"]["can_undo"]
+    assert _state(service, project_name)["domain_model_description"] == "Description after B"
+    assert _user_messages(_state(service, project_name)) == ["A", "B"]
+
+    assert service.redo_version(project_name)[0]["project_data"]["version"] == 4
+    assert _user_messages(_state(service, project_name)) == ["A", "B", "C"]
+    assert service.redo_version(project_name)[1] == 400
+
+
+def test_saving_after_undo_starts_a_branch_and_redo_follows_the_newest():
+    service, project_name = _project(["A", "B", "C"])
+    service.undo_version(project_name)
+    service.undo_version(project_name)
+    assert service.save_version(project_name, "D", "Answer to D", "Description after D", "@startuml\n@enduml")[0]["version"] == 5
+
+    state = _state(service, project_name)
+    assert _user_messages(state) == ["A", "D"]
+    assert state["version"] == 5 and not state["can_redo"]
+
+    service.undo_version(project_name)
+    # Both B and D branch off version 2; redo picks the newest
+    assert service.redo_version(project_name)[0]["project_data"]["version"] == 5
+
+
+def test_initial_version_cannot_be_undone():
+    service, project_name = _project([])
+    result, status = service.undo_version(project_name)
+    assert status == 400
+    assert not _state(service, project_name)["can_undo"]
+
+
+def test_unchanged_turns_refer_to_the_version_holding_the_content():
+    service, project_name = _project(["A"])
+    service.save_version(project_name, "Thanks", "You're welcome", "Description after A", "@startuml\n' A\n@enduml")
+    stored = service.projects_collection.find_one({"project_name": project_name})["versions"][-1]
+    assert stored["same_as"] == 2 and "plant_uml" not in stored
+
+    state = _state(service, project_name)
+    assert state["plant_uml"] == "@startuml\n' A\n@enduml"
+    assert _user_messages(state) == ["A", "Thanks"]